@@ -6,22 +6,31 @@ Created by @bruuhim with ❤️
 
 import os
 import sys
-import webbrowser
 import re
 import random
 import argparse
 import json
-import hashlib
 import time
 import struct
+import threading
+import queue
+from abc import ABC, abstractmethod
+from functools import lru_cache
 from pathlib import Path
-from datetime import datetime, timedelta
+from datetime import datetime
 
-try:
-    import requests
-except ImportError:
-    print("❌ 'requests' required: pip install requests")
-    sys.exit(1)
+# Heavier modules (requests, logging, webbrowser, hashlib, concurrent.futures,
+# sqlite3, ...) are imported where they are used, so startup, --help and
+# cached dry runs don't pay for them.
+
+def import_requests():
+    """Import requests on first use, exiting with a hint if it is missing"""
+    try:
+        import requests
+    except ImportError:
+        print("❌ 'requests' required: pip install requests")
+        sys.exit(1)
+    return requests
 
 __version__ = "2.0.0"
 __author__ = "@bruuhim"
@@ -82,10 +91,65 @@ COMMON_INDICATORS = {
 # Configuration defaults
 DEFAULT_CONFIG = {
     'icon_dir': r"C:\AniFold\icons",
-    'cache_file': str(Path.home() / '.anifold_cache.json'),
+    'cache_file': str(Path.home() / '.anifold_cache.db'),
     'cache_ttl_hours': 24,
+    'cache_max_entries': 50000,
+    # Fresh MAL results also kept in memory, in front of the SQLite cache
+    'cache_memory_entries': 4096,
+    'manifest_dir': str(Path.home() / '.anifold_manifests'),
+    'title_index': str(Path.home() / '.anifold_titles.db'),
+    # Local title matches below this similarity are checked against Jikan
+    'index_min_confidence': 0.85,
+    'scan_depth': 1,
+    'scan_workers': 8,
+    # Video file names read from a generically named folder to vote on its title,
+    # and how many unanimous votes settle it early
+    'episode_sample': 24,
+    'episode_quorum': 5,
+    # Content-addressed store of validated icons, inside the icon directory
+    'icon_store_dir': '.anifold_store',
+    # Worker processes converting downloaded PNG/JPG images to .ico
+    'convert_workers': min(8, os.cpu_count() or 1),
+    # Headless icon providers: concurrent searches/downloads, requests per second
+    # to any one host, and candidates tried per title
+    'download_workers': 4,
+    'download_per_host': 2,
+    'icon_candidates': 3,
+    # Partial downloads are kept here, inside the icon directory, to be resumed
+    'icon_download_dir': '.anifold_downloads',
+    # How desktop.ini/folder attributes are set: windows, xattr (Samba shares) or none
+    'attr_backend': 'auto',
+    # Folders whose attributes are set together by the apply stage
+    'apply_batch_size': 64,
+    'watch_timeout': 300,
+    'watch_poll_interval': 0.5,
+    # A new icon must keep the same size/mtime this long to count as complete
+    'watch_settle_time': 1.0,
+    # Expired entries are kept this long so they can be revalidated with a 304
+    'cache_stale_hours': 24 * 7,
     'max_retries': 3,
-    'retry_delay': 2
+    'retry_delay': 2,
+    # Longest Retry-After that is waited out instead of giving up
+    'max_retry_after': 60,
+    # Failed lookups are not retried for this long (real results are cached separately)
+    'failure_ttl_minutes': 5,
+    # Consecutive Jikan failures that pause all lookups, and for how long
+    'breaker_failures': 5,
+    'breaker_reset_seconds': 30,
+    'jikan_url': "https://api.jikan.moe/v4",
+    'connect_timeout': 5,
+    'read_timeout': 10,
+    'lookup_workers': 4,
+    # MAL candidates kept per search, ranked per folder before choosing
+    'mal_candidates': 10,
+    # Ranked candidates written per folder to a --plan file
+    'plan_candidates': 5,
+    # Lowest ranking confidence --auto-select accepts; the lowest value at
+    # which benchmarks/bench_ranking.py's hand-labeled corpus has no wrong pick
+    'min_confidence': 0.45,
+    # Jikan allows 3 requests/second and 60 requests/minute
+    'jikan_per_second': 3,
+    'jikan_per_minute': 60
 }
 
 def show_banner():
@@ -100,11 +164,38 @@ def get_working_dir():
         return sys.argv[1]
     return os.getcwd()
 
+class LazyPattern:
+    """A regex compiled on first use.
+
+    The module-level name it is assigned to is then rebound to the compiled
+    pattern, so later uses cost nothing extra.
+    """
+
+    def __init__(self, name, pattern, flags=0):
+        self.name = name
+        self.pattern = pattern
+        self.flags = flags
+        self.compiled = None
+
+    def __getattr__(self, attr):
+        if self.compiled is None:
+            self.compiled = re.compile(self.pattern, self.flags)
+            globals()[self.name] = self.compiled
+        return getattr(self.compiled, attr)
+
+# Name-cleaning patterns
+BRACKETS_RE = LazyPattern('BRACKETS_RE', r'\[.*?\]|\(.*?\)')
+EXTENSION_RE = LazyPattern('EXTENSION_RE', r'\.[a-zA-Z0-9]{2,4}$')
+TOKEN_RE = LazyPattern('TOKEN_RE', r'[^._\-\s]+')
+SEASON_RE = LazyPattern('SEASON_RE', r'season\s*\d+', re.IGNORECASE)
+
+@lru_cache(maxsize=65536)
 def clean_anime_name(folder_name, max_words=5):
     """Clean messy folder names to extract anime names.
 
     Removes brackets, extensions, quality indicators, years, and common release keywords.
-    Focuses on actual anime title words.
+    Focuses on actual anime title words. Results are memoized, so the library
+    scan, mode detection and folder processing only clean each name once.
 
     Args:
         folder_name: Raw folder name string
@@ -114,75 +205,621 @@ def clean_anime_name(folder_name, max_words=5):
         Cleaned anime name suitable for MAL search
     """
     # Remove brackets and parentheses (often contain quality info)
-    folder_name = re.sub(r'\[.*?\]|\(.*?\)', '', folder_name)
+    folder_name = BRACKETS_RE.sub('', folder_name)
     # Remove file extensions
-    folder_name = re.sub(r'\.[a-zA-Z0-9]{2,4}$', '', folder_name)
-    # Split on common separators
-    parts = re.split(r'[._\-\s]+', folder_name)
-    # Filter out unwanted parts
-    clean = [
-        part for part in parts
-        if part and not part.isdigit() and part.lower() not in COMMON_INDICATORS
-        and not re.match(r'^(19|20)\d{2}$', part) and not part.startswith('-')
-    ]
+    folder_name = EXTENSION_RE.sub('', folder_name)
+    # Tokenize on common separators, keeping only title words. Years are
+    # all digits, and separators never end up inside a token.
+    clean = []
+    for part in TOKEN_RE.findall(folder_name):
+        if part.isdigit() or part.lower() in COMMON_INDICATORS:
+            continue
+        clean.append(part)
+        if len(clean) == max_words:
+            break
     if clean:
         return ' '.join(clean[:max_words]).title().strip()
     return os.path.basename(folder_name)
 
+# Stages in the order they are shown; others follow alphabetically
+METRIC_STAGES = [
+    'folder', 'clean_name', 'episode_vote', 'mal_lookup', 'title_index', 'cache_io', 'rate_limit_wait', 'http',
+    'icon_scan', 'human_wait', 'icon_fetch', 'download', 'icon_convert', 'icon_store', 'apply', 'apply_attributes'
+]
+
+class StageTimer:
+    """Context manager adding its block's duration to a Metrics stage"""
+
+    __slots__ = ('metrics', 'stage', 'start')
+
+    def __init__(self, metrics, stage):
+        self.metrics = metrics
+        self.stage = stage
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.metrics.record(self.stage, time.perf_counter() - self.start)
+        return False
+
+# Where MAL lookups were answered, nearest first, and the counter for each
+LOOKUP_TIERS = [
+    ('title_index', 'title_index_hits'),
+    ('memory', 'cache_memory_hits'),
+    ('disk', 'cache_disk_hits'),
+    ('network', 'cache_misses')
+]
+
+class Metrics:
+    """Per-stage timings and event counters for a run.
+
+    Stages are timed with `with metrics.timer('http'):` and events counted
+    with metrics.count('cache_hit'). Both are thread-safe, so the lookup
+    workers record into the same instance; stages running on different
+    threads overlap, so their totals can add up to more than the run took.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self.timings = {}
+            self.counters = {}
+            self.started = time.time()
+
+    def timer(self, stage):
+        return StageTimer(self, stage)
+
+    def record(self, stage, seconds):
+        with self.lock:
+            self.timings.setdefault(stage, []).append(seconds)
+
+    def count(self, event, amount=1):
+        with self.lock:
+            self.counters[event] = self.counters.get(event, 0) + amount
+
+    def summary(self):
+        """Timings per stage (calls, total, mean, p95, max in seconds) and counters"""
+        with self.lock:
+            timings = {stage: sorted(values) for stage, values in self.timings.items()}
+            counters = dict(self.counters)
+        order = {stage: i for i, stage in enumerate(METRIC_STAGES)}
+        stages = {}
+        for stage in sorted(timings, key=lambda stage: (order.get(stage, len(order)), stage)):
+            values = timings[stage]
+            total = sum(values)
+            stages[stage] = {
+                'calls': len(values),
+                'total': total,
+                'mean': total / len(values),
+                'p95': values[min(len(values) - 1, int(round(0.95 * (len(values) - 1))))],
+                'max': values[-1]
+            }
+        lookups = sum(counters.get(counter, 0) for _, counter in LOOKUP_TIERS)
+        tiers = {
+            tier: {'hits': counters.get(counter, 0), 'rate': counters.get(counter, 0) / lookups}
+            for tier, counter in LOOKUP_TIERS
+        } if lookups else {}
+        return {
+            'started_at': datetime.fromtimestamp(self.started).isoformat(timespec='seconds'),
+            'elapsed': time.time() - self.started,
+            'stages': stages,
+            'counters': dict(sorted(counters.items())),
+            'lookup_tiers': tiers
+        }
+
+    def print_table(self):
+        """Print the stage timings and counters"""
+        summary = self.summary()
+        if not summary['stages'] and not summary['counters']:
+            return
+        print(f"\n{Colors.BOLD}{Colors.CYAN}⏱️  Where the time went ({summary['elapsed']:.1f}s run){Colors.RESET}")
+        print(f"{Colors.CYAN}  {'stage':<18}{'calls':>7}{'total':>10}{'mean':>10}{'p95':>10}{'max':>10}{Colors.RESET}")
+        for stage, row in summary['stages'].items():
+            print(f"  {stage:<18}{row['calls']:>7}{row['total']:>9.2f}s"
+                  f"{row['mean'] * 1000:>8.1f}ms{row['p95'] * 1000:>8.1f}ms{row['max'] * 1000:>8.1f}ms")
+        if summary['counters']:
+            counters = ', '.join(f"{event} {value:,}" for event, value in summary['counters'].items())
+            print(f"{Colors.CYAN}  🔢 {counters}{Colors.RESET}")
+        if summary['lookup_tiers']:
+            lookups = sum(row['hits'] for row in summary['lookup_tiers'].values())
+            tiers = ', '.join(f"{tier} {row['hits']:,} ({row['rate']:.0%})"
+                              for tier, row in summary['lookup_tiers'].items())
+            print(f"{Colors.CYAN}  🗄️  {lookups:,} MAL lookups answered by: {tiers}{Colors.RESET}")
+
+    def write(self, path):
+        """Write the summary as JSON, or as a Prometheus textfile for a .prom path"""
+        path = Path(path)
+        summary = self.summary()
+        if path.suffix.lower() == '.prom':
+            lines = [
+                '# HELP anifold_stage_seconds_total Time spent in each stage of the last run.',
+                '# TYPE anifold_stage_seconds_total counter'
+            ]
+            lines += [f'anifold_stage_seconds_total{{stage="{stage}"}} {row["total"]:.6f}'
+                      for stage, row in summary['stages'].items()]
+            lines += [
+                '# HELP anifold_stage_calls_total Times each stage ran in the last run.',
+                '# TYPE anifold_stage_calls_total counter'
+            ]
+            lines += [f'anifold_stage_calls_total{{stage="{stage}"}} {row["calls"]}'
+                      for stage, row in summary['stages'].items()]
+            lines += [
+                '# HELP anifold_events_total Events counted in the last run.',
+                '# TYPE anifold_events_total counter'
+            ]
+            lines += [f'anifold_events_total{{event="{event}"}} {value}'
+                      for event, value in summary['counters'].items()]
+            lines += [
+                '# HELP anifold_run_seconds Duration of the last run.',
+                '# TYPE anifold_run_seconds gauge',
+                f'anifold_run_seconds {summary["elapsed"]:.3f}'
+            ]
+            content = '\n'.join(lines) + '\n'
+        else:
+            content = json.dumps(summary, indent=2) + '\n'
+        # Written through a rename so collectors never read a partial file
+        tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        tmp.write_text(content, encoding='utf-8')
+        os.replace(tmp, path)
+
+metrics = Metrics()
+
+def run_profiled(profile_file, func, *args, **kwargs):
+    """Run func under cProfile, dump the stats to profile_file and print the top entries"""
+    import cProfile
+    import pstats
+
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        return func(*args, **kwargs)
+    finally:
+        profiler.disable()
+        profiler.dump_stats(profile_file)
+        print(f"\n{Colors.BOLD}{Colors.CYAN}🔬 Profile saved to {profile_file} (top functions by cumulative time):{Colors.RESET}")
+        pstats.Stats(profiler, stream=sys.stdout).sort_stats('cumulative').print_stats(15)
+
+class TokenBucket:
+    """Token bucket allowing `capacity` calls per `period` seconds"""
+
+    def __init__(self, capacity, period):
+        self.capacity = float(capacity)
+        self.rate = capacity / float(period)
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+
+    def refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self):
+        """Seconds until one token is available (0 if available now)"""
+        if self.tokens >= 1:
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+class RateLimiter:
+    """Thread-safe limiter that takes a token from every bucket at once.
+
+    A token is only consumed when all buckets can provide one, so waiting on the
+    per-minute bucket never burns per-second tokens.
+    """
+
+    def __init__(self, limits):
+        self.buckets = [TokenBucket(capacity, period) for capacity, period in limits]
+        self.lock = threading.Lock()
+        self.resume_at = 0.0
+
+    def defer(self, seconds):
+        """Hold back every request for the next `seconds` (e.g. a server's Retry-After)"""
+        with self.lock:
+            self.resume_at = max(self.resume_at, time.monotonic() + seconds)
+
+    def acquire(self):
+        """Block until a request is allowed by all buckets"""
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                for bucket in self.buckets:
+                    bucket.refill(now)
+                wait = max((bucket.wait_time() for bucket in self.buckets), default=0.0)
+                wait = max(wait, self.resume_at - now)
+                if wait <= 0:
+                    for bucket in self.buckets:
+                        bucket.tokens -= 1
+                    return
+            time.sleep(wait)
+
+class JikanError(Exception):
+    """A Jikan request that failed.
+
+    Attributes:
+        status: HTTP status code, or None if no response was received
+        retry_after: Seconds the server asked us to wait, if it said so
+        retryable: Whether trying again later may succeed
+    """
+
+    retryable = True
+
+    def __init__(self, message, status=None, retry_after=None):
+        super().__init__(message)
+        self.status = status
+        self.retry_after = retry_after
+
+class JikanConnectionError(JikanError):
+    """Jikan could not be reached or did not answer in time"""
+
+class JikanServerError(JikanError):
+    """Jikan answered with a 5xx status or an unreadable body"""
+
+class JikanRateLimited(JikanError):
+    """Jikan answered 429 Too Many Requests"""
+
+class JikanClientError(JikanError):
+    """Jikan rejected the request itself (4xx); retrying will not help"""
+
+    retryable = False
+
+class CircuitOpenError(JikanError):
+    """Requests are paused because Jikan kept failing"""
+
+def parse_retry_after(value):
+    """Seconds to wait from a Retry-After header (delay-seconds or HTTP date)"""
+    if not value:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    from email.utils import parsedate_to_datetime
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(when.timestamp() - time.time(), 0.0)
+
+class CircuitBreaker:
+    """Stop calling a service that keeps failing.
+
+    After `failure_threshold` consecutive failures the circuit opens and
+    every call fails fast with CircuitOpenError for `reset_timeout`
+    seconds. Then a single trial call is let through: success closes the
+    circuit again, failure keeps it open for another period.
+    """
+
+    def __init__(self, failure_threshold=None, reset_timeout=None):
+        self.failure_threshold = failure_threshold or DEFAULT_CONFIG['breaker_failures']
+        self.reset_timeout = reset_timeout or DEFAULT_CONFIG['breaker_reset_seconds']
+        self.lock = threading.Lock()
+        self.failures = 0
+        self.opened_at = None
+        self.trial_running = False
+        self.times_opened = 0
+
+    @property
+    def is_open(self):
+        return self.opened_at is not None
+
+    def before_call(self):
+        """Raise CircuitOpenError unless a call may go ahead now"""
+        with self.lock:
+            if self.opened_at is None:
+                return
+            remaining = self.opened_at + self.reset_timeout - time.monotonic()
+            if remaining > 0 or self.trial_running:
+                raise CircuitOpenError(
+                    f"Jikan is unavailable, requests paused for {max(remaining, 0):.0f}s",
+                    retry_after=max(remaining, 1.0)
+                )
+            self.trial_running = True
+
+    def record_success(self):
+        with self.lock:
+            self.failures = 0
+            self.opened_at = None
+            self.trial_running = False
+
+    def release(self):
+        """End a trial call that neither succeeded nor failed (e.g. interrupted)"""
+        with self.lock:
+            self.trial_running = False
+
+    def record_failure(self):
+        with self.lock:
+            self.failures += 1
+            if self.trial_running or (self.opened_at is None and self.failures >= self.failure_threshold):
+                if self.opened_at is None:
+                    self.times_opened += 1
+                self.opened_at = time.monotonic()
+            self.trial_running = False
+
+class JikanResponse:
+    """Result of a Jikan request.
+
+    `data` is the decoded JSON body, or None when the server answered
+    304 Not Modified to a conditional request.
+    """
+
+    def __init__(self, status, data=None, etag=None, last_modified=None):
+        self.status = status
+        self.data = data
+        self.etag = etag
+        self.last_modified = last_modified
+
+    @property
+    def not_modified(self):
+        return self.status == 304
+
+class JikanClient:
+    """Shared HTTP client for the Jikan API.
+
+    Keeps one requests.Session with a connection pool, so lookups reuse
+    keep-alive connections instead of a new TCP+TLS handshake each time.
+    Every request waits for the rate limiter first and goes through a
+    circuit breaker. Failures are raised as JikanError subclasses; a 429's
+    Retry-After also holds back every other request through the limiter.
+
+    Args:
+        base_url: Jikan API root, e.g. https://api.jikan.moe/v4
+        limiter: RateLimiter shared by all requests
+        connect_timeout: Seconds to wait for a connection
+        read_timeout: Seconds to wait for a response
+        pool_size: Max keep-alive connections kept to the host
+    """
+
+    def __init__(self, base_url, limiter, connect_timeout=None, read_timeout=None, pool_size=None,
+                 breaker=None):
+        self.base_url = base_url.rstrip('/')
+        self.limiter = limiter
+        self.breaker = breaker or CircuitBreaker()
+        self.timeout = (
+            connect_timeout or DEFAULT_CONFIG['connect_timeout'],
+            read_timeout or DEFAULT_CONFIG['read_timeout']
+        )
+        pool_size = max(pool_size or DEFAULT_CONFIG['lookup_workers'], 1)
+
+        requests = import_requests()
+        self.request_error = requests.RequestException
+        self.session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self.session.headers.update({
+            'User-Agent': f'AniFold/{__version__}',
+            'Accept': 'application/json',
+            'Accept-Encoding': 'gzip, deflate'
+        })
+
+    def get(self, path, params=None, etag=None, last_modified=None):
+        """GET base_url/path, revalidating with ETag/Last-Modified when given"""
+        headers = {}
+        if etag:
+            headers['If-None-Match'] = etag
+        if last_modified:
+            headers['If-Modified-Since'] = last_modified
+
+        self.breaker.before_call()
+        try:
+            result = self._get(path, params, headers, etag, last_modified)
+        except (JikanConnectionError, JikanServerError):
+            self.breaker.record_failure()
+            raise
+        except JikanError:
+            # Jikan is up, it just refused this request
+            self.breaker.record_success()
+            raise
+        except BaseException:
+            self.breaker.release()
+            raise
+        self.breaker.record_success()
+        return result
+
+    def _get(self, path, params, headers, etag, last_modified):
+        with metrics.timer('rate_limit_wait'):
+            self.limiter.acquire()
+        url = f"{self.base_url}/{path.lstrip('/')}"
+        metrics.count('http_requests')
+        try:
+            with metrics.timer('http'):
+                response = self.session.get(url, params=params, headers=headers, timeout=self.timeout)
+        except self.request_error as e:
+            metrics.count('http_errors')
+            raise JikanConnectionError(f"Cannot reach Jikan: {e}") from e
+
+        status = response.status_code
+        metrics.count('http_bytes', int(response.headers.get('Content-Length') or len(response.content)))
+        if status == 304:
+            return JikanResponse(304, None, response.headers.get('ETag', etag),
+                                 response.headers.get('Last-Modified', last_modified))
+        if status >= 400:
+            metrics.count('http_errors')
+            retry_after = parse_retry_after(response.headers.get('Retry-After'))
+            message = f"Jikan returned HTTP {status} for {path}"
+            if status == 429:
+                metrics.count('http_rate_limited')
+                self.limiter.defer(retry_after or DEFAULT_CONFIG['retry_delay'])
+                raise JikanRateLimited(message, status, retry_after)
+            if status >= 500:
+                raise JikanServerError(message, status, retry_after)
+            raise JikanClientError(message, status)
+        try:
+            data = response.json()
+        except ValueError as e:
+            raise JikanServerError(f"Invalid JSON from Jikan: {e}", status) from e
+        return JikanResponse(status, data, response.headers.get('ETag', etag),
+                             response.headers.get('Last-Modified', last_modified))
+
+    def close(self):
+        self.session.close()
+
+_jikan_client = None
+_jikan_settings = {}
+_jikan_lock = threading.Lock()
+
+def configure_jikan(base_url=None, per_second=None, per_minute=None,
+                    connect_timeout=None, read_timeout=None, pool_size=None):
+    """Set up the shared Jikan client used by all MAL lookups.
+
+    The client (and with it requests) is only created by the first lookup
+    that actually needs the network.
+    """
+    global _jikan_client, _jikan_settings
+    with _jikan_lock:
+        if _jikan_client:
+            _jikan_client.close()
+        _jikan_client = None
+        _jikan_settings = {
+            'base_url': base_url,
+            'per_second': per_second,
+            'per_minute': per_minute,
+            'connect_timeout': connect_timeout,
+            'read_timeout': read_timeout,
+            'pool_size': pool_size
+        }
+
+def get_jikan_client():
+    """Return the shared Jikan client, creating it on first use"""
+    global _jikan_client
+    with _jikan_lock:
+        if _jikan_client is None:
+            settings = _jikan_settings
+            limiter = RateLimiter([
+                (settings.get('per_second') or DEFAULT_CONFIG['jikan_per_second'], 1.0),
+                (settings.get('per_minute') or DEFAULT_CONFIG['jikan_per_minute'], 60.0)
+            ])
+            _jikan_client = JikanClient(
+                settings.get('base_url') or DEFAULT_CONFIG['jikan_url'],
+                limiter,
+                settings.get('connect_timeout'),
+                settings.get('read_timeout'),
+                settings.get('pool_size')
+            )
+        return _jikan_client
+
+class AnimeRecord:
+    """The parts of a Jikan anime object AniFold uses.
+
+    Jikan sends synopsis, images, trailer, broadcast, producers and more
+    with every search result. Results are projected onto this record as
+    soon as they arrive, so neither the cache nor the rest of the run
+    carries the full objects.
+    """
+
+    __slots__ = ('mal_id', 'title', 'title_english', 'title_japanese', 'title_synonyms',
+                 'year', 'score', 'status', 'episodes', 'type')
+
+    def __init__(self, mal_id=None, title='', title_english=None, title_japanese=None, title_synonyms=(),
+                 year=None, score=None, status=None, episodes=None, type=None):
+        self.mal_id = mal_id
+        self.title = title
+        self.title_english = title_english
+        self.title_japanese = title_japanese
+        self.title_synonyms = tuple(title_synonyms or ())
+        self.year = year
+        self.score = score
+        self.status = status
+        self.episodes = episodes
+        self.type = type
+
+    @classmethod
+    def from_jikan(cls, anime):
+        """Project a Jikan anime object (or a title dump record shaped like one)"""
+        year = anime.get('year')
+        if year is None:
+            # Jikan leaves year empty for many older shows; the start date still has it
+            aired = anime.get('aired')
+            if isinstance(aired, dict):
+                year = (((aired.get('prop') or {}).get('from') or {}).get('year'))
+        return cls(anime.get('mal_id'), anime.get('title') or '', anime.get('title_english'),
+                   anime.get('title_japanese'), anime.get('title_synonyms'), year,
+                   anime.get('score'), anime.get('status'), anime.get('episodes'), anime.get('type'))
+
+    def to_row(self):
+        """The record as a list of its fields, in __slots__ order"""
+        return [getattr(self, field) for field in self.__slots__]
+
+def dump_anime_records(records):
+    """Compact JSON for a result list: one array of fields per record"""
+    return json.dumps([record.to_row() for record in records], ensure_ascii=False, separators=(',', ':'))
+
+def load_anime_records(text):
+    """Records from dump_anime_records output, or from a list of full Jikan objects"""
+    return [AnimeRecord.from_jikan(item) if isinstance(item, dict) else AnimeRecord(*item)
+            for item in json.loads(text)]
+
+def filter_mal_results(results, limit=None):
+    """Keep the first `limit` unique, already aired anime from a list of AnimeRecords"""
+    limit = limit or DEFAULT_CONFIG['mal_candidates']
+    current_year = datetime.now().year
+    filtered = []
+    seen = set()
+
+    for anime in results:
+        title = anime.title
+        status = anime.status
+        year = anime.year
+
+        if status == 'Not yet aired':
+            continue
+        if year and year > current_year:
+            continue
+
+        if title not in seen:
+            seen.add(title)
+            filtered.append(anime)
+            if len(filtered) >= limit:
+                break
+
+    return filtered
+
+def fetch_mal_anime(query, etag=None, last_modified=None):
+    """Query Jikan for anime matching query.
+
+    Returns a JikanResponse whose data is the filtered list of AnimeRecords,
+    or a 304 response when etag/last_modified show the cached results are
+    current.
+    """
+    params = {'q': query, 'type': 'tv', 'limit': 10}
+    response = get_jikan_client().get('anime', params, etag, last_modified)
+    if not response.not_modified:
+        response.data = filter_mal_results(
+            [AnimeRecord.from_jikan(anime) for anime in response.data.get('data', []) if isinstance(anime, dict)]
+        )
+    return response
+
 def search_mal_anime(query):
     try:
-        url = f"https://api.jikan.moe/v4/anime?q={query}&type=tv&limit=10"
-        response = requests.get(url, timeout=10)
-        response.raise_for_status()
-        data = response.json()
-        results = data.get('data', [])
-        
-        # Filter: only aired/airing anime
-        current_year = datetime.now().year
-        filtered = []
-        seen = set()
-        
-        for anime in results:
-            title = anime.get('title', '')
-            status = anime.get('status', '')
-            year = anime.get('year')
-            
-            if status == 'Not yet aired':
-                continue
-            if year and year > current_year:
-                continue
-            
-            if title not in seen:
-                seen.add(title)
-                filtered.append(anime)
-                if len(filtered) >= 3:
-                    break
-        
-        return filtered
-    except Exception as e:
+        return fetch_mal_anime(query).data
+    except JikanError as e:
         print(f"{Colors.RED}⚠️  MAL error: {e}{Colors.RESET}")
         return []
 
-def get_anime_name_from_mal(guess):
+def get_anime_name_from_mal(guess, results=None):
     print(f"\n{Colors.CYAN}🔍 Searching MAL for: '{guess}'...{Colors.RESET}")
-    results = search_mal_anime(guess)
+    if results is None:
+        results = [anime for _, anime in rank_mal_candidates(search_mal_anime(guess), guess)[:3]]
     
     if not results:
         print(f"{Colors.RED}❌ No results! Using best guess.{Colors.RESET}\n")
         return guess
     
     if len(results) == 1:
-        title = results[0]['title']
-        year = results[0].get('year', '')
+        title = results[0].title
+        year = results[0].year
         year_str = f" ({year})" if year else ""
         print(f"{Colors.GREEN}✨ Found: {title}{year_str}{Colors.RESET}\n")
         return title
     
     print(f"\n{Colors.YELLOW}🎯 Found {len(results)} results:{Colors.RESET}")
     for idx, anime in enumerate(results, 1):
-        title = anime.get('title', 'Unknown')
-        year = anime.get('year', '')
-        score = anime.get('score', 0)
+        title = anime.title or 'Unknown'
+        year = anime.year
+        score = anime.score
         year_str = f" {Colors.CYAN}({year}){Colors.RESET}" if year else ""
         score_str = f" {Colors.YELLOW}⭐{score}{Colors.RESET}" if score else ""
         print(f"  {Colors.BOLD}{idx}.{Colors.RESET} {title}{year_str}{score_str}")
@@ -190,15 +827,15 @@ def get_anime_name_from_mal(guess):
     choice = input(f"\n{Colors.PINK}👉 Choose (Enter for #1): {Colors.RESET}").strip()
     
     if not choice:
-        return results[0]['title']
+        return results[0].title
     elif choice.isdigit() and 1 <= int(choice) <= len(results):
-        return results[int(choice) - 1]['title']
+        return results[int(choice) - 1].title
     else:
-        return results[0]['title']
+        return results[0].title
 
 def search_deviantart(anime_name):
-    search_query = f"{anime_name} icon"
-    url = f"https://www.deviantart.com/search?q={search_query.replace(' ', '+')}"
+    import webbrowser
+    url = DeviantArtProvider.search_url(anime_name)
     print(f"\n{Colors.BLUE}🎨 Opening DeviantArt...{Colors.RESET}")
     webbrowser.open_new_tab(url)
 
@@ -213,11 +850,127 @@ def find_latest_icon(icon_dir):
     print(f"{Colors.GREEN}📦 Using: {latest.name}{Colors.RESET}")
     return str(latest)
 
-def apply_folder_icon(icon_path):
-    current_dir = Path.cwd()
-    desktop_ini = current_dir / "desktop.ini"
+# Windows file attribute bits (as used by attrib, SetFileAttributesW and Samba)
+FILE_ATTRIBUTE_READONLY = 0x01
+FILE_ATTRIBUTE_HIDDEN = 0x02
+FILE_ATTRIBUTE_SYSTEM = 0x04
+FILE_ATTRIBUTE_DIRECTORY = 0x10
+FILE_ATTRIBUTE_ARCHIVE = 0x20
+
+class AttributeBackend:
+    """Reads and writes Windows file attributes.
+
+    Subclasses implement get/set for a single path; update() applies a whole
+    batch of changes and skips paths whose attributes are already right.
+    """
+
+    name = 'none'
+
+    def get(self, path):
+        return 0
+
+    def set(self, path, attrs):
+        pass
+
+    def update(self, changes):
+        """Apply [(path, add, remove), ...] attribute changes.
+
+        Returns:
+            List of (path, error) for the changes that failed
+        """
+        failures = []
+        for path, add, remove in changes:
+            try:
+                current = self.get(path)
+                wanted = (current | add) & ~remove
+                if wanted != current:
+                    self.set(path, wanted)
+            except OSError as e:
+                failures.append((path, e))
+        return failures
+
+class WindowsAttributeBackend(AttributeBackend):
+    """File attributes through GetFileAttributesW/SetFileAttributesW"""
+
+    name = 'windows'
+    INVALID_FILE_ATTRIBUTES = 0xFFFFFFFF
+
+    def __init__(self):
+        import ctypes
+        from ctypes import wintypes
+        self.ctypes = ctypes
+        kernel32 = ctypes.WinDLL('kernel32', use_last_error=True)
+        self._get = kernel32.GetFileAttributesW
+        self._get.argtypes = [wintypes.LPCWSTR]
+        self._get.restype = wintypes.DWORD
+        self._set = kernel32.SetFileAttributesW
+        self._set.argtypes = [wintypes.LPCWSTR, wintypes.DWORD]
+        self._set.restype = wintypes.BOOL
+
+    def _error(self, path):
+        code = self.ctypes.get_last_error()
+        return OSError(None, self.ctypes.FormatError(code), str(path), code)
+
+    def get(self, path):
+        attrs = self._get(str(path))
+        if attrs == self.INVALID_FILE_ATTRIBUTES:
+            raise self._error(path)
+        return attrs
+
+    def set(self, path, attrs):
+        # Directories and "no attributes" are reported, not set
+        attrs &= ~FILE_ATTRIBUTE_DIRECTORY
+        if not self._set(str(path), attrs):
+            raise self._error(path)
+
+class XattrAttributeBackend(AttributeBackend):
+    """File attributes in the user.DOSATTRIB xattr Samba uses on Linux shares.
+
+    Samba values start with the attributes as a "0x.." string; the rest of
+    the blob is optional, so only that string is written.
+    """
+
+    name = 'xattr'
+    XATTR = 'user.DOSATTRIB'
+
+    def get(self, path):
+        try:
+            value = os.getxattr(path, self.XATTR)
+        except OSError as e:
+            import errno
+            if e.errno == errno.ENODATA:
+                return FILE_ATTRIBUTE_DIRECTORY if os.path.isdir(path) else FILE_ATTRIBUTE_ARCHIVE
+            raise
+        text = value.split(b'\0', 1)[0].decode('ascii', 'replace')
+        try:
+            return int(text, 16)
+        except ValueError:
+            return 0
+
+    def set(self, path, attrs):
+        os.setxattr(path, self.XATTR, f"0x{attrs:x}".encode('ascii') + b'\0')
+
+ATTRIBUTE_BACKENDS = {
+    'windows': WindowsAttributeBackend,
+    'xattr': XattrAttributeBackend,
+    'none': AttributeBackend
+}
+
+def get_attribute_backend(name='auto'):
+    """Create the attribute backend called name ('auto' picks one for this OS)"""
+    if name == 'auto':
+        if os.name == 'nt':
+            name = 'windows'
+        elif hasattr(os, 'setxattr'):
+            name = 'xattr'
+        else:
+            name = 'none'
+    return ATTRIBUTE_BACKENDS[name]()
+
+@lru_cache(maxsize=4096)
+def desktop_ini_bytes(icon_path):
+    """desktop.ini content pointing a folder at icon_path (memoized: folders share icons)"""
     icon_abs = Path(icon_path).resolve()
-    
     ini_content = f"""[.ShellClassInfo]
 IconResource={icon_abs},0
 IconFile={icon_abs}
@@ -229,18 +982,124 @@ Vid=
 FolderType=Generic
 Logo={icon_abs}
 """
-    
+    # Same line endings as the text-mode writes of earlier versions, so
+    # their files are recognized as unchanged
+    return ini_content.replace('\n', os.linesep).encode('utf-8')
+
+class FolderIconApplier:
+    """Write desktop.ini files and set their attributes in batches.
+
+    Each apply() writes the folder's desktop.ini through a temporary file
+    and a rename, so a crash never leaves a half-written file, and skips
+    the write entirely when the file already has the same bytes. The
+    attributes Explorer needs (hidden+system desktop.ini, read-only folder)
+    are queued and set together by flush(), which runs every `batch_size`
+    folders and when the applier is closed. Callbacks passed to apply() run
+    after their folder's attributes are set, so a folder is only recorded
+    as done once it is complete.
+    """
+
+    def __init__(self, backend=None, batch_size=None):
+        self.backend = backend or get_attribute_backend()
+        self.batch_size = batch_size or DEFAULT_CONFIG['apply_batch_size']
+        self.pending = []
+        self.written = 0
+        self.unchanged = 0
+        self.attribute_failures = 0
+
+    def apply(self, folder_path, icon_path, on_applied=None):
+        """Point folder_path at icon_path.
+
+        Returns:
+            True if desktop.ini was written, False if it was already up to date
+
+        Raises:
+            OSError: If desktop.ini cannot be written
+        """
+        with metrics.timer('apply'):
+            changed = self._write(folder_path, icon_path)
+        folder_path = Path(folder_path)
+        self.pending.append((folder_path, folder_path / 'desktop.ini', on_applied))
+        if len(self.pending) >= self.batch_size:
+            self.flush()
+        return changed
+
+    def _write(self, folder_path, icon_path):
+        """Write folder_path's desktop.ini unless it is already identical"""
+        folder_path = Path(folder_path)
+        desktop_ini = folder_path / 'desktop.ini'
+        content = desktop_ini_bytes(icon_path)
+
+        try:
+            st = desktop_ini.stat()
+        except FileNotFoundError:
+            st = None
+        changed = st is None or st.st_size != len(content) or desktop_ini.read_bytes() != content
+
+        if changed:
+            if st is not None:
+                # A read-only desktop.ini cannot be replaced on Windows
+                self.backend.update([(desktop_ini, 0, FILE_ATTRIBUTE_READONLY)])
+            tmp = folder_path / f".desktop.ini.{os.getpid()}.tmp"
+            try:
+                with open(tmp, 'wb') as f:
+                    f.write(content)
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(tmp, desktop_ini)
+            except BaseException:
+                try:
+                    tmp.unlink()
+                except OSError:
+                    pass
+                raise
+            self.written += 1
+            metrics.count('desktop_ini_written')
+        else:
+            self.unchanged += 1
+            metrics.count('desktop_ini_unchanged')
+        return changed
+
+    def flush(self):
+        """Set the attributes of every pending folder, then run their callbacks"""
+        pending, self.pending = self.pending, []
+        if not pending:
+            return
+        changes = []
+        for folder_path, desktop_ini, _ in pending:
+            changes.append((desktop_ini, FILE_ATTRIBUTE_HIDDEN | FILE_ATTRIBUTE_SYSTEM, 0))
+            changes.append((folder_path, FILE_ATTRIBUTE_READONLY, 0))
+        with metrics.timer('apply_attributes'):
+            failures = self.backend.update(changes)
+        if failures:
+            # Same as attrib failing before: the icon is set, Explorer may
+            # just not show it until the attributes are fixed
+            self.attribute_failures += len(failures)
+            path, error = failures[0]
+            print(f"{Colors.YELLOW}⚠️  Could not set attributes on {len(failures)} files ({path}: {error}){Colors.RESET}")
+        for _, _, on_applied in pending:
+            if on_applied:
+                on_applied()
+
+    def close(self):
+        self.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+def apply_folder_icon(folder_path, icon_path, applier=None, on_applied=None):
+    """Apply icon_path to folder_path, immediately unless a shared applier batches it"""
     try:
-        if desktop_ini.exists():
-            os.system(f'attrib -h -s -r "{desktop_ini}" >nul 2>&1')
-            desktop_ini.unlink()
-        
-        with open(desktop_ini, 'w', encoding='utf-8') as f:
-            f.write(ini_content)
-        
-        os.system(f'attrib +h +s "{desktop_ini}" >nul 2>&1')
-        os.system(f'attrib +r "{current_dir}" >nul 2>&1')
-        
+        if applier:
+            applier.apply(folder_path, icon_path, on_applied)
+        else:
+            with FolderIconApplier() as single:
+                single.apply(folder_path, icon_path, on_applied)
+
         print(f"\n{Colors.GREEN}✅ Icon applied!{Colors.RESET}")
         print(f"{Colors.YELLOW}💡 Refresh: Press F5 or restart Explorer via Task Manager{Colors.RESET}")
         return True
@@ -260,7 +1119,10 @@ def show_success_art():
     print(art)
 
 def setup_logging(log_file):
-    """Set up logging to file and console"""
+    """Set up logging to file and console, or return None without a log file"""
+    if not log_file:
+        return None
+
     import logging
 
     # Create logger
@@ -278,18 +1140,17 @@ def setup_logging(log_file):
     console.setFormatter(formatter)
     logger.addHandler(console)
 
-    # File handler if specified
-    if log_file:
-        file_handler = logging.FileHandler(log_file, encoding='utf-8')
-        file_handler.setLevel(logging.DEBUG)
-        file_formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
-        file_handler.setFormatter(file_formatter)
-        logger.addHandler(file_handler)
+    # File handler
+    file_handler = logging.FileHandler(log_file, encoding='utf-8')
+    file_handler.setLevel(logging.DEBUG)
+    file_formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    file_handler.setFormatter(file_formatter)
+    logger.addHandler(file_handler)
 
     return logger
 
 def load_cache(cache_file):
-    """Load MAL cache from file"""
+    """Load a legacy JSON MAL cache from file"""
     try:
         if Path(cache_file).exists():
             with open(cache_file, 'r', encoding='utf-8') as f:
@@ -298,204 +1159,1745 @@ def load_cache(cache_file):
         pass
     return {}
 
-def save_cache(cache_data, cache_file):
-    """Save MAL cache to file"""
-    try:
-        with open(cache_file, 'w', encoding='utf-8') as f:
-            json.dump(cache_data, f, indent=2, ensure_ascii=False)
-    except Exception as e:
-        print(f"{Colors.YELLOW}⚠️  Cache save failed: {e}{Colors.RESET}")
+def normalize_query(query):
+    """Cache key form of a query: NFKC, casefolded, punctuation and whitespace collapsed.
+
+    "Attack On Titan", "attack  on titan" and "Attack on Titan." all
+    normalize to "attack on titan".
+    """
+    return normalize_title(query) or ' '.join(query.casefold().split())
 
 def get_mal_cache_key(query):
     """Generate cache key for MAL query"""
+    import hashlib
+    return hashlib.md5(normalize_query(query).encode()).hexdigest()
+
+def get_legacy_mal_cache_key(query):
+    """Cache key used before keys were normalized (lowercased and stripped only)"""
+    import hashlib
     return hashlib.md5(query.lower().strip().encode()).hexdigest()
 
-def search_mal_anime_cached(query, cache_file, cache_ttl_hours, logger=None):
-    """Search MAL with caching support"""
+SQLITE_HEADER = b'SQLite format 3\x00'
+
+def is_sqlite_file(path):
+    """Check whether path is an existing SQLite database"""
+    try:
+        with open(path, 'rb') as f:
+            return f.read(16) == SQLITE_HEADER
+    except OSError:
+        return False
+
+class CacheEntry:
+    """A cached MAL result list plus the validators needed to revalidate it"""
+
+    def __init__(self, results, fresh, etag=None, last_modified=None, expires_at=None, tier='disk'):
+        self.results = results
+        self.fresh = fresh
+        self.etag = etag
+        self.last_modified = last_modified
+        self.expires_at = expires_at
+        # Which cache tier the entry was read from: 'memory' or 'disk'
+        self.tier = tier
+
+class MemoryCache:
+    """Thread-safe, size-bounded LRU map of fresh CacheEntry objects.
+
+    Sits in front of the SQLite cache, so a query repeated within a run
+    costs a dict lookup instead of a database read and a JSON decode.
+    Entries are dropped once their expiry passes, like the rows they copy.
+    """
+
+    def __init__(self, max_entries):
+        from collections import OrderedDict
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            if entry.expires_at <= time.time():
+                del self.entries[key]
+                return None
+            self.entries.move_to_end(key)
+            return entry
+
+    def put(self, key, results, etag, last_modified, expires_at):
+        if self.max_entries <= 0 or expires_at <= time.time():
+            return
+        with self.lock:
+            self.entries[key] = CacheEntry(results, True, etag, last_modified, expires_at, 'memory')
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def discard(self, key):
+        with self.lock:
+            self.entries.pop(key, None)
+
+    def __len__(self):
+        return len(self.entries)
+
+class MalCache:
+    """Persistent MAL response cache stored in SQLite.
+
+    Rows are looked up by primary key and carry their own expiry time. The
+    database runs in WAL mode with a busy timeout so several anifold processes
+    (and the lookup worker threads) can share it. Each thread gets its own
+    connection.
+
+    Failed lookups are remembered in their own table for a short time, so
+    a failing query is not hammered, but they never replace or look like
+    real results.
+
+    Fresh entries read or written in this process are also kept in a
+    MemoryCache, which answers repeated lookups without touching SQLite.
+
+    Results are stored as AnimeRecord rows (see dump_anime_records).
+    Caches written by older versions, which stored Jikan's full objects,
+    are compacted when first opened.
+
+    Args:
+        db_path: SQLite database file
+        ttl_hours: Lifetime of new entries; also caps the age of old ones
+        max_entries: Oldest entries are evicted beyond this many rows
+        failure_ttl: Seconds a failed lookup is remembered
+        memory_entries: Size of the in-memory tier (0 disables it)
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS mal_cache (
+            key TEXT PRIMARY KEY,
+            query TEXT NOT NULL,
+            results TEXT NOT NULL,
+            created_at REAL NOT NULL,
+            expires_at REAL NOT NULL,
+            etag TEXT,
+            last_modified TEXT
+        );
+        CREATE INDEX IF NOT EXISTS mal_cache_expires ON mal_cache (expires_at);
+        CREATE INDEX IF NOT EXISTS mal_cache_created ON mal_cache (created_at);
+        CREATE TABLE IF NOT EXISTS mal_failures (
+            key TEXT PRIMARY KEY,
+            query TEXT NOT NULL,
+            error TEXT NOT NULL,
+            failed_at REAL NOT NULL,
+            expires_at REAL NOT NULL
+        );
+    """
+
+    # Expired/overflow rows are pruned once every this many writes
+    PRUNE_INTERVAL = 100
+
+    # PRAGMA user_version of a cache whose results are AnimeRecord rows
+    FORMAT_VERSION = 1
+
+    def __init__(self, db_path, ttl_hours, max_entries=None, failure_ttl=None, memory_entries=None):
+        self.db_path = str(db_path)
+        self.ttl = ttl_hours * 3600
+        self.max_entries = max_entries or DEFAULT_CONFIG['cache_max_entries']
+        self.failure_ttl = failure_ttl or DEFAULT_CONFIG['failure_ttl_minutes'] * 60
+        self.memory = MemoryCache(
+            DEFAULT_CONFIG['cache_memory_entries'] if memory_entries is None else memory_entries
+        )
+        self.local = threading.local()
+        self.stale = DEFAULT_CONFIG['cache_stale_hours'] * 3600
+        self.writes = 0
+        self.compacted = None
+        self.conn.executescript(self.SCHEMA)
+        self._upgrade_schema()
+
+    def _upgrade_schema(self):
+        """Add columns missing from databases created by older versions and compact old results"""
+        columns = {row[1] for row in self.conn.execute('PRAGMA table_info(mal_cache)')}
+        for column in ('etag', 'last_modified'):
+            if column not in columns:
+                self.conn.execute(f'ALTER TABLE mal_cache ADD COLUMN {column} TEXT')
+        if self.conn.execute('PRAGMA user_version').fetchone()[0] < self.FORMAT_VERSION:
+            self.compacted = self.compact()
+
+    def compact(self):
+        """Rewrite results stored as full Jikan objects as AnimeRecord rows, then shrink the file.
+
+        Returns:
+            (rows rewritten, file size before, file size after)
+        """
+        import sqlite3
+        size_before = os.path.getsize(self.db_path)
+        conn = self.conn
+        rewritten = 0
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            # Another process may have compacted it while we waited for the lock
+            if conn.execute('PRAGMA user_version').fetchone()[0] >= self.FORMAT_VERSION:
+                conn.execute('COMMIT')
+                return None
+            for key, results in conn.execute('SELECT key, results FROM mal_cache').fetchall():
+                try:
+                    compact = dump_anime_records(load_anime_records(results))
+                except (TypeError, ValueError):
+                    conn.execute('DELETE FROM mal_cache WHERE key = ?', (key,))
+                    continue
+                if compact != results:
+                    conn.execute('UPDATE mal_cache SET results = ? WHERE key = ?', (compact, key))
+                    rewritten += 1
+            conn.execute(f'PRAGMA user_version = {self.FORMAT_VERSION}')
+            conn.execute('COMMIT')
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+        if rewritten:
+            try:
+                conn.execute('VACUUM')
+                conn.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+            except sqlite3.OperationalError:
+                # Busy with another process: the rows are compact, the file shrinks next time
+                pass
+        return rewritten, size_before, os.path.getsize(self.db_path)
+
+    @property
+    def conn(self):
+        conn = getattr(self.local, 'conn', None)
+        if conn is None:
+            import sqlite3
+            conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self.local.conn = conn
+        return conn
+
+    def lookup(self, key):
+        """Return the CacheEntry for key (fresh or stale), or None if missing"""
+        entry = self.memory.get(key)
+        if entry:
+            return entry
+        with metrics.timer('cache_io'):
+            row = self.conn.execute(
+                'SELECT results, created_at, expires_at, etag, last_modified FROM mal_cache WHERE key = ?',
+                (key,)
+            ).fetchone()
+        if not row:
+            return None
+        results, created_at, expires_at, etag, last_modified = row
+        expires_at = min(expires_at, created_at + self.ttl)
+        results = load_anime_records(results)
+        self.memory.put(key, results, etag, last_modified, expires_at)
+        return CacheEntry(results, expires_at > time.time(), etag, last_modified, expires_at)
+
+    def adopt(self, old_key, key):
+        """Move the row stored under old_key (an older key scheme) to key, if there is one"""
+        with metrics.timer('cache_io'):
+            cursor = self.conn.execute('UPDATE OR IGNORE mal_cache SET key = ? WHERE key = ?', (key, old_key))
+        return cursor.rowcount > 0
+
+    def get(self, key):
+        """Return cached results for key, or None if missing/expired"""
+        entry = self.lookup(key)
+        return entry.results if entry and entry.fresh else None
+
+    def set(self, key, query, results, created_at=None, ttl=None, etag=None, last_modified=None):
+        """Store results (a list of AnimeRecords) for key"""
+        created_at = created_at or time.time()
+        expires_at = created_at + (self.ttl if ttl is None else ttl)
+        with metrics.timer('cache_io'):
+            self.conn.execute(
+                'INSERT OR REPLACE INTO mal_cache '
+                '(key, query, results, created_at, expires_at, etag, last_modified) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?)',
+                (key, query, dump_anime_records(results), created_at, expires_at,
+                 etag, last_modified)
+            )
+            self.conn.execute('DELETE FROM mal_failures WHERE key = ?', (key,))
+        self.memory.put(key, results, etag, last_modified, min(expires_at, created_at + self.ttl))
+        self.writes += 1
+        if self.writes % self.PRUNE_INTERVAL == 0:
+            self.prune()
+
+    def refresh(self, key, etag=None, last_modified=None):
+        """Restart the TTL of a revalidated entry"""
+        now = time.time()
+        self.conn.execute(
+            'UPDATE mal_cache SET created_at = ?, expires_at = ?, '
+            'etag = COALESCE(?, etag), last_modified = COALESCE(?, last_modified) WHERE key = ?',
+            (now, now + self.ttl, etag, last_modified, key)
+        )
+        self.conn.execute('DELETE FROM mal_failures WHERE key = ?', (key,))
+        # Re-read (with the new expiry) on the next lookup
+        self.memory.discard(key)
+
+    def failure(self, key):
+        """Return the error of a recent failed lookup for key, or None"""
+        with metrics.timer('cache_io'):
+            row = self.conn.execute(
+                'SELECT error FROM mal_failures WHERE key = ? AND expires_at > ?', (key, time.time())
+            ).fetchone()
+        return row[0] if row else None
+
+    def set_failure(self, key, query, error):
+        """Remember that looking up key just failed with error"""
+        now = time.time()
+        self.conn.execute(
+            'INSERT OR REPLACE INTO mal_failures (key, query, error, failed_at, expires_at) '
+            'VALUES (?, ?, ?, ?, ?)',
+            (key, query, str(error), now, now + self.failure_ttl)
+        )
+
+    def prune(self):
+        """Drop long-expired rows and evict the oldest beyond max_entries.
+
+        Expired rows are kept for cache_stale_hours so they can still be
+        revalidated with a conditional request.
+        """
+        conn = self.conn
+        conn.execute('DELETE FROM mal_cache WHERE expires_at <= ?', (time.time() - self.stale,))
+        conn.execute('DELETE FROM mal_failures WHERE expires_at <= ?', (time.time(),))
+        conn.execute(
+            'DELETE FROM mal_cache WHERE key IN ('
+            'SELECT key FROM mal_cache ORDER BY created_at DESC LIMIT -1 OFFSET ?)',
+            (self.max_entries,)
+        )
+
+    def __len__(self):
+        return self.conn.execute('SELECT COUNT(*) FROM mal_cache').fetchone()[0]
+
+    def import_json(self, json_file):
+        """Copy entries from a legacy JSON cache file, keeping their timestamps"""
+        entries = load_cache(json_file)
+        conn = self.conn
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            for key, entry in entries.items():
+                try:
+                    created_at = datetime.fromisoformat(entry['timestamp']).timestamp()
+                    results = [AnimeRecord.from_jikan(anime) for anime in entry['results']]
+                    self.set(key, entry.get('query', ''), results, created_at)
+                except (AttributeError, KeyError, TypeError, ValueError):
+                    continue
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+        self.prune()
+        return len(entries)
+
+_mal_caches = {}
+_mal_caches_lock = threading.Lock()
+
+def get_mal_cache(cache_file, cache_ttl_hours):
+    """Open (once per process) the SQLite MAL cache for --cache-file.
+
+    A legacy JSON cache is migrated on first use: either the given file itself
+    (the database then lives next to it with a .db suffix) or a .json file
+    next to the database. The JSON file is renamed to
+    *.migrated afterwards.
+    """
+    cache_path = Path(cache_file)
+    if cache_path.suffix == '.json' or (cache_path.exists() and not is_sqlite_file(cache_path)):
+        db_path, legacy = cache_path.with_suffix('.db'), cache_path
+    else:
+        db_path, legacy = cache_path, cache_path.with_suffix('.json')
+
+    key = (str(db_path), cache_ttl_hours)
+    with _mal_caches_lock:
+        cache = _mal_caches.get(key)
+        if cache is None:
+            cache = MalCache(db_path, cache_ttl_hours)
+            if legacy != db_path and legacy.exists() and not is_sqlite_file(legacy):
+                try:
+                    count = cache.import_json(legacy)
+                    legacy.replace(legacy.with_name(legacy.name + '.migrated'))
+                    print(f"{Colors.CYAN}📦 Migrated {count} cache entries to {db_path}{Colors.RESET}")
+                except Exception as e:
+                    print(f"{Colors.YELLOW}⚠️  Cache migration failed: {e}{Colors.RESET}")
+            if cache.compacted and cache.compacted[0]:
+                rows, size_before, size_after = cache.compacted
+                print(f"{Colors.CYAN}📦 Compacted {rows} cache entries in {db_path} "
+                      f"({size_before / 1e6:.1f} MB → {size_after / 1e6:.1f} MB){Colors.RESET}")
+            _mal_caches[key] = cache
+        return cache
+
+class SingleFlight:
+    """Coalesce concurrent calls with the same key into one execution.
+
+    The first caller runs the function; callers arriving while it is still
+    running wait for and share its result (or exception).
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.calls = {}
+
+    def do(self, key, func, *args, **kwargs):
+        with self.lock:
+            future = self.calls.get(key)
+            leader = future is None
+            if leader:
+                from concurrent.futures import Future
+                future = Future()
+                self.calls[key] = future
+        if not leader:
+            return future.result()
+
+        try:
+            result = func(*args, **kwargs)
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self.lock:
+                del self.calls[key]
+
+_mal_inflight = SingleFlight()
+
+def search_mal_anime_cached(query, cache_file, cache_ttl_hours, logger=None, max_retries=0, retry_delay=None):
+    """Search MAL with caching support.
+
+    Transient Jikan failures are retried up to max_retries times. If the
+    lookup still fails, the failure is remembered for failure_ttl_minutes
+    and expired cached results are used when there are any; otherwise the
+    JikanError is raised. Failures are never cached as empty results.
+    """
     cache_key = get_mal_cache_key(query)
-    cache = load_cache(cache_file)
-    now = datetime.now()
-
-    # Check cache
-    if cache_key in cache:
-        cache_entry = cache[cache_key]
-        cache_time = datetime.fromisoformat(cache_entry['timestamp'])
-        if now - cache_time < timedelta(hours=cache_ttl_hours):
-            if logger:
-                logger.info(f"Cache hit for '{query}'")
-            return cache_entry['results']
+    cache = get_mal_cache(cache_file, cache_ttl_hours)
+
+    # Check cache: memory tier, then SQLite
+    entry = cache.lookup(cache_key)
+    if entry is None:
+        # Entries written before keys were normalized are moved to the new key
+        legacy_key = get_legacy_mal_cache_key(query)
+        if legacy_key != cache_key and cache.adopt(legacy_key, cache_key):
+            entry = cache.lookup(cache_key)
+    if entry and entry.fresh:
+        metrics.count(f'cache_{entry.tier}_hits')
+        if logger:
+            logger.info(f"Cache hit ({entry.tier}) for '{query}'")
+        return entry.results
 
-    # Cache miss, fetch from API
+    error = cache.failure(cache_key)
+    if error:
+        metrics.count('cache_failure_hits')
+        if logger:
+            logger.info(f"Lookup for '{query}' failed recently, not retrying yet")
+        if entry:
+            return entry.results
+        raise JikanError(f"Lookup failed recently: {error}")
+
+    # Cache miss (or expired entry to revalidate), fetch from API. Concurrent
+    # misses for the same key share one request.
+    metrics.count('cache_misses')
     if logger:
         logger.info(f"Cache miss for '{query}', fetching from API")
-    results = search_mal_anime(query)
+    return _mal_inflight.do(cache_key, _fetch_and_cache, query, cache_key, cache, entry, logger,
+                            max_retries, retry_delay)
+
+def _fetch_and_cache(query, cache_key, cache, entry, logger=None, max_retries=0, retry_delay=None):
+    """Fetch query from Jikan (revalidating entry if given) and store the result"""
+    etag, last_modified = (entry.etag, entry.last_modified) if entry else (None, None)
+    try:
+        response = retry_with_backoff(
+            fetch_mal_anime,
+            max_retries,
+            DEFAULT_CONFIG['retry_delay'] if retry_delay is None else retry_delay,
+            query,
+            etag,
+            last_modified
+        )
+    except JikanError as e:
+        try:
+            cache.set_failure(cache_key, query, e)
+        except Exception as cache_error:
+            print(f"{Colors.YELLOW}⚠️  Cache save failed: {cache_error}{Colors.RESET}")
+        if entry:
+            metrics.count('cache_stale_served')
+            print(f"{Colors.YELLOW}⚠️  MAL error: {e}. Using older cached results.{Colors.RESET}")
+            return entry.results
+        raise
 
     # Save to cache
-    cache[cache_key] = {
-        'timestamp': now.isoformat(),
-        'query': query,
-        'results': results
-    }
-    save_cache(cache, cache_file)
+    results = entry.results if response.not_modified else response.data
+    try:
+        if response.not_modified:
+            metrics.count('cache_revalidated')
+            if logger:
+                logger.info(f"Cache entry for '{query}' revalidated")
+            cache.refresh(cache_key, response.etag, response.last_modified)
+        else:
+            cache.set(cache_key, query, results, etag=response.etag, last_modified=response.last_modified)
+    except Exception as e:
+        print(f"{Colors.YELLOW}⚠️  Cache save failed: {e}{Colors.RESET}")
 
     return results
 
+ICO_HEADER = struct.Struct('<HHH')
+ICO_DIR_ENTRY = struct.Struct('<BBBBHHII')
+PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+BMP_HEADER_SIZES = {40, 52, 56, 108, 124}
+
+def validate_ico_frame(view, offset, size):
+    """Check that an icon frame is an embedded PNG or a DIB bitmap"""
+    if view[offset:offset + 8] == PNG_SIGNATURE:
+        # Signature, then the IHDR chunk (length + type + 13 bytes + CRC)
+        return size >= 33 and view[offset + 12:offset + 16] == b'IHDR'
+    if size < 40:
+        return False
+    header_size = struct.unpack_from('<I', view, offset)[0]
+    return header_size in BMP_HEADER_SIZES and header_size <= size
+
 def validate_ico_file(file_path):
-    """Validate if file is a valid .ico file by checking header"""
+    """Validate that a file is a structurally complete .ico file.
+
+    Checks the header, every ICONDIRENTRY's offset and size against the
+    file length, and that each frame is a PNG or BMP image. The file is read
+    through mmap, so large icons are not copied into memory.
+    """
+    import mmap
     try:
         with open(file_path, 'rb') as f:
-            # Read ICO header (6 bytes)
-            header = f.read(6)
-            if len(header) < 6:
-                return False
-
-            # Check signature (0,1) and type (1,2)
-            reserved, ico_type = struct.unpack('<HH', header[:4])
-            if reserved != 0 or ico_type != 1:
+            file_size = os.fstat(f.fileno()).st_size
+            if file_size < ICO_HEADER.size + ICO_DIR_ENTRY.size:
                 return False
 
-            # ICO files should have at least 1 icon
-            num_icons = struct.unpack('<H', header[4:6])[0]
-            return num_icons > 0
-    except Exception:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                view = memoryview(mm)
+                try:
+                    # Check signature (0,1) and type (1,2); ICO files have at least 1 icon
+                    reserved, ico_type, num_icons = ICO_HEADER.unpack_from(view, 0)
+                    if reserved != 0 or ico_type != 1 or num_icons == 0:
+                        return False
+
+                    data_start = ICO_HEADER.size + num_icons * ICO_DIR_ENTRY.size
+                    if data_start > file_size:
+                        return False
+
+                    for index in range(num_icons):
+                        entry_offset = ICO_HEADER.size + index * ICO_DIR_ENTRY.size
+                        fields = ICO_DIR_ENTRY.unpack_from(view, entry_offset)
+                        size, offset = fields[6], fields[7]
+                        if size == 0 or offset < data_start or offset + size > file_size:
+                            return False
+                        if not validate_ico_frame(view, offset, size):
+                            return False
+                    return True
+                finally:
+                    view.release()
+    except (OSError, ValueError, struct.error):
         return False
 
+# Downloaded images that are converted to .ico (all but PNG need Pillow)
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.webp', '.bmp', '.gif')
+ICON_EXTENSIONS = ('.ico',) + IMAGE_EXTENSIONS
+ICO_SIZES = (16, 24, 32, 48, 64, 128, 256)
+# Part of the conversion cache key; bump it when the conversion output changes
+CONVERSION_VERSION = 1
+
+def import_pillow():
+    """Import Pillow's Image module if it is installed, else None"""
+    try:
+        from PIL import Image
+    except ImportError:
+        return None
+    return Image
+
+def png_dimensions(data):
+    """(width, height) from a PNG's IHDR chunk, or None if data is not a PNG"""
+    if len(data) < 24 or data[:8] != PNG_SIGNATURE or data[12:16] != b'IHDR':
+        return None
+    return struct.unpack_from('>II', data, 16)
+
+def wrap_png_as_ico(data):
+    """Single-frame .ico embedding PNG data as is (Windows Vista+ reads PNG frames)"""
+    width, height = png_dimensions(data)
+    entry = ICO_DIR_ENTRY.pack(
+        width if width < 256 else 0,  # 0 means 256 or more
+        height if height < 256 else 0,
+        0, 0, 1, 32, len(data), ICO_HEADER.size + ICO_DIR_ENTRY.size
+    )
+    return ICO_HEADER.pack(0, 1, 1) + entry + data
+
+def convert_image_to_ico(source, dest, sizes=ICO_SIZES):
+    """Convert an image file to a multi-size .ico at dest.
+
+    With Pillow, the image is padded to a square and saved with a frame for
+    every size in sizes up to its own size. Without Pillow only PNGs can be
+    converted, by wrapping the PNG in a single-frame .ico. Runs in worker
+    processes, so it only depends on its arguments.
+
+    Returns:
+        dest as a string, or None if the image could not be converted
+    """
+    Image = import_pillow()
+    tmp = f"{dest}.{os.getpid()}.tmp"
+    try:
+        if Image is None:
+            with open(source, 'rb') as f:
+                data = f.read()
+            if png_dimensions(data) is None:
+                return None
+            with open(tmp, 'wb') as f:
+                f.write(wrap_png_as_ico(data))
+        else:
+            with Image.open(source) as image:
+                image = image.convert('RGBA')
+            side = max(image.size)
+            square = Image.new('RGBA', (side, side), (0, 0, 0, 0))
+            square.paste(image, ((side - image.width) // 2, (side - image.height) // 2))
+            frames = [(size, size) for size in sizes if size <= side] or [(side, side)]
+            square.save(tmp, format='ICO', sizes=frames)
+        os.replace(tmp, dest)
+        return str(dest)
+    except (OSError, ValueError, SyntaxError):
+        # Pillow's UnidentifiedImageError is an OSError
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+        return None
+
+def file_sha256(file_path):
+    """Return the sha256 hex digest of a file's contents"""
+    import hashlib
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
 def retry_with_backoff(func, max_retries, delay, *args, **kwargs):
-    """Retry a function with exponential backoff"""
+    """Retry a function with jittered exponential backoff.
+
+    Errors marked as not retryable (e.g. JikanClientError) are raised at
+    once. A server's Retry-After is waited out, unless it is longer than
+    max_retry_after, in which case the error is raised instead.
+    """
     for attempt in range(max_retries + 1):
         try:
             return func(*args, **kwargs)
         except Exception as e:
-            if attempt == max_retries:
-                raise e
-            wait_time = delay * (2 ** attempt)  # Exponential backoff
-            print(f"{Colors.YELLOW}⚠️  Attempt {attempt + 1} failed: {e}. Retrying in {wait_time}s...{Colors.RESET}")
+            retry_after = getattr(e, 'retry_after', None) or 0
+            if (attempt == max_retries or not getattr(e, 'retryable', True)
+                    or retry_after > DEFAULT_CONFIG['max_retry_after']):
+                raise
+            # Exponential backoff; the jitter keeps workers from retrying in lockstep
+            backoff = delay * (2 ** attempt)
+            wait_time = max(random.uniform(backoff / 2, backoff), retry_after)
+            metrics.count('retries')
+            print(f"{Colors.YELLOW}⚠️  Attempt {attempt + 1} failed: {e}. Retrying in {wait_time:.1f}s...{Colors.RESET}")
             time.sleep(wait_time)
 
-def process_anime_folder(folder_path, args, logger=None):
-    """Process a single anime folder"""
-    folder_path = Path(folder_path)
+NON_WORD_RE = LazyPattern('NON_WORD_RE', r'[\W_]+')
 
-    if logger:
-        logger.info(f"Processing folder: {folder_path}")
+def normalize_title(text):
+    """NFKC-normalize, casefold and reduce a title to words separated by single spaces"""
+    import unicodedata
+    text = unicodedata.normalize('NFKC', text).casefold()
+    return ' '.join(NON_WORD_RE.sub(' ', text).split())
 
-    try:
-        # Change to folder
-        original_cwd = os.getcwd()
-        os.chdir(folder_path)
+def title_trigrams(norm):
+    """Set of character trigrams of a normalized title, padded at the ends"""
+    padded = f"  {norm} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
 
-        folder_name = folder_path.name
-        guess = clean_anime_name(folder_name)
+# Jikan status names for the upper-case ones used by offline anime databases
+DUMP_STATUS = {
+    'FINISHED': 'Finished Airing',
+    'ONGOING': 'Currently Airing',
+    'UPCOMING': 'Not yet aired'
+}
 
-        print(f"\n{Colors.BOLD}{Colors.PINK}🎬 Processing: {folder_name}{Colors.RESET}")
-        print(f"{Colors.CYAN}💭 Guess: '{guess}'{Colors.RESET}")
+def _dump_field(item, *names):
+    """First non-empty value among several possible field names of a dump record"""
+    for name in names:
+        value = item.get(name)
+        if value not in (None, ''):
+            return value
+    return None
 
-        # Get anime name from MAL
-        anime_name = get_anime_name_from_mal_auto(guess, args, logger)
+def _dump_list(value):
+    """Read a list field that may be a list, a JSON list string or '|'-separated"""
+    if not value:
+        return []
+    if isinstance(value, list):
+        return [str(v) for v in value if v]
+    value = str(value).strip()
+    if value.startswith('['):
+        try:
+            return [str(v) for v in json.loads(value) if v]
+        except ValueError:
+            import ast
+            try:
+                return [str(v) for v in ast.literal_eval(value) if v]
+            except (ValueError, SyntaxError):
+                pass
+    return [v.strip() for v in value.split('|') if v.strip()]
+
+def _dump_number(value, kind=int):
+    try:
+        return kind(value) if value not in (None, '') else None
+    except (TypeError, ValueError):
+        return None
 
-        if not anime_name:
-            print(f"{Colors.RED}❌ Could not determine anime name, skipping...{Colors.RESET}")
-            return False
+def parse_title_record(item):
+    """Turn one dump record (Jikan, anime-offline-database or CSV row) into a Jikan-shaped dict"""
+    item = {str(k).lower(): v for k, v in item.items()}
+    title = _dump_field(item, 'title', 'name', 'title_romaji')
+    if not title:
+        return None
 
-        # Track icons before download to only use newly downloaded ones for this anime
-        import time
-        before_time = time.time()
-        existing_icons = {f.name for f in Path(args.icon_dir).glob("*.ico") if f.is_file()}
-        existing_mtimes = {f.name: f.stat().st_mtime for f in Path(args.icon_dir).glob("*.ico") if f.is_file()}
+    mal_id = _dump_number(_dump_field(item, 'mal_id', 'anime_id', 'malid', 'id'))
+    if mal_id is None:
+        for source in _dump_list(item.get('sources')):
+            match = re.search(r'myanimelist\.net/anime/(\d+)', source)
+            if match:
+                mal_id = int(match.group(1))
+                break
+
+    synonyms = _dump_list(_dump_field(item, 'title_synonyms', 'synonyms', 'other_name'))
+    for extra in item.get('titles') or []:
+        if isinstance(extra, dict) and extra.get('title'):
+            synonyms.append(extra['title'])
+
+    year = _dump_number(_dump_field(item, 'year', 'start_year'))
+    season = item.get('animeseason')
+    if year is None and isinstance(season, dict):
+        year = _dump_number(season.get('year'))
+
+    status = _dump_field(item, 'status')
+    status = DUMP_STATUS.get(str(status).upper(), status) if status else None
+
+    return {
+        'mal_id': mal_id,
+        'title': str(title),
+        'title_english': _dump_field(item, 'title_english', 'english', 'english_name'),
+        'title_japanese': _dump_field(item, 'title_japanese', 'japanese', 'japanese_name', 'japanese_names'),
+        'title_synonyms': synonyms,
+        'type': _dump_field(item, 'type'),
+        'episodes': _dump_number(_dump_field(item, 'episodes')),
+        'status': status,
+        'year': year,
+        'score': _dump_number(_dump_field(item, 'score'), float)
+    }
 
-        # Search DeviantArt
-        if not args.dry_run:
-            search_deviantart(anime_name)
+def read_title_dump(dump_file):
+    """Yield Jikan-shaped records from a JSON or CSV anime title dump"""
+    dump_file = Path(dump_file)
+    if dump_file.suffix.lower() == '.csv':
+        import csv
+        with open(dump_file, newline='', encoding='utf-8-sig') as f:
+            for row in csv.DictReader(f):
+                record = parse_title_record(row)
+                if record:
+                    yield record
+        return
 
-        # Icon handling
-        if args.no_wait:
-            print(f"{Colors.YELLOW}⏯️  Continuing without waiting...{Colors.RESET}")
-        elif not args.dry_run:
-            print(f"{Colors.CYAN}📂 Save icon to: {args.icon_dir}{Colors.RESET}")
-            input(f"{Colors.YELLOW}⏸️  Press ENTER when downloaded...{Colors.RESET}")
+    with open(dump_file, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    if isinstance(data, dict):
+        data = data.get('data', [])
+    for item in data:
+        record = parse_title_record(item) if isinstance(item, dict) else None
+        if record:
+            yield record
+
+class TitleIndex:
+    """On-disk index of anime titles for resolving names without the network.
+
+    Every title, English/Japanese title and synonym is stored normalized
+    (see normalize_title) with an index for exact matches, plus a trigram
+    table for fuzzy matches. Search results are AnimeRecords, so they can
+    be used anywhere MAL search results are.
+    """
 
-        icon_path = find_new_valid_icon(args.icon_dir, existing_icons, before_time)
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS anime (
+            mal_id INTEGER PRIMARY KEY,
+            data TEXT NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS titles (
+            id INTEGER PRIMARY KEY,
+            mal_id INTEGER NOT NULL,
+            norm TEXT NOT NULL,
+            gram_count INTEGER NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS titles_norm ON titles (norm);
+        CREATE TABLE IF NOT EXISTS title_grams (
+            gram TEXT NOT NULL,
+            title_id INTEGER NOT NULL,
+            PRIMARY KEY (gram, title_id)
+        ) WITHOUT ROWID;
+    """
 
-        if icon_path and not args.dry_run:
-            if apply_folder_icon(icon_path):
-                show_success_art()
-                if logger:
-                    logger.info(f"Successfully applied icon to {folder_path}")
-                return True
-            else:
-                print(f"{Colors.RED}❌ Icon application failed{Colors.RESET}")
-                if logger:
-                    logger.error(f"Icon application failed for {folder_path}")
-                return False
-        elif args.dry_run:
-            print(f"{Colors.GREEN}✅ Dry run complete for: {anime_name}{Colors.RESET}")
-            return True
-        else:
-            print(f"{Colors.RED}❌ No valid icon found, skipping...{Colors.RESET}")
+    # Trigram candidates scored per fuzzy search
+    CANDIDATES = 200
+
+    def __init__(self, db_path):
+        self.db_path = str(db_path)
+        self.local = threading.local()
+        self.conn.executescript(self.SCHEMA)
+
+    @property
+    def conn(self):
+        conn = getattr(self.local, 'conn', None)
+        if conn is None:
+            import sqlite3
+            conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+            self.local.conn = conn
+        return conn
+
+    def __len__(self):
+        return self.conn.execute('SELECT COUNT(*) FROM anime').fetchone()[0]
+
+    def import_records(self, records):
+        """Replace the index contents with records; returns how many were indexed"""
+        conn = self.conn
+        count = 0
+        next_local_id = -1
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            conn.execute('DELETE FROM title_grams')
+            conn.execute('DELETE FROM titles')
+            conn.execute('DELETE FROM anime')
+            for record in records:
+                if record['mal_id'] is None:
+                    # Entries without a MAL id are still useful for their titles
+                    record['mal_id'] = next_local_id
+                    next_local_id -= 1
+                conn.execute('INSERT OR REPLACE INTO anime (mal_id, data) VALUES (?, ?)',
+                             (record['mal_id'], json.dumps(record, ensure_ascii=False)))
+                names = [record['title'], record['title_english'], record['title_japanese']]
+                names += record['title_synonyms']
+                seen = set()
+                for name in names:
+                    norm = normalize_title(name) if name else ''
+                    if not norm or norm in seen:
+                        continue
+                    seen.add(norm)
+                    grams = title_trigrams(norm)
+                    title_id = conn.execute(
+                        'INSERT INTO titles (mal_id, norm, gram_count) VALUES (?, ?, ?)',
+                        (record['mal_id'], norm, len(grams))
+                    ).lastrowid
+                    conn.executemany('INSERT OR IGNORE INTO title_grams (gram, title_id) VALUES (?, ?)',
+                                     ((gram, title_id) for gram in grams))
+                count += 1
+            conn.execute('COMMIT')
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+        return count
+
+    def _records(self, scores):
+        """Load records for {mal_id: score}, best score first"""
+        ids = sorted(scores, key=lambda mal_id: -scores[mal_id])
+        placeholders = ','.join('?' * len(ids))
+        rows = dict(self.conn.execute(
+            f'SELECT mal_id, data FROM anime WHERE mal_id IN ({placeholders})', ids
+        ))
+        records = [AnimeRecord.from_jikan(json.loads(rows[mal_id])) for mal_id in ids if mal_id in rows]
+        records.sort(key=lambda r: (-scores[r.mal_id], -(r.score or 0)))
+        return records
+
+    def _matches(self, scores, limit, anime_type):
+        """Best `limit` records for {mal_id: score} of anime_type, with the best score"""
+        records = self._records(scores)
+        if anime_type:
+            # Dumps without a type column can't tell, so only known other types are dropped
+            records = [r for r in records if not r.type or r.type.upper() == anime_type]
+        records = records[:limit]
+        return records, (scores[records[0].mal_id] if records else 0.0)
+
+    def search(self, query, limit=10, anime_type=None):
+        """Find anime matching query.
+
+        anime_type (e.g. 'TV') drops records of any other known type, like
+        the Jikan search does, so a movie or special sharing the title
+        cannot stand in for the series. Records without a type are kept.
+
+        Returns:
+            (results, confidence): up to `limit` AnimeRecords, best first,
+            and the similarity (0-1) of the best match
+        """
+        norm = normalize_title(query)
+        if not norm:
+            return [], 0.0
+
+        # Exact title/synonym match: a single indexed lookup
+        exact = [row[0] for row in self.conn.execute('SELECT mal_id FROM titles WHERE norm = ?', (norm,))]
+        if exact:
+            records, confidence = self._matches({mal_id: 1.0 for mal_id in exact}, limit, anime_type)
+            if records:
+                return records, confidence
+
+        # Fuzzy match: Dice similarity of trigram sets over the best candidates
+        grams = title_trigrams(norm)
+        placeholders = ','.join('?' * len(grams))
+        rows = self.conn.execute(
+            f'SELECT t.mal_id, t.gram_count, COUNT(*) FROM title_grams g '
+            f'JOIN titles t ON t.id = g.title_id WHERE g.gram IN ({placeholders}) '
+            f'GROUP BY g.title_id ORDER BY COUNT(*) DESC LIMIT ?',
+            (*grams, self.CANDIDATES)
+        ).fetchall()
+        scores = {}
+        for mal_id, gram_count, shared in rows:
+            score = 2.0 * shared / (len(grams) + gram_count)
+            if score > scores.get(mal_id, 0.0):
+                scores[mal_id] = score
+        if not scores:
+            return [], 0.0
+        if not anime_type:
+            best = sorted(scores, key=lambda mal_id: -scores[mal_id])[:limit]
+            scores = {mal_id: scores[mal_id] for mal_id in best}
+        return self._matches(scores, limit, anime_type)
+
+# {absolute index path: TitleIndex, or None if no index was imported there}
+_title_indexes = {}
+_title_indexes_lock = threading.Lock()
+
+def get_title_index(index_file):
+    """Open (once per process) the title index at index_file, or None if no index was imported there"""
+    if not index_file:
+        return None
+    key = os.path.abspath(str(index_file))
+    with _title_indexes_lock:
+        if key not in _title_indexes:
+            _title_indexes[key] = TitleIndex(key) if is_sqlite_file(key) else None
+        return _title_indexes[key]
+
+def import_title_dump(dump_file, index_file):
+    """Build the offline title index from a JSON/CSV dump"""
+    print(f"{Colors.CYAN}📥 Importing titles from {dump_file}...{Colors.RESET}")
+    start = time.time()
+    index = TitleIndex(index_file)
+    count = index.import_records(read_title_dump(dump_file))
+    with _title_indexes_lock:
+        _title_indexes[os.path.abspath(str(index_file))] = index
+    print(f"{Colors.GREEN}✅ Indexed {count} anime in {time.time() - start:.1f}s → {index_file}{Colors.RESET}")
+    return count
+
+def lookup_mal_results(query, args, logger=None):
+    """Resolve query to MAL results, offline index first.
+
+    The local title index answers when its best TV (or untyped) match reaches
+    --index-min-confidence; otherwise the cached Jikan search runs (with
+    retries). If Jikan has nothing either, the low-confidence local
+    matches are still better than no results.
+    """
+    local = []
+    index = get_title_index(args.title_index)
+    if index:
+        with metrics.timer('title_index'):
+            local, confidence = index.search(query, anime_type='TV')
+        local = filter_mal_results(local)
+        if local and confidence >= args.index_min_confidence:
+            metrics.count('title_index_hits')
             if logger:
-                logger.warning(f"No valid icon found for {folder_path}")
-            return False
-
-    except Exception as e:
-        print(f"{Colors.RED}❌ Error processing {folder_path}: {e}{Colors.RESET}")
-        if logger:
-            logger.error(f"Error processing {folder_path}: {e}")
-        return False
-    finally:
-        # Restore original directory
-        os.chdir(original_cwd)
+                logger.info(f"Title index hit for '{query}' ({confidence:.2f})")
+            return local
 
-def get_anime_name_from_mal_auto(guess, args, logger=None):
-    """Get anime name from MAL with auto-selection"""
-    if args.auto_select:
-        if logger:
-            logger.info(f"Auto-selecting for '{guess}'")
-        results = retry_with_backoff(
-            search_mal_anime_cached,
-            args.max_retries,
-            args.retry_delay,
-            guess,
+    try:
+        results = search_mal_anime_cached(
+            query,
             args.cache_file,
             args.cache_ttl_hours,
-            logger
+            logger,
+            args.max_retries,
+            args.retry_delay
         )
-        if results:
-            print(f"{Colors.GREEN}✨ Auto-selected: {results[0]['title']}{Colors.RESET}")
-            return results[0]['title']
-        else:
-            return guess
+    except JikanError as e:
+        print(f"{Colors.RED}⚠️  MAL error: {e}{Colors.RESET}")
+        if logger:
+            logger.warning(f"MAL lookup failed for '{query}': {e}")
+        return local
+    return results or local
+
+# Cleaned-name words that only tell seasons/parts of the same series apart
+SEASON_WORD_RE = LazyPattern('SEASON_WORD_RE', r'^(?:s\d{1,2}(?:e\d+)?|season|part|cour|\d+(?:st|nd|rd|th)?)$',
+                             re.IGNORECASE)
+
+def series_query(guess):
+    """Drop season/part markers from a guess so all seasons share one MAL query"""
+    words = [word for word in guess.split() if not SEASON_WORD_RE.match(word)]
+    return ' '.join(words) if words else guess
+
+def series_key(guess):
+    """Normalized key grouping guesses that belong to the same series"""
+    return ' '.join(series_query(guess).casefold().split())
+
+VIDEO_EXTENSIONS = {'.mkv', '.mp4', '.avi', '.mov', '.wmv', '.flv', '.webm', '.m4v'}
+YEAR_RE = LazyPattern('YEAR_RE', r'(?<!\d)(19[4-9]\d|20\d\d)(?!\d)')
+
+def parse_folder_year(folder_name):
+    """Release year mentioned in a folder name (which clean_anime_name drops)"""
+    for match in YEAR_RE.finditer(folder_name):
+        year = int(match.group(1))
+        if year <= datetime.now().year + 1:
+            return year
+    return None
+
+def count_video_files(folder_path):
+    """Count the video files directly inside a folder"""
+    count = 0
+    try:
+        with os.scandir(folder_path) as it:
+            for entry in it:
+                if os.path.splitext(entry.name)[1].lower() in VIDEO_EXTENSIONS:
+                    count += 1
+    except OSError:
+        pass
+    return count
+
+# Folder names that say nothing about the anime inside ("New folder (3)",
+# "Downloads_2021"); their guesses come from the episode files instead
+GENERIC_FOLDER_WORDS = {
+    'new', 'folder', 'untitled', 'copy', 'download', 'downloads', 'downloaded', 'video', 'videos',
+    'anime', 'animes', 'torrent', 'torrents', 'complete', 'completed', 'batch', 'temp', 'tmp',
+    'misc', 'episode', 'episodes', 'media', 'movies', 'shows', 'series', 'tv', 'unsorted',
+    'stuff', 'watch', 'watching', 'later', 'to', 'the', 'my'
+}
+# File name tokens that mark where the series title ends and the episode starts
+EPISODE_MARKER_RE = LazyPattern('EPISODE_MARKER_RE', r'^(?:(?:\d{1,4}|s\d{1,2}e\d{1,4}|e\d{1,4}|ep\d{0,4})(?:v\d)?|episode)$',
+                                re.IGNORECASE)
+
+def is_generic_guess(guess):
+    """True if a cleaned folder name is empty or only generic words"""
+    return all(word in GENERIC_FOLDER_WORDS for word in guess.casefold().split())
+
+def sample_video_names(folder_path, sample=None):
+    """Names of up to `sample` video files directly inside a folder, in directory order"""
+    sample = sample or DEFAULT_CONFIG['episode_sample']
+    names = []
+    try:
+        with os.scandir(folder_path) as it:
+            for entry in it:
+                if os.path.splitext(entry.name)[1].lower() in VIDEO_EXTENSIONS:
+                    names.append(entry.name)
+                    if len(names) == sample:
+                        break
+    except OSError:
+        pass
+    return names
+
+def episode_series_name(file_name):
+    """Series title in an episode file name: the cleaned words before the episode number"""
+    stem = BRACKETS_RE.sub('', os.path.splitext(file_name)[0])
+    words = []
+    for part in TOKEN_RE.findall(stem):
+        if EPISODE_MARKER_RE.match(part):
+            if words:
+                break
+            continue
+        words.append(part)
+    return clean_anime_name(' '.join(words)).strip() if words else ''
+
+def vote_episode_title(file_names, quorum=None):
+    """Majority series title among episode file names.
+
+    Every name votes for its episode_series_name; spellings are grouped by
+    series_key. Counting stops early once the leader cannot be overtaken by
+    the names left, or has `quorum` votes without a rival.
+
+    Returns:
+        The winning title (as first spelled), or None without a majority
+    """
+    from collections import Counter
+    quorum = quorum or DEFAULT_CONFIG['episode_quorum']
+    votes = Counter()
+    spellings = {}
+    for seen, file_name in enumerate(file_names, 1):
+        title = episode_series_name(file_name)
+        if not title:
+            continue
+        key = series_key(title)
+        votes[key] += 1
+        spellings.setdefault(key, title)
+        (_, top), *rest = votes.most_common(2)
+        runner_up = rest[0][1] if rest else 0
+        if top - runner_up > len(file_names) - seen or (top >= quorum and not runner_up):
+            break
+    if not votes:
+        return None
+    leader, top = votes.most_common(1)[0]
+    return spellings[leader] if top * 2 > sum(votes.values()) else None
+
+def guess_anime_name(folder_path):
+    """MAL query for a folder, and where it came from ('folder' or 'episodes').
+
+    The cleaned folder name is used unless it is generic; then a bounded
+    sample of the video files inside votes on the title.
+    """
+    guess = clean_anime_name(Path(folder_path).name)
+    if is_generic_guess(guess):
+        with metrics.timer('episode_vote'):
+            voted = vote_episode_title(sample_video_names(folder_path))
+        if voted:
+            return voted, 'episodes'
+    return guess, 'folder'
+
+class FolderSignals:
+    """What a folder tells us about its anime besides the cleaned name"""
+
+    __slots__ = ('year', 'video_count')
+
+    def __init__(self, year=None, video_count=0):
+        self.year = year
+        self.video_count = video_count
+
+    @classmethod
+    def from_folder(cls, folder_path):
+        return cls(parse_folder_year(Path(folder_path).name), count_video_files(folder_path))
+
+class FolderGuess:
+    """Everything a folder tells us before asking MAL, worked out once per folder"""
+
+    __slots__ = ('guess', 'source', 'signals')
+
+    def __init__(self, guess, source, signals):
+        self.guess = guess
+        self.source = source
+        self.signals = signals
+
+    @classmethod
+    def from_folder(cls, folder_path):
+        """Guess the query (see guess_anime_name) and read the folder's signals"""
+        with metrics.timer('clean_name'):
+            guess, source = guess_anime_name(folder_path)
+        signals = FolderSignals.from_folder(folder_path)
+        if source == 'episodes':
+            # A year in a generic name ("Downloads_2021") isn't the anime's
+            signals.year = None
+        return cls(guess, source, signals)
+
+# How much each signal counts towards a candidate's score. Signals a folder
+# or candidate doesn't have are left out and the other weights rescaled.
+RANK_WEIGHTS = {'title': 0.55, 'year': 0.2, 'episodes': 0.15, 'order': 0.1}
+
+def rank_mal_candidates(results, guess, signals=None):
+    """Score all MAL candidates for a folder together, best first.
+
+    Each candidate gets a feature vector: title similarity to the guess
+    (best of its title, English title and synonyms), year match with the
+    folder's year, episode count against the number of video files, and
+    Jikan's own order. The score is the weighted mean of the features the
+    folder and candidate actually have.
+
+    Returns:
+        List of (score, anime) tuples with scores between 0 and 1
+    """
+    from difflib import SequenceMatcher
+
+    if not results:
+        return []
+    signals = signals or FolderSignals()
+    target = normalize_title(guess)
+    matcher = SequenceMatcher(autojunk=False)
+    matcher.set_seq2(target)
+    count = len(results)
+
+    ranked = []
+    for position, anime in enumerate(results):
+        names = [anime.title, anime.title_english, *anime.title_synonyms]
+        title_score = 0.0
+        for name in names:
+            if not name:
+                continue
+            matcher.set_seq1(normalize_title(name))
+            title_score = max(title_score, matcher.ratio())
+
+        features = {'title': title_score, 'order': 1.0 - position / count}
+        year = anime.year
+        if signals.year and year:
+            features['year'] = {0: 1.0, 1: 0.5}.get(abs(year - signals.year), 0.0)
+        episodes = anime.episodes
+        if signals.video_count and episodes:
+            features['episodes'] = min(episodes, signals.video_count) / max(episodes, signals.video_count)
+
+        weight = sum(RANK_WEIGHTS[name] for name in features)
+        score = sum(RANK_WEIGHTS[name] * value for name, value in features.items()) / weight
+        ranked.append((score, anime))
+
+    ranked.sort(key=lambda item: item[0], reverse=True)
+    return ranked
+
+# Lead over the runner-up at which the best candidate's score counts fully
+RANK_MARGIN = 0.2
+
+def rank_confidence(ranked):
+    """How sure a ranking (from rank_mal_candidates) is of its best candidate, 0-1.
+
+    The best score alone says how well the candidate fits, not whether
+    another one fits as well: every season of a show matches a folder
+    without a year about equally. The score is scaled down by how far the
+    lead over the runner-up falls short of RANK_MARGIN.
+    """
+    if not ranked:
+        return 0.0
+    best = ranked[0][0]
+    lead = best - ranked[1][0] if len(ranked) > 1 else best
+    return best * min(1.0, lead / RANK_MARGIN)
+
+class MalLookupEngine:
+    """Resolve many MAL guesses concurrently with a worker pool.
+
+    Lookups go through the title index, the cache and the shared Jikan rate
+    limiter (see lookup_mal_results). LibraryDiscovery `submit`s each guess
+    as soon as its folder is found, and the per-folder flow collects them
+    one at a time with `results`, in its own order, while the pool keeps
+    resolving the folders that come next.
+
+    Guesses are grouped by series_key, so `Show S1`, `Show Season 2` and
+    `[Group] Show (2019)` issue a single query whose results every folder
+    in the group chooses from.
+    """
+
+    def __init__(self, args, logger=None, workers=None):
+        self.args = args
+        self.logger = logger
+        from concurrent.futures import ThreadPoolExecutor
+        self.executor = ThreadPoolExecutor(
+            max_workers=workers or args.workers,
+            thread_name_prefix='mal-lookup'
+        )
+        self.futures = {}
+        self.lock = threading.Lock()
+
+    def _lookup(self, query):
+        return lookup_mal_results(query, self.args, self.logger)
+
+    def submit(self, guess):
+        """Schedule the lookup for guess's series (once) and return its future"""
+        key = series_key(guess)
+        with self.lock:
+            future = self.futures.get(key)
+            if future is None:
+                future = self.executor.submit(self._lookup, series_query(guess))
+                self.futures[key] = future
+            return future
+
+    @property
+    def query_count(self):
+        """Number of distinct series queries issued"""
+        return len(self.futures)
+
+    def results(self, guess):
+        """Wait for and return the MAL results for guess"""
+        return self.submit(guess).result()
+
+    def close(self, cancel=False):
+        """Shut down the pool, optionally dropping lookups not yet started"""
+        self.executor.shutdown(wait=not cancel, cancel_futures=cancel)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close(cancel=exc_type is not None)
+        return False
+
+def process_anime_folder(folder_path, args, logger=None, lookup=None, manifest=None, icon_index=None,
+                         applier=None, folder_guess=None):
+    """Process a single anime folder.
+
+    When a LibraryManifest is given, the folder is recorded as done once its
+    icon has been applied. An IconIndex can be shared between folders so the
+    icon directory is not rescanned from scratch for each one, and a
+    FolderIconApplier so desktop.ini attributes are set in batches. A
+    FolderGuess already made for the folder (e.g. by LibraryDiscovery) is
+    used instead of looking at the folder again.
+    """
+    folder_path = Path(os.path.abspath(folder_path))
+
+    if logger:
+        logger.info(f"Processing folder: {folder_path}")
+
+    with metrics.timer('folder'):
+        return _process_anime_folder(folder_path, args, logger, lookup, manifest, icon_index, applier,
+                                     folder_guess)
+
+def process_single_folder(folder_path, args, logger=None):
+    """Process one folder on its own, cataloging it in its parent directory's manifest"""
+    folder_path = Path(os.path.abspath(folder_path))
+    # Dry runs never record anything
+    manifest = None if args.dry_run else LibraryManifest(folder_path.parent, args.manifest_dir)
+    try:
+        return process_anime_folder(folder_path, args, logger, manifest=manifest)
+    finally:
+        if manifest:
+            manifest.close()
+
+def _process_anime_folder(folder_path, args, logger, lookup, manifest, icon_index, applier, folder_guess):
+    try:
+        folder_name = folder_path.name
+        folder_guess = folder_guess or FolderGuess.from_folder(folder_path)
+        guess = folder_guess.guess
+
+        print(f"\n{Colors.BOLD}{Colors.PINK}🎬 Processing: {folder_name}{Colors.RESET}")
+        if folder_guess.source == 'episodes':
+            print(f"{Colors.CYAN}💭 Guess from episode files: '{guess}'{Colors.RESET}")
+        else:
+            print(f"{Colors.CYAN}💭 Guess: '{guess}'{Colors.RESET}")
+
+        # Get anime name from MAL
+        anime_name, mal_id = get_anime_name_from_mal_auto(guess, args, logger, lookup, folder_guess.signals)
+
+        if not anime_name:
+            print(f"{Colors.RED}❌ Could not determine anime name, skipping...{Colors.RESET}")
+            return False
+
+        return set_folder_icon(folder_path, anime_name, args, logger, manifest, icon_index, applier,
+                               mal_id=mal_id)
+
+    except Exception as e:
+        print(f"{Colors.RED}❌ Error processing {folder_path}: {e}{Colors.RESET}")
+        if logger:
+            logger.error(f"Error processing {folder_path}: {e}")
+        return False
+
+def set_folder_icon(folder_path, anime_name, args, logger=None, manifest=None, icon_index=None,
+                    applier=None, icon_path=None, mal_id=None):
+    """Get an icon for anime_name and apply it to folder_path.
+
+    Without icon_path, a new icon is fetched by the headless icon provider,
+    or DeviantArt is opened and the newly downloaded icon is used (waiting
+    as --no-wait/--watch say). The icon is copied into the
+    icon store and applied through applier, if given. Applied folders are
+    cataloged in manifest with their title, MAL id and icon hash.
+    """
+    own_applier = applier is None
+    if own_applier:
+        applier = FolderIconApplier(get_attribute_backend(args.attr_backend))
+    try:
+        if icon_index is None:
+            icon_index = IconIndex(args.icon_dir, args.convert_workers)
+        if icon_path:
+            print(f"{Colors.GREEN}📦 Using planned icon: {Path(icon_path).name}{Colors.RESET}")
+        else:
+            icon_path = download_new_icon(anime_name, args, icon_index)
+
+        if icon_path and not args.dry_run:
+            # Apply the stored copy, shared by every folder using the same icon
+            with metrics.timer('icon_store'):
+                stored = icon_index.store.add(icon_path)
+            if not stored:
+                print(f"{Colors.RED}❌ Not a valid icon: {icon_path}{Colors.RESET}")
+                return False
+            icon_path = stored
+            on_applied = None
+            if manifest:
+                on_applied = lambda: manifest.mark_done(folder_path, anime_name, icon_path, mal_id)
+            if apply_folder_icon(folder_path, icon_path, applier, on_applied):
+                show_success_art()
+                if logger:
+                    logger.info(f"Successfully applied icon to {folder_path}")
+                return True
+            else:
+                print(f"{Colors.RED}❌ Icon application failed{Colors.RESET}")
+                if logger:
+                    logger.error(f"Icon application failed for {folder_path}")
+                return False
+        elif args.dry_run:
+            print(f"{Colors.GREEN}✅ Dry run complete for: {anime_name}{Colors.RESET}")
+            return True
+        else:
+            print(f"{Colors.RED}❌ No valid icon found, skipping...{Colors.RESET}")
+            if logger:
+                logger.warning(f"No valid icon found for {folder_path}")
+            return False
+    finally:
+        if own_applier:
+            applier.close()
+
+def download_new_icon(anime_name, args, icon_index):
+    """Get a new icon for anime_name and return it, if any.
+
+    With a headless icon provider the icon is fetched straight into the
+    icon directory; otherwise DeviantArt is opened and the icon the user
+    downloads is picked up.
+    """
+    fetcher = get_icon_fetcher()
+    if fetcher:
+        if args.dry_run:
+            print(f"{Colors.BLUE}🎨 Would fetch an icon from {fetcher.provider.name}{Colors.RESET}")
+            return None
+        print(f"\n{Colors.BLUE}🎨 Fetching icons from {fetcher.provider.name}...{Colors.RESET}")
+        icon_path = fetcher.fetch_many([anime_name], icon_index)[anime_name]
+        if icon_path:
+            print(f"{Colors.GREEN}📦 Using fetched icon: {Path(icon_path).name}{Colors.RESET}")
+        else:
+            print(f"{Colors.RED}❌ {fetcher.provider.name} has no valid icon for '{anime_name}'{Colors.RESET}")
+        return icon_path
+
+    # Track icons before download to only use newly downloaded ones for this anime
+    before_time = time.time()
+    existing_icons = icon_index.snapshot()
+
+    # Search DeviantArt
+    if not args.dry_run:
+        search_deviantart(anime_name)
+
+    # Icon handling
+    icon_path = None
+    with metrics.timer('human_wait'):
+        if args.no_wait:
+            print(f"{Colors.YELLOW}⏯️  Continuing without waiting...{Colors.RESET}")
+        elif args.watch and not args.dry_run:
+            print(f"{Colors.CYAN}📂 Save icon to: {args.icon_dir}{Colors.RESET}")
+            print(f"{Colors.YELLOW}👀 Watching for a new icon (timeout {args.watch_timeout:g}s)...{Colors.RESET}")
+            icon_path = wait_for_new_icon(icon_index, existing_icons, before_time, args.watch_timeout)
+            if icon_path:
+                print(f"{Colors.GREEN}📦 Using newly downloaded: {Path(icon_path).name}{Colors.RESET}")
+            else:
+                print(f"{Colors.RED}⌛ No new icon within {args.watch_timeout:g}s{Colors.RESET}")
+        elif not args.dry_run:
+            print(f"{Colors.CYAN}📂 Save icon to: {args.icon_dir}{Colors.RESET}")
+            input(f"{Colors.YELLOW}⏸️  Press ENTER when downloaded...{Colors.RESET}")
+
+    if not icon_path:
+        icon_path = find_new_valid_icon(icon_index, existing_icons, before_time)
+    return icon_path
+
+def get_anime_name_from_mal_auto(guess, args, logger=None, lookup=None, signals=None):
+    """Get anime name (and MAL id) from MAL with auto-selection.
+
+    When a MalLookupEngine is given, results come from its (possibly already
+    finished) background lookup instead of a blocking request. Candidates are
+    ranked with the folder's signals; auto-selection only takes the best one
+    if the ranking's confidence (see rank_confidence) reaches
+    --min-confidence, and keeps the guess otherwise.
+
+    Returns:
+        (title, mal_id); mal_id is None when the guess is kept
+    """
+    with metrics.timer('mal_lookup'):
+        results = lookup.results(guess) if lookup else lookup_mal_results(guess, args, logger)
+    ranked = rank_mal_candidates(results, guess, signals)
+
+    if args.auto_select:
+        if logger:
+            logger.info(f"Auto-selecting for '{guess}'")
+        if not ranked:
+            return guess, None
+        score, best = rank_confidence(ranked), ranked[0][1]
+        if score >= args.min_confidence:
+            print(f"{Colors.GREEN}✨ Auto-selected: {best.title} ({score:.0%} match){Colors.RESET}")
+            return best.title, best.mal_id
+        print(f"{Colors.YELLOW}🤔 Best match '{best.title}' is only {score:.0%} sure, keeping '{guess}'{Colors.RESET}")
+        if logger:
+            logger.warning(f"Low confidence ({score:.2f}) for '{guess}', best was '{best.title}'")
+        return guess, None
     else:
-        return get_anime_name_from_mal(guess)
+        candidates = [anime for _, anime in ranked[:3]]
+        title = get_anime_name_from_mal(guess, candidates)
+        return title, mal_id_for_title(title, candidates)
+
+def mal_id_for_title(title, candidates):
+    """MAL id of the candidate (AnimeRecord) with this title, or None"""
+    for anime in candidates:
+        if anime.title == title:
+            return anime.mal_id
+    return None
 
-def find_new_valid_icon(icon_dir, existing_icons, before_time):
-    """Find the latest valid .ico file among newly downloaded ones"""
-    icon_dir = Path(icon_dir)
-    icon_dir.mkdir(exist_ok=True)
+class IconEntry:
+    """Cached stat and validation result for one icon file"""
+
+    __slots__ = ('name', 'path', 'mtime', 'mtime_ns', 'size', 'valid')
+
+    def __init__(self, name, path, st):
+        self.name = name
+        self.path = path
+        self.mtime = st.st_mtime
+        self.mtime_ns = st.st_mtime_ns
+        self.size = st.st_size
+        self.valid = None
+
+    def update(self, st):
+        """Take a new stat result; a changed file has to be validated again"""
+        if self.mtime_ns != st.st_mtime_ns or self.size != st.st_size:
+            self.mtime, self.mtime_ns, self.size = st.st_mtime, st.st_mtime_ns, st.st_size
+            self.valid = None
+
+class IconStore:
+    """Content-addressed store of validated icons.
+
+    Icons are kept as <root>/<first 2 hex chars>/<sha256>.ico, stored the
+    first time they validate. Anything in the store has already passed
+    validation, so a duplicate download (same bytes, new name) is
+    recognized by its hash and never validated or stored a second time.
+    Icons that fail are recorded as empty <root>/invalid/<sha256> files, so
+    a broken download isn't validated again in later runs either.
+
+    Images (PNG, JPG, ...) are converted to .ico first. Conversions are
+    cached as <root>/converted/<source sha256>-v<version>.ico, so an image
+    is converted once, however often it is used or re-downloaded.
+    """
 
-    ico_files = list(icon_dir.glob("*.ico"))
-    if not ico_files:
-        print(f"{Colors.RED}❌ No .ico files found in: {icon_dir}{Colors.RESET}")
+    def __init__(self, root, workers=None):
+        self.root = Path(root)
+        self.workers = workers or DEFAULT_CONFIG['convert_workers']
+        self.invalid = set()
+
+    def path_for(self, digest):
+        return self.root / digest[:2] / f"{digest}.ico"
+
+    def converted_path(self, digest):
+        return self.root / 'converted' / f"{digest}-v{CONVERSION_VERSION}.ico"
+
+    def invalid_path(self, digest):
+        return self.root / 'invalid' / digest
+
+    def convert_many(self, sources):
+        """Convert images to .ico, in worker processes when there are several.
+
+        Returns:
+            {source: path of the converted .ico, or None if it can't be converted}
+        """
+        results = {}
+        pending = {}
+        for source in sources:
+            try:
+                digest = file_sha256(source)
+            except OSError:
+                results[source] = None
+                continue
+            converted = self.converted_path(digest)
+            if digest in self.invalid:
+                results[source] = None
+            elif converted.exists():
+                metrics.count('conversion_cache_hits')
+                results[source] = str(converted)
+            else:
+                # Duplicate images (same bytes, other names) are converted once
+                pending.setdefault(digest, []).append(source)
+
+        if pending:
+            (self.root / 'converted').mkdir(parents=True, exist_ok=True)
+            jobs = [(same[0], self.converted_path(digest)) for digest, same in pending.items()]
+            with metrics.timer('icon_convert'):
+                # Wrapping a PNG without Pillow is too cheap to be worth a process
+                if len(jobs) > 1 and self.workers > 1 and import_pillow():
+                    from concurrent.futures import ProcessPoolExecutor
+                    with ProcessPoolExecutor(max_workers=min(len(jobs), self.workers)) as pool:
+                        converted = list(pool.map(convert_image_to_ico, *zip(*jobs)))
+                else:
+                    converted = [convert_image_to_ico(*job) for job in jobs]
+            for (digest, same), path in zip(pending.items(), converted):
+                metrics.count('icons_converted' if path else 'conversion_failures')
+                if path is None:
+                    # Only remembered for this run: installing Pillow may fix it
+                    self.invalid.add(digest)
+                for source in same:
+                    results[source] = path
+        return results
+
+    def as_icon(self, file_path):
+        """Path of an .ico for file_path: itself, or its converted image (None if not convertible)"""
+        if not str(file_path).lower().endswith(IMAGE_EXTENSIONS):
+            return file_path
+        return self.convert_many([file_path])[file_path]
+
+    def _store(self, icon_path, digest):
+        stored = self.path_for(digest)
+        stored.parent.mkdir(parents=True, exist_ok=True)
+        tmp = stored.with_name(f"{stored.name}.{os.getpid()}.tmp")
+        import shutil
+        shutil.copyfile(icon_path, tmp)
+        os.replace(tmp, stored)
+
+    def _mark_invalid(self, digest):
+        self.invalid.add(digest)
+        marker = self.invalid_path(digest)
+        try:
+            marker.parent.mkdir(parents=True, exist_ok=True)
+            marker.touch()
+        except OSError:
+            pass
+
+    def _validate_ico(self, icon_path):
+        try:
+            digest = file_sha256(icon_path)
+        except OSError:
+            return None
+        if digest in self.invalid:
+            return None
+        if self.path_for(digest).exists():
+            return digest
+        if self.invalid_path(digest).exists():
+            self.invalid.add(digest)
+            return None
+        if not validate_ico_file(icon_path):
+            self._mark_invalid(digest)
+            return None
+        try:
+            self._store(icon_path, digest)
+        except OSError:
+            # Still valid; add() tries again and reports the error
+            pass
+        return digest
+
+    def validate(self, file_path):
+        """Return the icon's sha256 if it is (or converts to) a valid icon, else None.
+
+        A valid icon is stored right away, so add() doesn't validate it again.
+        """
+        icon_path = self.as_icon(file_path)
+        return self._validate_ico(icon_path) if icon_path else None
+
+    def add(self, file_path):
+        """Store a valid icon and return its path in the store (None if invalid)"""
+        icon_path = self.as_icon(file_path)
+        digest = self._validate_ico(icon_path) if icon_path else None
+        if digest is None:
+            return None
+        stored = self.path_for(digest)
+        if not stored.exists():
+            self._store(icon_path, digest)
+        return str(stored)
+
+class IconIndex:
+    """In-memory index of the icons (.ico and images) in the icon directory.
+
+    Built from os.scandir passes that only run when the directory's mtime
+    changed (a file was added, removed or renamed); each file's stat result
+    and validation outcome are cached until its mtime or size changes.
+    Taking a snapshot before a download and diffing against it afterwards
+    finds the new icons without re-validating the whole directory, and one
+    index is reused for every folder in a library run.
+    """
+
+    # A directory modified this recently may change again within the same
+    # mtime tick (2s on FAT), so its mtime can't prove it unchanged yet
+    RACY_NS = 2_000_000_000
+
+    def __init__(self, icon_dir, convert_workers=None):
+        self.icon_dir = Path(icon_dir)
+        self.store = IconStore(self.icon_dir / DEFAULT_CONFIG['icon_store_dir'], convert_workers)
+        self.entries = {}
+        self.dir_mtime_ns = None
+
+    def refresh(self):
+        """Rescan the directory if it changed, keeping cached entries for unchanged files"""
+        with metrics.timer('icon_scan'):
+            return self._refresh()
+
+    def _refresh(self):
+        self.icon_dir.mkdir(exist_ok=True)
+        dir_mtime_ns = os.stat(self.icon_dir).st_mtime_ns
+        if dir_mtime_ns == self.dir_mtime_ns:
+            return self
+
+        entries = {}
+        with os.scandir(self.icon_dir) as it:
+            for dir_entry in it:
+                if not dir_entry.name.lower().endswith(ICON_EXTENSIONS):
+                    continue
+                try:
+                    if not dir_entry.is_file():
+                        continue
+                    st = dir_entry.stat()
+                except OSError:
+                    continue
+                cached = self.entries.get(dir_entry.name)
+                if cached:
+                    # May have been replaced by a rename over it
+                    cached.update(st)
+                    entries[dir_entry.name] = cached
+                else:
+                    entries[dir_entry.name] = IconEntry(dir_entry.name, dir_entry.path, st)
+        self.entries = entries
+        recent = time.time_ns() - dir_mtime_ns < self.RACY_NS
+        self.dir_mtime_ns = None if recent else dir_mtime_ns
+        return self
+
+    def _restat(self, entry):
+        """Update a cached entry from the file; False if it is gone"""
+        try:
+            entry.update(os.stat(entry.path))
+        except OSError:
+            return False
+        return True
+
+    def snapshot(self):
+        """Return the set of icon names currently in the directory"""
+        return frozenset(self.refresh().entries)
+
+    def new_since(self, snapshot, since):
+        """Icons added after snapshot or modified after since, newest first.
+
+        Every icon is re-stat'ed: writing a file, whether a browser is still
+        downloading it or overwrites an icon already in the snapshot, leaves
+        the directory's mtime alone.
+        """
+        new = []
+        for entry in self.refresh().entries.values():
+            if self._restat(entry) and (entry.name not in snapshot or entry.mtime > since):
+                new.append(entry)
+        new.sort(key=lambda entry: entry.mtime, reverse=True)
+        return new
+
+    def is_valid(self, entry):
+        """Validate an icon through the store, cached per entry"""
+        if entry.valid is None:
+            entry.valid = self.store.validate(entry.path) is not None
+        return entry.valid
+
+def wait_for_new_icon(icon_index, existing_icons, before_time, timeout,
+                      poll_interval=None, settle_time=None):
+    """Poll the icon directory until a newly downloaded icon is complete.
+
+    An icon counts as complete once its size and mtime have not changed for
+    settle_time seconds and it is (or converts to) a valid icon, so files
+    still being written by the browser are never picked up.
+
+    Returns:
+        Path of the new icon, or None if none completed within timeout seconds
+    """
+    poll_interval = poll_interval or DEFAULT_CONFIG['watch_poll_interval']
+    settle_time = DEFAULT_CONFIG['watch_settle_time'] if settle_time is None else settle_time
+    deadline = time.monotonic() + timeout
+    seen = {}
+
+    while True:
+        now = time.monotonic()
+        for entry in icon_index.new_since(existing_icons, before_time):
+            signature = (entry.size, entry.mtime)
+            first_seen = seen.get(entry.name)
+            if first_seen is None or first_seen[0] != signature:
+                seen[entry.name] = (signature, now)
+                if settle_time > 0:
+                    continue
+                first_seen = seen[entry.name]
+            if now - first_seen[1] >= settle_time and entry.size > 0 and icon_index.is_valid(entry):
+                return entry.path
+
+        if now >= deadline:
+            return None
+        time.sleep(min(poll_interval, max(deadline - now, 0)))
+
+def find_new_valid_icon(icon_index, existing_icons, before_time):
+    """Find the latest valid icon (.ico or convertible image) among newly downloaded ones"""
+    new_ico_files = icon_index.new_since(existing_icons, before_time)
+
+    if not icon_index.entries:
+        print(f"{Colors.RED}❌ No icons or images found in: {icon_index.icon_dir}{Colors.RESET}")
         print(f"{Colors.RED}❌ Did you download an icon for this anime?{Colors.RESET}")
         return None
 
-    # Filter to only new icons (not in existing_icons set or modified after before_time)
-    new_ico_files = [f for f in ico_files if f.name not in existing_icons or f.stat().st_mtime > before_time]
-
+    # Only new icons (not in existing_icons or modified after before_time) are considered
     if not new_ico_files:
         print(f"{Colors.RED}❌ No new icons downloaded - all existing icons are from previous sessions{Colors.RESET}")
         print(f"{Colors.RED}❌ Please download an icon for this anime to continue{Colors.RESET}")
         return None
 
-    # Sort by modification time (newest first)
-    new_ico_files.sort(key=lambda f: f.stat().st_mtime, reverse=True)
-
-    # Try to find a valid ICO file among new ones
+    # Try to find a valid ICO file among new ones (newest first)
     for ico_file in new_ico_files:
-        if validate_ico_file(ico_file):
+        if icon_index.is_valid(ico_file):
             print(f"{Colors.GREEN}📦 Using newly downloaded: {ico_file.name}{Colors.RESET}")
-            return str(ico_file)
+            return ico_file.path
         else:
-            print(f"{Colors.YELLOW}⚠️  Skipping invalid ICO: {ico_file.name}{Colors.RESET}")
+            print(f"{Colors.YELLOW}⚠️  Skipping invalid icon: {ico_file.name}{Colors.RESET}")
 
     print(f"{Colors.RED}❌ No valid icons found among newly downloaded files{Colors.RESET}")
     return None
@@ -525,6 +2927,458 @@ def find_valid_icon(icon_dir):
     print(f"{Colors.RED}❌ No valid .ico files found{Colors.RESET}")
     return None
 
+class DownloadError(Exception):
+    """A provider search or icon download that failed.
+
+    Attributes:
+        status: HTTP status code, or None if no response was received
+        retry_after: Seconds the server asked us to wait, if it said so
+        retryable: Whether trying again later may succeed
+    """
+
+    def __init__(self, message, status=None, retry_after=None, retryable=True):
+        super().__init__(message)
+        self.status = status
+        self.retry_after = retry_after
+        self.retryable = retryable
+
+def is_http_url(location):
+    return str(location).lower().startswith(('http://', 'https://'))
+
+# Magic bytes of the formats the icon store accepts
+IMAGE_SIGNATURES = [
+    (b'\x00\x00\x01\x00', '.ico'),
+    (PNG_SIGNATURE, '.png'),
+    (b'\xff\xd8\xff', '.jpg'),
+    (b'GIF8', '.gif'),
+    (b'BM', '.bmp')
+]
+
+def sniff_icon_extension(file_path):
+    """Extension matching a downloaded file's content, or None if it is no icon or image"""
+    with open(file_path, 'rb') as f:
+        head = f.read(16)
+    if head[:4] == b'RIFF' and head[8:12] == b'WEBP':
+        return '.webp'
+    for signature, extension in IMAGE_SIGNATURES:
+        if head.startswith(signature):
+            return extension
+    return None
+
+INVALID_FILENAME_RE = LazyPattern('INVALID_FILENAME_RE', r'[<>:"/\\|?*\x00-\x1f]')
+
+def icon_file_name(title, extension):
+    """File name for a title's icon, safe on Windows ("Re:Zero" -> "ReZero.png")"""
+    name = INVALID_FILENAME_RE.sub('', title).strip(' .') or 'icon'
+    return f"{name}{extension}"
+
+class IconCandidate:
+    """An icon a provider found for a title"""
+
+    __slots__ = ('title', 'url', 'provider')
+
+    def __init__(self, title, url, provider):
+        self.title = title
+        self.url = url
+        self.provider = provider
+
+class IconProvider(ABC):
+    """Somewhere icons can be searched and fetched without a browser.
+
+    search() returns IconCandidates for a title, best first. Their urls
+    are http(s) URLs or local file paths; IconFetcher downloads them and
+    makes the HTTP requests providers need for searching.
+    """
+
+    name = None
+
+    @abstractmethod
+    def search(self, title, fetcher, limit):
+        """Up to limit IconCandidates for title, best first"""
+
+class DeviantArtProvider(IconProvider):
+    """DeviantArt, searched through its public RSS feed.
+
+    The feed lists the deviations matching "<title> icon", each with the
+    URL of its full-size image. search_url() is the search page opened in
+    the browser when no headless provider is used.
+    """
+
+    name = 'deviantart'
+    RSS_URL = "https://backend.deviantart.com/rss.xml"
+    MEDIA_NS = '{http://search.yahoo.com/mrss/}'
+
+    @staticmethod
+    def search_url(title):
+        from urllib.parse import quote_plus
+        return f"https://www.deviantart.com/search?q={quote_plus(f'{title} icon')}"
+
+    def search(self, title, fetcher, limit):
+        import xml.etree.ElementTree as ET
+        feed = fetcher.get(self.RSS_URL, params={'type': 'deviation', 'q': f"{title} icon"})
+        try:
+            root = ET.fromstring(feed)
+        except ET.ParseError as e:
+            raise DownloadError(f"Unreadable DeviantArt feed: {e}") from e
+        candidates = []
+        for item in root.iter('item'):
+            for media in item.iter(f'{self.MEDIA_NS}content'):
+                if media.get('medium') == 'image' and media.get('url'):
+                    candidates.append(IconCandidate(item.findtext('title') or title, media.get('url'), self.name))
+                    break
+            if len(candidates) >= limit:
+                break
+        return candidates
+
+class LocalIconProvider(IconProvider):
+    """Icons from a local directory or HTTP server, e.g. a shared collection or offline tests.
+
+    A directory offers its icons and images by file name ("Naruto.png" is
+    an icon for Naruto). A URL serves a JSON index, [{"title": ..., "url":
+    ...}, ...] (or {"icons": [...]}), with urls relative to the index.
+    The directory or index is read once.
+    """
+
+    name = 'local'
+
+    def __init__(self, source):
+        self.source = source
+        self.catalog = None
+        self.lock = threading.Lock()
+
+    def _load(self, fetcher):
+        with self.lock:
+            if self.catalog is None:
+                if is_http_url(self.source):
+                    from urllib.parse import urljoin
+                    try:
+                        index = json.loads(fetcher.get(self.source))
+                    except ValueError as e:
+                        raise DownloadError(f"Invalid icon index {self.source}: {e}", retryable=False) from e
+                    if isinstance(index, dict):
+                        index = index.get('icons', [])
+                    icons = [(item.get('title') or '', urljoin(self.source, item['url']))
+                             for item in index if isinstance(item, dict) and item.get('url')]
+                else:
+                    with os.scandir(self.source) as it:
+                        icons = [(Path(entry.name).stem, entry.path) for entry in it
+                                 if entry.name.lower().endswith(ICON_EXTENSIONS) and entry.is_file()]
+                self.catalog = [(normalize_title(name), name, url) for name, url in icons]
+        return self.catalog
+
+    def search(self, title, fetcher, limit):
+        query = normalize_title(title)
+        words = set(query.split())
+        exact = []
+        partial = []
+        for norm, name, url in self._load(fetcher):
+            if norm == query:
+                exact.append(IconCandidate(name, url, self.name))
+            elif words and words <= set(norm.split()):
+                # "Naruto Icon 2" for Naruto; the closest names come first
+                partial.append((len(norm), name, IconCandidate(name, url, self.name)))
+        partial.sort(key=lambda item: item[:2])
+        return (exact + [candidate for _, _, candidate in partial])[:limit]
+
+ICON_PROVIDERS = {
+    'deviantart': DeviantArtProvider,
+    'local': LocalIconProvider
+}
+
+def get_icon_provider(name, source=None):
+    """Create the headless icon provider called name ('browser' means none)"""
+    if name == 'browser':
+        return None
+    if name == 'local':
+        if not source:
+            raise ValueError("the local icon provider needs --icon-source (a directory or index URL)")
+        return LocalIconProvider(source)
+    return ICON_PROVIDERS[name]()
+
+class IconFetcher:
+    """Fetches icons from an IconProvider into the icon directory.
+
+    Searches and downloads run on a bounded thread pool, and every request
+    first waits for the rate limiter of its host, so a whole library can be
+    fetched at once without hammering any one server. Downloads are
+    written to <icon dir>/.anifold_downloads/ as .part files: an
+    interrupted download continues where it stopped (with an HTTP Range
+    request) on the next attempt, or in the next run.
+
+    A title's candidates are downloaded one at a time, best first, until
+    one is (or converts to) a valid icon; that one is moved into the icon
+    directory, named after the title, where the usual validation and apply
+    path takes it from there.
+
+    Args:
+        provider: IconProvider to search
+        workers: Concurrent searches and downloads
+        per_host: Requests per second allowed to any one host
+        candidates: Candidates tried per title
+    """
+
+    def __init__(self, provider, workers=None, per_host=None, candidates=None, connect_timeout=None,
+                 read_timeout=None, max_retries=None, retry_delay=None):
+        self.provider = provider
+        self.workers = max(workers or DEFAULT_CONFIG['download_workers'], 1)
+        self.per_host = per_host or DEFAULT_CONFIG['download_per_host']
+        self.candidates = candidates or DEFAULT_CONFIG['icon_candidates']
+        self.timeout = (
+            connect_timeout or DEFAULT_CONFIG['connect_timeout'],
+            read_timeout or DEFAULT_CONFIG['read_timeout']
+        )
+        self.max_retries = DEFAULT_CONFIG['max_retries'] if max_retries is None else max_retries
+        self.retry_delay = DEFAULT_CONFIG['retry_delay'] if retry_delay is None else retry_delay
+        self.lock = threading.Lock()
+        self.limiters = {}
+        self.session = None
+        self.pool = None
+
+    def _session(self):
+        with self.lock:
+            if self.session is None:
+                requests = import_requests()
+                self.request_error = requests.RequestException
+                self.session = requests.Session()
+                adapter = requests.adapters.HTTPAdapter(pool_connections=self.workers, pool_maxsize=self.workers)
+                self.session.mount('http://', adapter)
+                self.session.mount('https://', adapter)
+                self.session.headers.update({'User-Agent': f'AniFold/{__version__}'})
+            return self.session
+
+    def _limiter(self, url):
+        from urllib.parse import urlsplit
+        host = urlsplit(url).netloc.lower()
+        with self.lock:
+            limiter = self.limiters.get(host)
+            if limiter is None:
+                # One token at a time: requests are spaced out evenly, not sent in bursts
+                limiter = self.limiters[host] = RateLimiter([(1, 1.0 / self.per_host)])
+            return limiter
+
+    def _request(self, url, params=None, headers=None, stream=False):
+        """GET url once its host's limiter allows it, raising DownloadError on failure"""
+        session = self._session()
+        limiter = self._limiter(url)
+        with metrics.timer('rate_limit_wait'):
+            limiter.acquire()
+        metrics.count('download_requests')
+        try:
+            response = session.get(url, params=params, headers=headers, timeout=self.timeout, stream=stream)
+        except self.request_error as e:
+            metrics.count('download_errors')
+            raise DownloadError(f"Cannot download {url}: {e}") from e
+
+        status = response.status_code
+        # 416: a Range past the end, i.e. the .part file is already complete
+        if status >= 400 and status != 416:
+            response.close()
+            metrics.count('download_errors')
+            retry_after = parse_retry_after(response.headers.get('Retry-After'))
+            if status == 429:
+                limiter.defer(retry_after or self.retry_delay)
+            raise DownloadError(f"HTTP {status} for {url}", status, retry_after,
+                                retryable=status == 429 or status >= 500)
+        return response
+
+    def get(self, url, params=None):
+        """Body of a small request (a search feed or index), retried with backoff"""
+        def attempt():
+            response = self._request(url, params)
+            try:
+                return response.content
+            except self.request_error as e:
+                raise DownloadError(f"Cannot download {url}: {e}") from e
+            finally:
+                response.close()
+        return retry_with_backoff(attempt, self.max_retries, self.retry_delay)
+
+    def download(self, url, dest):
+        """Download url (or copy a local file) to dest, resuming dest.part if present"""
+        if not is_http_url(url):
+            import shutil
+            part = f"{dest}.part"
+            shutil.copyfile(url, part)
+            os.replace(part, dest)
+            return dest
+        return retry_with_backoff(self._download, self.max_retries, self.retry_delay, url, dest)
+
+    def _download(self, url, dest):
+        part = f"{dest}.part"
+        try:
+            offset = os.path.getsize(part)
+        except OSError:
+            offset = 0
+        # Byte ranges only mean something without content encoding
+        headers = {'Accept-Encoding': 'identity'}
+        if offset:
+            headers['Range'] = f'bytes={offset}-'
+
+        with metrics.timer('download'):
+            response = self._request(url, headers=headers, stream=True)
+            with response:
+                if response.status_code == 416 and offset:
+                    os.replace(part, dest)
+                    return dest
+                content_range = response.headers.get('Content-Range', '')
+                if offset and response.status_code == 206 and content_range.startswith(f'bytes {offset}-'):
+                    mode = 'ab'
+                    metrics.count('downloads_resumed')
+                else:
+                    # No (usable) range support: start over
+                    mode, offset = 'wb', 0
+                expected = response.headers.get('Content-Length')
+                # urllib3 would drop the bytes of a broken-off read along with the
+                # connection; keep them for resuming and check the length below
+                response.raw.enforce_content_length = False
+                received = 0
+                try:
+                    with open(part, mode) as f:
+                        for chunk in response.iter_content(64 * 1024):
+                            f.write(chunk)
+                            received += len(chunk)
+                except self.request_error as e:
+                    raise DownloadError(f"Download of {url} broke off after {offset + received} bytes: {e}") from e
+                finally:
+                    metrics.count('download_bytes', received)
+                if expected and expected.isdigit() and received < int(expected):
+                    raise DownloadError(f"Download of {url} broke off after {offset + received} bytes")
+        os.replace(part, dest)
+        metrics.count('icons_downloaded')
+        return dest
+
+    def _pool(self):
+        with self.lock:
+            if self.pool is None:
+                from concurrent.futures import ThreadPoolExecutor
+                self.pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='icon-fetch')
+            return self.pool
+
+    def _search(self, title):
+        try:
+            return self.provider.search(title, self, self.candidates)
+        except (DownloadError, OSError) as e:
+            print(f"{Colors.YELLOW}⚠️  {self.provider.name} search failed for '{title}': {e}{Colors.RESET}")
+            return []
+
+    def _fetch_candidate(self, url, downloads_dir):
+        """Download one candidate; returns its path with the right extension, or None"""
+        import hashlib
+        dest = downloads_dir / hashlib.sha1(url.encode('utf-8')).hexdigest()[:20]
+        try:
+            self.download(url, dest)
+            extension = sniff_icon_extension(dest)
+        except (DownloadError, OSError) as e:
+            print(f"{Colors.YELLOW}⚠️  Skipping icon {url}: {e}{Colors.RESET}")
+            return None
+        if extension is None:
+            os.remove(dest)
+            return None
+        path = dest.with_suffix(extension)
+        os.replace(dest, path)
+        return path
+
+    def _download_once(self, url, downloads_dir, downloaded):
+        """_fetch_candidate, once per url however many titles share it.
+
+        downloaded maps urls to Futures of their paths; the first title to
+        need a url downloads it, the others wait for that download.
+        """
+        with self.lock:
+            future = downloaded.get(url)
+            leader = future is None
+            if leader:
+                from concurrent.futures import Future
+                future = downloaded[url] = Future()
+        if leader:
+            try:
+                future.set_result(self._fetch_candidate(url, downloads_dir))
+            except BaseException as e:
+                future.set_exception(e)
+                raise
+        return future.result()
+
+    def _fetch_title(self, title, downloads_dir, icon_index, downloaded):
+        """Download a title's candidates in order until one is a valid icon; its path or None"""
+        for candidate in self._search(title):
+            path = self._download_once(candidate.url, downloads_dir, downloaded)
+            if path and icon_index.store.validate(path):
+                return path
+        return None
+
+    def fetch_many(self, titles, icon_index):
+        """Fetch an icon for each title into icon_index's directory.
+
+        Titles are fetched in parallel; each title's candidates are tried
+        one at a time, so the next one is only downloaded if the previous
+        one is not a valid icon.
+
+        Returns:
+            {title: path of the fetched icon in the icon directory, or None}
+        """
+        titles = list(dict.fromkeys(titles))
+        results = dict.fromkeys(titles)
+        if not titles:
+            return results
+        downloads_dir = icon_index.icon_dir / DEFAULT_CONFIG['icon_download_dir']
+        downloads_dir.mkdir(parents=True, exist_ok=True)
+
+        with metrics.timer('icon_fetch'):
+            downloaded = {}
+            count = len(titles)
+            fetched = self._pool().map(self._fetch_title, titles, [downloads_dir] * count,
+                                       [icon_index] * count, [downloaded] * count)
+
+            placed = {}
+            for title, path in zip(titles, fetched):
+                if path:
+                    if path not in placed:
+                        placed[path] = self._place(path, title, icon_index.icon_dir)
+                    results[title] = placed[path]
+            for future in downloaded.values():
+                path = future.result()
+                if path and path not in placed:
+                    os.remove(path)
+        metrics.count('icons_fetched', sum(1 for path in results.values() if path))
+        return results
+
+    def _place(self, path, title, icon_dir):
+        """Move a fetched icon into icon_dir under the title's name, next to any earlier one"""
+        name = icon_file_name(title, path.suffix)
+        target = icon_dir / name
+        number = 1
+        while target.exists():
+            if file_sha256(target) == file_sha256(path):
+                # Fetched before (e.g. --rescan): keep the copy already there
+                os.remove(path)
+                return str(target)
+            number += 1
+            target = icon_dir / f"{Path(name).stem} ({number}){path.suffix}"
+        os.replace(path, target)
+        return str(target)
+
+    def close(self):
+        if self.pool:
+            self.pool.shutdown()
+        if self.session:
+            self.session.close()
+
+_icon_fetcher = None
+
+def configure_icon_fetcher(provider, workers=None, per_host=None, connect_timeout=None, read_timeout=None,
+                           max_retries=None, retry_delay=None):
+    """Set the fetcher used instead of the browser to get icons (None: open the browser)"""
+    global _icon_fetcher
+    if _icon_fetcher:
+        _icon_fetcher.close()
+    _icon_fetcher = None
+    if provider:
+        _icon_fetcher = IconFetcher(provider, workers, per_host, connect_timeout=connect_timeout,
+                                    read_timeout=read_timeout, max_retries=max_retries, retry_delay=retry_delay)
+
+def get_icon_fetcher():
+    return _icon_fetcher
+
 def show_progress_bar(current, total, prefix="Progress", suffix="Complete", length=40):
     """Display a progress bar"""
     percent = int(100 * (current / float(total)) if total > 0 else 100)
@@ -551,6 +3405,280 @@ def show_celebration(success_count, total_count):
 
     return celebration
 
+def read_desktop_ini_icon(folder_path):
+    """Return the icon path set by a folder's desktop.ini if that icon exists"""
+    desktop_ini = Path(folder_path) / "desktop.ini"
+    try:
+        raw = desktop_ini.read_bytes()
+    except OSError:
+        return None
+    text = raw.decode('utf-16') if raw.startswith((b'\xff\xfe', b'\xfe\xff')) else raw.decode('utf-8', 'ignore')
+    for line in text.splitlines():
+        key, _, value = line.partition('=')
+        if key.strip().lower() == 'iconresource' and value.strip():
+            icon_path = value.strip().rsplit(',', 1)[0]
+            return icon_path if os.path.isfile(icon_path) else None
+    return None
+
+class LibraryManifest:
+    """Per-library record of processed folders, used to skip and resume scans.
+
+    Stored as a SQLite database in the manifest directory, named after a hash
+    of the library path. Rows are keyed by the folder path relative to the
+    library and hold the folder's mtime/inode, the resolved title and MAL id
+    and the sha256 of the applied icon. Every folder is committed as soon as
+    it is done, so an interrupted run resumes at the first unfinished folder.
+
+    The rows double as the library's catalog: with the icon hashes and the
+    icon store, --repair rewrites every desktop.ini without any lookups.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS folders (
+            path TEXT PRIMARY KEY,
+            mtime REAL NOT NULL,
+            inode INTEGER NOT NULL,
+            title TEXT,
+            icon_hash TEXT,
+            updated_at REAL NOT NULL,
+            mal_id INTEGER
+        );
+    """
+
+    def __init__(self, library_path, manifest_dir=None):
+        import sqlite3
+        self.library_path = Path(os.path.abspath(library_path))
+        manifest_dir = Path(manifest_dir or DEFAULT_CONFIG['manifest_dir'])
+        manifest_dir.mkdir(parents=True, exist_ok=True)
+        import hashlib
+        name = hashlib.md5(str(self.library_path).lower().encode()).hexdigest()
+        self.db_path = manifest_dir / f"{name}.db"
+        # Shared by the discovery thread and the processing loop
+        self.conn = sqlite3.connect(str(self.db_path), timeout=30, isolation_level=None,
+                                    check_same_thread=False)
+        self.lock = threading.Lock()
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.executescript(self.SCHEMA)
+        # Manifests from older versions have no mal_id column
+        columns = {row[1] for row in self.conn.execute('PRAGMA table_info(folders)')}
+        if 'mal_id' not in columns:
+            self.conn.execute('ALTER TABLE folders ADD COLUMN mal_id INTEGER')
+        self.rows = {
+            path: (mtime, inode)
+            for path, mtime, inode in self.conn.execute('SELECT path, mtime, inode FROM folders')
+        }
+
+    def key(self, folder_path):
+        folder_path = Path(os.path.abspath(folder_path))
+        try:
+            return folder_path.relative_to(self.library_path).as_posix()
+        except ValueError:
+            return folder_path.as_posix()
+
+    def is_done(self, folder_path):
+        """Check whether a folder was completed and has not changed since"""
+        row = self.rows.get(self.key(folder_path))
+        if row is None:
+            return False
+        try:
+            st = os.stat(folder_path)
+        except OSError:
+            return False
+        return row == (st.st_mtime, st.st_ino)
+
+    def mark_done(self, folder_path, title, icon_path=None, mal_id=None, icon_hash=None):
+        """Record a folder as done with its current mtime/inode.
+
+        Without a title (a folder adopted by its desktop.ini), an already
+        cataloged folder keeps its title and MAL id.
+        """
+        st = os.stat(folder_path)
+        if icon_path and not icon_hash:
+            try:
+                icon_hash = file_sha256(icon_path)
+            except OSError:
+                pass
+        key = self.key(folder_path)
+        with self.lock:
+            self.conn.execute(
+                'INSERT INTO folders (path, mtime, inode, title, icon_hash, updated_at, mal_id) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?) '
+                'ON CONFLICT (path) DO UPDATE SET mtime = excluded.mtime, inode = excluded.inode, '
+                'icon_hash = COALESCE(excluded.icon_hash, icon_hash), updated_at = excluded.updated_at, '
+                'title = COALESCE(excluded.title, title), '
+                'mal_id = CASE WHEN excluded.title IS NULL THEN mal_id ELSE excluded.mal_id END',
+                (key, st.st_mtime, st.st_ino, title, icon_hash, time.time(), mal_id)
+            )
+            self.rows[key] = (st.st_mtime, st.st_ino)
+
+    def entries(self):
+        """Cataloged folders as (relative path, title, mal_id, icon_hash), in path order"""
+        with self.lock:
+            return self.conn.execute(
+                'SELECT path, title, mal_id, icon_hash FROM folders ORDER BY path'
+            ).fetchall()
+
+    def adopt_existing(self, folder_path):
+        """Record a folder that already has a working desktop.ini icon.
+
+        Covers folders iconed before the manifest existed. Returns True if
+        the folder was adopted.
+        """
+        icon_path = read_desktop_ini_icon(folder_path)
+        if not icon_path:
+            return False
+        self.mark_done(folder_path, None, icon_path)
+        return True
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+def walk_library(library_path, max_depth=1, descend=None, workers=None):
+    """Yield the subdirectories of a library as they are found.
+
+    Directories are listed with os.scandir, whose entries already know
+    whether they are directories (d_type), so no per-entry stat is needed.
+    On network shares that saves a round-trip per entry. Listings run in
+    parallel on a bounded thread pool, and results stream out while deeper
+    levels are still being listed.
+
+    Args:
+        library_path: Root folder of the library
+        max_depth: How many levels below the root to visit (1 = direct children)
+        descend: Predicate on a folder name; only matching folders are entered
+        workers: Max directories listed at the same time
+
+    Raises:
+        OSError: If the library root itself cannot be listed
+    """
+    def list_dirs(path, depth):
+        dirs = []
+        try:
+            with os.scandir(path) as it:
+                for entry in it:
+                    try:
+                        if entry.is_dir():
+                            dirs.append((entry.name, entry.path))
+                    except OSError:
+                        continue
+        except OSError:
+            if depth == 1:
+                raise
+        dirs.sort()
+        return depth, dirs
+
+    from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+    with ThreadPoolExecutor(max_workers=workers or DEFAULT_CONFIG['scan_workers'],
+                            thread_name_prefix='library-scan') as pool:
+        pending = {pool.submit(list_dirs, library_path, 1)}
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                depth, dirs = future.result()
+                for name, path in dirs:
+                    yield Path(path)
+                    if depth < max_depth and (descend is None or descend(name)):
+                        pending.add(pool.submit(list_dirs, path, depth + 1))
+
+class LibraryDiscovery:
+    """Discover library folders on a background thread.
+
+    Folders from walk_library are classified and checked against the
+    manifest. The ones still to do are queued for processing right away,
+    with their FolderGuess, and their MAL lookups are submitted, so the first folders are processed
+    before discovery has finished. Folders that look like anime are not
+    searched any deeper; other folders are treated as containers (e.g.
+    genre folders).
+
+    Use it as a context manager around the processing loop, inside the
+    manifest's and lookup engine's lifetime: leaving it (also on errors or
+    Ctrl+C) stops discovery and waits for the thread, so nothing touches
+    them once they are closed.
+    """
+
+    def __init__(self, library_path, args, manifest=None, lookup=None):
+        self.library_path = library_path
+        self.args = args
+        self.manifest = manifest
+        self.lookup = lookup
+        self.queue = queue.Queue()
+        self.total = 0
+        self.anime = 0
+        self.other = 0
+        self.skipped_done = 0
+        self.queued = 0
+        self.finished = False
+        self.error = None
+        self.stopping = threading.Event()
+        self.thread = threading.Thread(target=self._run, name='library-discovery', daemon=True)
+
+    def start(self):
+        self.thread.start()
+        return self
+
+    def stop(self):
+        """Stop discovering after the current folder and wait for the thread"""
+        self.stopping.set()
+        if self.thread.is_alive():
+            self.thread.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+        return False
+
+    def _is_done(self, folder):
+        if not self.manifest:
+            return False
+        if self.manifest.is_done(folder):
+            return True
+        # Dry runs never record anything, not even adopted folders
+        return not self.args.dry_run and self.manifest.adopt_existing(folder)
+
+    def _run(self):
+        folders = walk_library(
+            self.library_path,
+            self.args.depth,
+            descend=lambda name: not looks_like_anime_folder(name),
+            workers=self.args.scan_workers
+        )
+        try:
+            for folder in folders:
+                if self.stopping.is_set():
+                    break
+                self.total += 1
+                if not looks_like_anime_folder(folder.name):
+                    self.other += 1
+                    continue
+                self.anime += 1
+                if self._is_done(folder):
+                    self.skipped_done += 1
+                    continue
+                folder_guess = FolderGuess.from_folder(folder)
+                if self.lookup:
+                    self.lookup.submit(folder_guess.guess)
+                self.queued += 1
+                self.queue.put((folder, folder_guess))
+        except Exception as e:
+            self.error = e
+        finally:
+            # Shuts down walk_library's listing pool when stopped early
+            folders.close()
+            self.finished = True
+            self.queue.put(None)
+
+    def __iter__(self):
+        """Yield (folder, FolderGuess) as folders are discovered"""
+        while True:
+            item = self.queue.get()
+            if item is None:
+                return
+            yield item
+
 def scan_library(library_path, args, logger=None):
     """Scan library folder for anime subdirectories"""
     library_path = Path(library_path)
@@ -565,98 +3693,534 @@ def scan_library(library_path, args, logger=None):
     print(f"\n{Colors.BOLD}{Colors.CYAN}📚 Scanning library: {library_path}{Colors.RESET}")
     print(f"{Colors.CYAN}🔍 Detecting anime folders...{Colors.RESET}")
 
-    # Find subdirectories
+    processed = 0
+    successful = 0
+    metrics.reset()
+
+    # The manifest catalogs every applied folder and skips folders that are
+    # unchanged since a previous run finished them (unless --rescan)
+    manifest = LibraryManifest(library_path, args.manifest_dir)
+    # Dry runs read the manifest but never record anything
+    record = manifest if not args.dry_run else None
+    icon_index = IconIndex(args.icon_dir, args.convert_workers)
+    applier = FolderIconApplier(get_attribute_backend(args.attr_backend))
+
+    # Discover folders and resolve MAL names in the background while
+    # folders are processed in the order they are found
     try:
-        subdirs = [d for d in library_path.iterdir() if d.is_dir()]
-    except PermissionError:
+        with MalLookupEngine(args, logger) as lookup, applier:
+            with LibraryDiscovery(library_path, args, None if args.rescan else manifest, lookup) as discovery:
+                for i, (subdir, folder_guess) in enumerate(discovery, 1):
+                    if i == 1:
+                        print(f"{Colors.YELLOW}{'='*60}{Colors.RESET}")
+                        print(f"{Colors.BOLD}{Colors.BLUE}🚀 Starting batch processing...{Colors.RESET}")
+
+                    found = f"{discovery.queued}" if discovery.finished else f"{discovery.queued}+"
+                    show_progress_bar(i-1, discovery.queued, f"🔄 Processing {subdir.name[:20]}", f"({i}/{found})")
+
+                    result = process_anime_folder(subdir, args, logger, lookup, record, icon_index, applier,
+                                                  folder_guess)
+                    processed += 1
+
+                    if result:
+                        successful += 1
+    finally:
+        if manifest:
+            manifest.close()
+
+    if isinstance(discovery.error, OSError):
         print(f"{Colors.RED}❌ Cannot access directory: {library_path}{Colors.RESET}")
         return
+    elif discovery.error:
+        raise discovery.error
 
-    total_folders = len(subdirs)
-    processed = 0
-    successful = 0
-
-    if total_folders == 0:
+    if discovery.total == 0:
         print(f"{Colors.YELLOW}📂 No subdirectories found. This might not be a library folder.{Colors.RESET}")
         return
 
-    anime_folders = [d for d in subdirs if looks_like_anime_folder(d.name)]
-    other_folders = [d for d in subdirs if not looks_like_anime_folder(d.name)]
-
-    print(f"{Colors.GREEN}📂 Found {total_folders} total folders{Colors.RESET}")
-    print(f"{Colors.GREEN}🎬 Detected {len(anime_folders)} anime-like folders{Colors.RESET}")
+    print(f"{Colors.GREEN}📂 Found {discovery.total} total folders{Colors.RESET}")
+    print(f"{Colors.GREEN}🎬 Detected {discovery.anime} anime-like folders{Colors.RESET}")
 
-    if len(anime_folders) == 0:
+    if discovery.anime == 0:
         print(f"{Colors.YELLOW}⚠️  No anime folders detected. Maybe try running with --single flag?{Colors.RESET}")
         return
 
-    print(f"{Colors.YELLOW}{'='*60}{Colors.RESET}")
-    print(f"{Colors.BOLD}{Colors.BLUE}🚀 Starting batch processing...{Colors.RESET}")
-
-    # Process anime folders
-    for i, subdir in enumerate(anime_folders, 1):
-        show_progress_bar(i-1, len(anime_folders), f"🔄 Processing {subdir.name[:20]}", f"({i}/{len(anime_folders)})")
-
-        result = process_anime_folder(subdir, args, logger)
-        processed += 1
-
-        if result:
-            successful += 1
+    if processed == 0:
+        print(f"{Colors.CYAN}⏭️  Skipping {discovery.skipped_done} folders already done in a previous run{Colors.RESET}")
+        print(f"{Colors.GREEN}✨ Everything is up to date! Use --rescan to process all folders again.{Colors.RESET}")
+        return
 
     # Final progress bar
-    show_progress_bar(len(anime_folders), len(anime_folders), "✅ All Done", "")
+    show_progress_bar(processed, processed, "✅ All Done", "")
 
     print(f"\n{Colors.BOLD}{Colors.GREEN}{'='*60}{Colors.RESET}")
 
     # Fun results celebration
-    celebration = show_celebration(successful, len(anime_folders))
+    celebration = show_celebration(successful, processed)
     print(f"{Colors.BOLD}{celebration}{Colors.RESET}")
 
-    print(f"{Colors.BOLD}{Colors.GREEN}📊 Results: {successful}/{len(anime_folders)} anime folders processed successfully{Colors.RESET}")
+    print(f"{Colors.BOLD}{Colors.GREEN}📊 Results: {successful}/{processed} anime folders processed successfully{Colors.RESET}")
+
+    if lookup.query_count < processed:
+        print(f"{Colors.CYAN}🔗 {processed} folders shared {lookup.query_count} MAL lookups{Colors.RESET}")
+
+    if applier.written or applier.unchanged:
+        print(f"{Colors.CYAN}📝 Wrote {applier.written} desktop.ini files ({applier.unchanged} already up to date){Colors.RESET}")
+
+    if discovery.skipped_done:
+        print(f"{Colors.CYAN}⏭️  Skipped {discovery.skipped_done} folders already done{Colors.RESET}")
 
-    if other_folders:
-        print(f"{Colors.CYAN}ℹ️  Skipped {len(other_folders)} non-anime folders{Colors.RESET}")
+    if discovery.other:
+        print(f"{Colors.CYAN}ℹ️  Skipped {discovery.other} non-anime folders{Colors.RESET}")
+
+    metrics.print_table()
 
     print(f"{Colors.BOLD}{Colors.GREEN}{'='*60}{Colors.RESET}")
 
     if logger:
-        logger.info(f"Library scan complete: {successful}/{len(anime_folders)} successful")
+        logger.info(f"Library scan complete: {successful}/{processed} successful")
+
+PLAN_VERSION = 1
+PLAN_FIELDS = ['folder', 'guess', 'chosen_title', 'confidence', 'icon_path', 'candidates']
+# A CSV plan repeats the library on every row, so it survives rows being
+# sorted, filtered or deleted in a spreadsheet
+PLAN_CSV_FIELDS = PLAN_FIELDS + ['library']
+
+def plan_candidate(score, anime):
+    """The parts of a ranked MAL result worth reviewing in a plan"""
+    return {
+        'mal_id': anime.mal_id,
+        'title': anime.title,
+        'year': anime.year,
+        'episodes': anime.episodes,
+        'match': round(score, 3)
+    }
 
-def detect_operation_mode():
-    """Auto-detect if current directory is a library or single anime folder"""
-    current_dir = Path.cwd()
-    video_extensions = {'.mkv', '.mp4', '.avi', '.mov', '.wmv', '.flv', '.webm', '.m4v'}
+def icons_by_title(icon_index):
+    """Map normalized icon file names in the icon directory to their paths"""
+    return {normalize_title(Path(entry.name).stem): entry for entry in icon_index.refresh().entries.values()}
+
+def write_plan(plan_file, library_path, entries):
+    """Write plan entries to a .json or .csv file (through a temp file)"""
+    plan_file = Path(plan_file)
+    # Absolute like LibraryManifest's, not resolved: a symlink or mapped drive
+    # would otherwise name another manifest than the scan and --repair read
+    library = os.path.abspath(library_path)
+    tmp = plan_file.with_name(f"{plan_file.name}.{os.getpid()}.tmp")
+    if plan_file.suffix.lower() == '.csv':
+        import csv
+        with open(tmp, 'w', newline='', encoding='utf-8-sig') as f:
+            writer = csv.DictWriter(f, fieldnames=PLAN_CSV_FIELDS)
+            writer.writeheader()
+            for entry in entries:
+                row = dict(entry, library=library)
+                row['candidates'] = json.dumps(entry['candidates'], ensure_ascii=False)
+                writer.writerow(row)
+    else:
+        plan = {
+            'version': PLAN_VERSION,
+            'library': library,
+            'created_at': datetime.now().isoformat(timespec='seconds'),
+            'entries': entries
+        }
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(plan, f, ensure_ascii=False, indent=2)
+    os.replace(tmp, plan_file)
+
+def read_plan(plan_file):
+    """Read a plan written by write_plan (and possibly edited since).
 
-    # Count different types of items
-    subdirs = []
-    video_files = []
+    Returns:
+        (library_path, entries); library_path is None if the plan doesn't
+        name its library (e.g. the column was dropped from a CSV plan)
+    """
+    plan_file = Path(plan_file)
+    if plan_file.suffix.lower() == '.csv':
+        import csv
+        with open(plan_file, newline='', encoding='utf-8-sig') as f:
+            entries = []
+            library_path = None
+            for row in csv.DictReader(f):
+                try:
+                    row['candidates'] = json.loads(row.get('candidates') or '[]')
+                except ValueError:
+                    row['candidates'] = []
+                library_path = library_path or (row.pop('library', None) or '').strip() or None
+                entries.append(row)
+    else:
+        with open(plan_file, 'r', encoding='utf-8') as f:
+            plan = json.load(f)
+        entries = plan.get('entries', [])
+        library_path = plan.get('library')
+
+    for entry in entries:
+        entry['folder'] = (entry.get('folder') or '').strip()
+        entry['chosen_title'] = (entry.get('chosen_title') or '').strip()
+        entry['icon_path'] = (entry.get('icon_path') or '').strip()
+    entries = [entry for entry in entries if entry['folder']]
+    return library_path, entries
+
+def build_plan(library_path, plan_file, args, logger=None):
+    """Resolve every anime folder of a library into a plan file, without setting icons.
+
+    Folders are discovered and looked up concurrently exactly like a
+    library scan, then ranked without asking: the chosen title is the best
+    candidate if the ranking's confidence reaches --min-confidence, else
+    the folder guess. An icon in the icon directory named after the chosen
+    title is filled in as the folder's icon; with a headless icon provider, icons for the
+    other folders are fetched in one concurrent batch.
+    """
+    library_path = Path(library_path)
+    if not library_path.exists():
+        print(f"{Colors.RED}❌ Library path does not exist: {library_path}{Colors.RESET}")
+        return False
+
+    print(f"\n{Colors.BOLD}{Colors.CYAN}🗺️  Planning library: {library_path}{Colors.RESET}")
+    manifest = None if args.rescan else LibraryManifest(library_path, args.manifest_dir)
+    icon_index = IconIndex(args.icon_dir, args.convert_workers)
+    named_icons = icons_by_title(icon_index)
+    entries = []
+    confident = 0
 
     try:
-        for item in current_dir.iterdir():
-            if item.is_dir():
-                subdirs.append(item)
-            elif item.suffix.lower() in video_extensions:
-                video_files.append(item)
+        with MalLookupEngine(args, logger) as lookup, LibraryDiscovery(library_path, args, manifest, lookup) as discovery:
+            for i, (folder, folder_guess) in enumerate(discovery, 1):
+                found = f"{discovery.queued}" if discovery.finished else f"{discovery.queued}+"
+                show_progress_bar(i - 1, discovery.queued, f"🔎 Resolving {folder.name[:20]}", f"({i}/{found})")
+
+                guess = folder_guess.guess
+                ranked = rank_mal_candidates(lookup.results(guess), guess, folder_guess.signals)
+                chosen, confidence = guess, rank_confidence(ranked)
+                if ranked and confidence >= args.min_confidence:
+                    chosen = ranked[0][1].title
+                    confident += 1
+
+                icon = named_icons.get(normalize_title(chosen))
+                icon_path = icon.path if icon and icon_index.is_valid(icon) else ''
+                entries.append({
+                    'folder': os.path.abspath(folder),
+                    'guess': guess,
+                    'chosen_title': chosen,
+                    'confidence': round(confidence, 3),
+                    'icon_path': icon_path,
+                    'candidates': [plan_candidate(score, anime) for score, anime in ranked[:DEFAULT_CONFIG['plan_candidates']]]
+                })
+    finally:
+        if manifest:
+            manifest.close()
+
+    if discovery.error:
+        print(f"\n{Colors.RED}❌ Cannot access directory: {library_path} ({discovery.error}){Colors.RESET}")
+        return False
+    show_progress_bar(len(entries), len(entries), "✅ Resolved", "")
+    if not args.dry_run:
+        fetch_plan_icons(entries, icon_index)
+
+    write_plan(plan_file, library_path, entries)
+    with_icons = sum(1 for entry in entries if entry['icon_path'])
+    print(f"{Colors.GREEN}📝 Plan for {len(entries)} folders written to {plan_file}{Colors.RESET}")
+    print(f"{Colors.CYAN}   🎯 {confident} matched confidently, {len(entries) - confident} kept their guess, "
+          f"{with_icons} already have an icon{Colors.RESET}")
+    if discovery.skipped_done:
+        print(f"{Colors.CYAN}   ⏭️  {discovery.skipped_done} folders already done were left out{Colors.RESET}")
+    print(f"{Colors.YELLOW}💡 Review it, then run: anifold.py --apply \"{plan_file}\"{Colors.RESET}")
+    if logger:
+        logger.info(f"Plan with {len(entries)} folders written to {plan_file}")
+    return True
+
+def fetch_plan_icons(entries, icon_index):
+    """Fill in the icon_path of plan entries without one from the headless icon provider"""
+    fetcher = get_icon_fetcher()
+    missing = [entry for entry in entries if not entry['icon_path']]
+    if not fetcher or not missing:
+        return
+    titles = {entry['chosen_title'] for entry in missing}
+    print(f"{Colors.BLUE}🎨 Fetching icons for {len(titles)} titles from {fetcher.provider.name}...{Colors.RESET}")
+    fetched = fetcher.fetch_many(sorted(titles), icon_index)
+    for entry in missing:
+        entry['icon_path'] = fetched[entry['chosen_title']] or ''
+    print(f"{Colors.CYAN}   📥 {sum(1 for path in fetched.values() if path)}/{len(titles)} titles got an icon{Colors.RESET}")
+
+def apply_plan(plan_file, args, logger=None):
+    """Set the icons of a reviewed plan in one pass.
+
+    Entries with an icon_path are applied straight away. For the others,
+    icons are fetched in one batch by the headless icon provider if there
+    is one, or DeviantArt is opened for the chosen title like in a library
+    scan.
+    Entries whose chosen_title was cleared are skipped, and so are folders
+    done since the plan was made (unless --rescan), so an interrupted apply
+    can simply be run again.
+    """
+    try:
+        library_path, entries = read_plan(plan_file)
+    except (OSError, ValueError) as e:
+        print(f"{Colors.RED}❌ Cannot read plan {plan_file}: {e}{Colors.RESET}")
+        return False
+
+    print(f"\n{Colors.BOLD}{Colors.CYAN}🛠️  Applying plan: {plan_file} ({len(entries)} folders){Colors.RESET}")
+    manifest = None
+    if library_path and os.path.isdir(library_path):
+        manifest = LibraryManifest(library_path, args.manifest_dir)
+    else:
+        # Without the scanned library there is no manifest to record into
+        # that a later scan or --repair would read
+        print(f"{Colors.YELLOW}⚠️  Plan names no existing library folder; applied folders won't be "
+              f"recorded as done{Colors.RESET}")
+    record = manifest if not args.dry_run else None
+    icon_index = IconIndex(args.icon_dir, args.convert_workers)
+    applier = FolderIconApplier(get_attribute_backend(args.attr_backend))
+    successful = skipped = 0
+
+    if not args.dry_run:
+        # Only entries the loop below will set
+        pending = [entry for entry in entries if entry['chosen_title'] and os.path.isdir(entry['folder'])
+                   and not (manifest and not args.rescan and manifest.is_done(entry['folder']))]
+        fetch_plan_icons(pending, icon_index)
+
+    # Convert every planned image in one parallel batch instead of one by one
+    images = {entry['icon_path'] for entry in entries
+              if entry['chosen_title'] and (entry['icon_path'] or '').lower().endswith(IMAGE_EXTENSIONS)}
+    if images and not args.dry_run:
+        print(f"{Colors.CYAN}🖼️  Converting {len(images)} images to icons...{Colors.RESET}")
+        icon_index.store.convert_many(sorted(images))
+
+    try:
+        with applier:
+            for i, entry in enumerate(entries, 1):
+                folder = Path(entry['folder'])
+                title = entry['chosen_title']
+                if not title:
+                    skipped += 1
+                    continue
+                if not folder.is_dir():
+                    print(f"{Colors.YELLOW}⚠️  Folder no longer exists: {folder}{Colors.RESET}")
+                    skipped += 1
+                    continue
+                if manifest and not args.rescan and manifest.is_done(folder):
+                    skipped += 1
+                    continue
+
+                print(f"\n{Colors.BOLD}{Colors.PINK}🎬 [{i}/{len(entries)}] {folder.name} → {title}{Colors.RESET}")
+                try:
+                    # Plan candidates are the dicts written by plan_candidate
+                    mal_id = next((candidate.get('mal_id') for candidate in entry['candidates']
+                                   if candidate.get('title') == title), None)
+                    if set_folder_icon(folder, title, args, logger, record, icon_index, applier,
+                                       entry['icon_path'] or None, mal_id):
+                        successful += 1
+                except Exception as e:
+                    print(f"{Colors.RED}❌ Error processing {folder}: {e}{Colors.RESET}")
+                    if logger:
+                        logger.error(f"Error processing {folder}: {e}")
+    finally:
+        if manifest:
+            manifest.close()
+
+    attempted = len(entries) - skipped
+    print(f"\n{Colors.BOLD}{Colors.GREEN}{'='*60}{Colors.RESET}")
+    print(f"{Colors.BOLD}{show_celebration(successful, attempted)}{Colors.RESET}")
+    print(f"{Colors.BOLD}{Colors.GREEN}📊 Results: {successful}/{attempted} planned folders done{Colors.RESET}")
+    if skipped:
+        print(f"{Colors.CYAN}⏭️  Skipped {skipped} folders (cleared, missing or already done){Colors.RESET}")
+    if applier.written or applier.unchanged:
+        print(f"{Colors.CYAN}📝 Wrote {applier.written} desktop.ini files ({applier.unchanged} already up to date){Colors.RESET}")
+    if logger:
+        logger.info(f"Plan applied: {successful}/{attempted} successful")
+    return True
+
+def classify_directory(directory, sample=None):
+    """Decide whether a directory is a library or a single anime folder.
+
+    The rules: 3+ anime-like subfolders and at most 2 videos, or 3+
+    subfolders and no videos, make a library; anything else (e.g. 3+
+    videos) is a single folder. Entries are streamed from os.scandir, whose
+    d_type answers is_dir() without a stat, and the listing stops at the
+    third video, which settles 'single'. Folder names are only checked with
+    looks_like_anime_folder when there are 1-2 videos, and only until three
+    match.
+
+    Args:
+        directory: Folder to classify
+        sample: Only look at this many entries (None reads them all, so the
+            decision is exact)
+    """
+    subdirs = []
+    videos = 0
+    try:
+        with os.scandir(directory) as it:
+            for seen, entry in enumerate(it, 1):
+                try:
+                    is_dir = entry.is_dir()
+                except OSError:
+                    is_dir = False
+                if is_dir:
+                    subdirs.append(entry.name)
+                elif os.path.splitext(entry.name)[1].lower() in VIDEO_EXTENSIONS:
+                    videos += 1
+                    if videos >= 3:
+                        # Many video files = likely single anime folder
+                        return 'single'
+                if sample and seen >= sample:
+                    break
     except PermissionError:
         # If we can't read the directory, assume single folder mode
         return 'single'
 
-    # Decision logic
-    anime_like_subdirs = [d for d in subdirs if looks_like_anime_folder(d.name)]
-
-    if len(anime_like_subdirs) >= 3 and len(video_files) <= 2:
-        # Multiple anime folders, few videos = likely library
-        return 'library'
-    elif len(subdirs) >= 3 and len(video_files) == 0:
+    if videos == 0:
         # Many subdirs, no videos = likely library
-        return 'library'
-    elif len(video_files) >= 3:
-        # Many video files = likely single anime folder
-        return 'single'
-    else:
-        # Default to single folder for ambiguous cases
-        return 'single'
+        return 'library' if len(subdirs) >= 3 else 'single'
+
+    # Multiple anime folders, few videos = likely library
+    anime_like = 0
+    for name in subdirs:
+        if looks_like_anime_folder(name):
+            anime_like += 1
+            if anime_like >= 3:
+                return 'library'
+    # Default to single folder for ambiguous cases
+    return 'single'
+
+# Part of every cached mode decision; bump it when classify_directory's rules change
+MODE_RULES_VERSION = 1
+MODE_CACHE_FILE = 'modes.json'
+# Decisions kept in the mode cache (the most recent ones)
+MODE_CACHE_ENTRIES = 256
+# Directories modified this recently aren't cached: a change within the same
+# mtime tick would go unnoticed
+MODE_CACHE_MIN_AGE = 2.0
+
+def repair_library(library_path, args, logger=None):
+    """Rewrite the desktop.ini files of a library from its catalog alone.
+
+    Every cataloged folder gets a desktop.ini pointing at its icon (found by
+    hash) in the icon store of --icon-dir, e.g. after the icon directory was
+    moved or the library restored. No Jikan calls and no prompts; files that
+    are already right are left alone. Icons missing from the store are
+    looked for, by hash, among the .ico files in the icon directory.
+    """
+    library_path = Path(os.path.abspath(library_path))
+    if not library_path.is_dir():
+        print(f"{Colors.RED}❌ Library path does not exist: {library_path}{Colors.RESET}")
+        return False
+
+    manifest = LibraryManifest(library_path, args.manifest_dir)
+    try:
+        rows = [row for row in manifest.entries() if row[3]]
+        if not rows:
+            print(f"{Colors.YELLOW}📂 No cataloged folders for {library_path}. "
+                  f"Run a library scan first.{Colors.RESET}")
+            return False
+
+        print(f"\n{Colors.BOLD}{Colors.CYAN}🩹 Repairing {len(rows)} cataloged folders in {library_path}{Colors.RESET}")
+        icon_index = IconIndex(args.icon_dir, args.convert_workers)
+        store = icon_index.store
+        icons_by_hash = None
+        applier = FolderIconApplier(get_attribute_backend(args.attr_backend))
+        stale = missing_folders = missing_icons = 0
+
+        with applier:
+            for i, (rel_path, title, mal_id, icon_hash) in enumerate(rows, 1):
+                if i % 100 == 0 or i == len(rows):
+                    show_progress_bar(i, len(rows), "🩹 Repairing", f"({i}/{len(rows)})")
+                folder = library_path / rel_path
+                if not folder.is_dir():
+                    missing_folders += 1
+                    continue
+
+                icon_path = store.path_for(icon_hash)
+                if not icon_path.exists():
+                    if icons_by_hash is None:
+                        # Only hash the icon directory when the store is missing icons
+                        icons_by_hash = {}
+                        for entry in icon_index.refresh().entries.values():
+                            if entry.name.lower().endswith('.ico'):
+                                try:
+                                    icons_by_hash.setdefault(file_sha256(entry.path), entry.path)
+                                except OSError:
+                                    continue
+                    source = icons_by_hash.get(icon_hash)
+                    stored = store.add(source) if source and not args.dry_run else source
+                    if not stored:
+                        missing_icons += 1
+                        if logger:
+                            logger.warning(f"Icon {icon_hash} for {folder} is not in the icon store")
+                        continue
+                    icon_path = Path(stored)
+
+                try:
+                    current = (folder / 'desktop.ini').read_bytes()
+                except OSError:
+                    current = None
+                on_applied = None
+                if current != desktop_ini_bytes(str(icon_path)):
+                    stale += 1
+                    on_applied = (lambda folder=folder, title=title, icon_path=icon_path, mal_id=mal_id,
+                                  icon_hash=icon_hash: manifest.mark_done(folder, title, icon_path, mal_id, icon_hash))
+                if args.dry_run:
+                    continue
+                try:
+                    # Straight to the applier: apply_folder_icon's per-folder messages would flood the output.
+                    # Correct files are still passed on, so their attributes get fixed too.
+                    applier.apply(folder, str(icon_path), on_applied)
+                except OSError as e:
+                    print(f"{Colors.RED}❌ Could not repair {folder}: {e}{Colors.RESET}")
+    finally:
+        manifest.close()
+
+    print(f"\n{Colors.BOLD}{Colors.GREEN}{'='*60}{Colors.RESET}")
+    verb = "Would rewrite" if args.dry_run else "Rewrote"
+    print(f"{Colors.BOLD}{Colors.GREEN}🩹 {verb} {stale} stale desktop.ini files, "
+          f"{len(rows) - stale - missing_folders - missing_icons} already correct{Colors.RESET}")
+    if missing_folders:
+        print(f"{Colors.YELLOW}📂 {missing_folders} cataloged folders no longer exist{Colors.RESET}")
+    if missing_icons:
+        print(f"{Colors.YELLOW}🖼️  {missing_icons} icons are missing from {store.root}{Colors.RESET}")
+    if logger:
+        logger.info(f"Repair of {library_path}: {stale} rewritten, {missing_folders} missing folders, "
+                    f"{missing_icons} missing icons")
+    return True
+
+def detect_operation_mode(directory=None, cache_dir=None, sample=None):
+    """Auto-detect if a directory (default: the current one) is a library or single anime folder.
+
+    Decisions are cached in cache_dir, keyed by the directory's mtime, which
+    changes whenever an entry is added, removed or renamed, so an unchanged
+    library root is not listed again.
+    """
+    directory = Path(directory or Path.cwd())
+    try:
+        mtime_ns = os.stat(directory).st_mtime_ns
+    except OSError:
+        return classify_directory(directory, sample)
 
+    cache_file = Path(cache_dir or DEFAULT_CONFIG['manifest_dir']) / MODE_CACHE_FILE
+    key = str(directory.resolve())
+    stamp = [mtime_ns, sample or 0, MODE_RULES_VERSION]
+    try:
+        with open(cache_file, 'r', encoding='utf-8') as f:
+            cache = json.load(f)
+        cached = cache.get(key)
+    except (OSError, ValueError, AttributeError):
+        cache, cached = {}, None
+    if isinstance(cached, dict) and cached.get('stamp') == stamp:
+        return cached['mode']
+
+    mode = classify_directory(directory, sample)
+    if time.time() - mtime_ns / 1e9 >= MODE_CACHE_MIN_AGE:
+        cache.pop(key, None)
+        cache[key] = {'stamp': stamp, 'mode': mode}
+        cache = dict(list(cache.items())[-MODE_CACHE_ENTRIES:])
+        try:
+            cache_file.parent.mkdir(parents=True, exist_ok=True)
+            tmp = cache_file.with_name(f"{cache_file.name}.{os.getpid()}.tmp")
+            tmp.write_text(json.dumps(cache), encoding='utf-8')
+            os.replace(tmp, cache_file)
+        except OSError:
+            pass
+    return mode
+
+@lru_cache(maxsize=65536)
 def looks_like_anime_folder(folder_name):
     """Check if folder name looks like an anime folder"""
     # Common anime naming patterns
@@ -667,7 +4231,7 @@ def looks_like_anime_folder(folder_name):
         return True
 
     # Check for season indicators
-    if re.search(r'season\s*\d+', folder_name, re.IGNORECASE):
+    if SEASON_RE.search(folder_name):
         return True
 
     # Check for common anime patterns
@@ -712,6 +4276,8 @@ Examples:
   anifold.py --single                           # Force single folder mode
   anifold.py --auto-select --no-wait           # Batch processing
   anifold.py --dry-run                         # Preview without changes
+  anifold.py -l "D:\\Anime" --plan plan.json     # Resolve names now (e.g. overnight)...
+  anifold.py --apply plan.json                  # ...and set the icons later
 
 💡 Tip: For paths with spaces, use quotes: --library "D:\\My Anime"
         """
@@ -739,7 +4305,14 @@ Examples:
     parser.add_argument(
         '--auto-select',
         action='store_true',
-        help='Automatically select first MAL result (for batch processing)'
+        help='Automatically select the best-ranked MAL result (for batch processing)'
+    )
+
+    parser.add_argument(
+        '--min-confidence',
+        type=float,
+        default=DEFAULT_CONFIG['min_confidence'],
+        help=f'Lowest match confidence (0-1) --auto-select accepts, from the best score and its lead over the runner-up; below it the folder guess is kept (default: {DEFAULT_CONFIG["min_confidence"]})'
     )
 
     parser.add_argument(
@@ -748,6 +4321,56 @@ Examples:
         help='Skip ENTER prompts and continue immediately'
     )
 
+    parser.add_argument(
+        '--watch',
+        action='store_true',
+        help='Continue automatically once a new icon is downloaded instead of waiting for ENTER'
+    )
+
+    parser.add_argument(
+        '--watch-timeout',
+        type=float,
+        default=DEFAULT_CONFIG['watch_timeout'],
+        help=f'Seconds to wait for an icon in --watch mode (default: {DEFAULT_CONFIG["watch_timeout"]})'
+    )
+
+    parser.add_argument(
+        '--convert-workers',
+        type=int,
+        default=DEFAULT_CONFIG['convert_workers'],
+        help=f'Processes converting downloaded PNG/JPG images to .ico (default: {DEFAULT_CONFIG["convert_workers"]})'
+    )
+
+    parser.add_argument(
+        '--icon-provider',
+        choices=['browser'] + sorted(ICON_PROVIDERS),
+        default='browser',
+        help='Where icons come from: browser opens DeviantArt for you to download one; deviantart and local '
+             'fetch them without a browser (default: browser)'
+    )
+
+    parser.add_argument(
+        '--icon-source',
+        type=str,
+        metavar='SOURCE',
+        help='Directory or URL of a JSON icon index searched by --icon-provider local'
+    )
+
+    parser.add_argument(
+        '--download-workers',
+        type=int,
+        default=DEFAULT_CONFIG['download_workers'],
+        help=f'Concurrent icon searches/downloads of a headless --icon-provider '
+             f'(default: {DEFAULT_CONFIG["download_workers"]}, at most {DEFAULT_CONFIG["download_per_host"]} requests/s per host)'
+    )
+
+    parser.add_argument(
+        '--attr-backend',
+        choices=['auto'] + list(ATTRIBUTE_BACKENDS),
+        default=DEFAULT_CONFIG['attr_backend'],
+        help=f'How desktop.ini attributes are set; xattr writes Samba\'s user.DOSATTRIB on Linux shares (default: {DEFAULT_CONFIG["attr_backend"]})'
+    )
+
     parser.add_argument(
         '--log',
         type=str,
@@ -764,7 +4387,7 @@ Examples:
         '--cache-file',
         type=str,
         default=DEFAULT_CONFIG['cache_file'],
-        help=f'MAL cache file (default: {DEFAULT_CONFIG["cache_file"]})'
+        help=f'MAL cache database (default: {DEFAULT_CONFIG["cache_file"]})'
     )
 
     parser.add_argument(
@@ -788,8 +4411,165 @@ Examples:
         help=f'Base retry delay in seconds (default: {DEFAULT_CONFIG["retry_delay"]})'
     )
 
+    parser.add_argument(
+        '--depth',
+        type=int,
+        default=DEFAULT_CONFIG['scan_depth'],
+        help=f'How many folder levels to search in library mode, e.g. 2 for Anime/<Genre>/<Show> (default: {DEFAULT_CONFIG["scan_depth"]})'
+    )
+
+    parser.add_argument(
+        '--scan-workers',
+        type=int,
+        default=DEFAULT_CONFIG['scan_workers'],
+        help=f'Directories listed in parallel during library discovery (default: {DEFAULT_CONFIG["scan_workers"]})'
+    )
+
+    parser.add_argument(
+        '--detect-sample',
+        type=int,
+        metavar='N',
+        help='Auto-detect library vs single folder from the first N entries only (default: all, exact)'
+    )
+
+    parser.add_argument(
+        '--rescan',
+        action='store_true',
+        help='Process every library folder again, ignoring the scan manifest'
+    )
+
+    parser.add_argument(
+        '--manifest-dir',
+        type=str,
+        default=DEFAULT_CONFIG['manifest_dir'],
+        help=f'Where library scan manifests are kept (default: {DEFAULT_CONFIG["manifest_dir"]})'
+    )
+
+    parser.add_argument(
+        '--workers',
+        type=int,
+        default=DEFAULT_CONFIG['lookup_workers'],
+        help=f'Concurrent MAL lookups in library mode (default: {DEFAULT_CONFIG["lookup_workers"]})'
+    )
+
+    parser.add_argument(
+        '--metrics-file',
+        type=str,
+        metavar='FILE',
+        help='Write per-stage timings and counters of the run to FILE: JSON, or a Prometheus textfile if it ends in .prom'
+    )
+
+    parser.add_argument(
+        '--profile',
+        nargs='?',
+        const='anifold.prof',
+        metavar='FILE',
+        help='Run under cProfile and save the stats to FILE (default: anifold.prof)'
+    )
+
+    parser.add_argument(
+        '--plan',
+        type=str,
+        metavar='PLAN_FILE',
+        help='Resolve the library\'s MAL names into a reviewable .json/.csv plan without setting icons, then exit'
+    )
+
+    parser.add_argument(
+        '--apply',
+        type=str,
+        metavar='PLAN_FILE',
+        help='Set the icons of a reviewed plan file in one pass, then exit'
+    )
+
+    parser.add_argument(
+        '--repair',
+        nargs='?',
+        const=os.curdir,
+        metavar='LIBRARY',
+        help='Rewrite the desktop.ini files of LIBRARY (default: current folder) from its catalog, '
+             'offline and without prompts, then exit'
+    )
+
+    parser.add_argument(
+        '--import-titles',
+        type=str,
+        metavar='DUMP_FILE',
+        help='Build the offline title index from a JSON/CSV anime title dump and exit'
+    )
+
+    parser.add_argument(
+        '--title-index',
+        type=str,
+        default=DEFAULT_CONFIG['title_index'],
+        help=f'Offline title index used before Jikan (default: {DEFAULT_CONFIG["title_index"]})'
+    )
+
+    parser.add_argument(
+        '--index-min-confidence',
+        type=float,
+        default=DEFAULT_CONFIG['index_min_confidence'],
+        help=f'Minimum title index match (0-1) used without asking Jikan (default: {DEFAULT_CONFIG["index_min_confidence"]})'
+    )
+
+    parser.add_argument(
+        '--connect-timeout',
+        type=float,
+        default=DEFAULT_CONFIG['connect_timeout'],
+        help=f'Seconds to wait for a Jikan connection (default: {DEFAULT_CONFIG["connect_timeout"]})'
+    )
+
+    parser.add_argument(
+        '--read-timeout',
+        type=float,
+        default=DEFAULT_CONFIG['read_timeout'],
+        help=f'Seconds to wait for a Jikan response (default: {DEFAULT_CONFIG["read_timeout"]})'
+    )
+
+    parser.add_argument(
+        '--jikan-url',
+        type=str,
+        default=DEFAULT_CONFIG['jikan_url'],
+        help=f'Jikan API base URL (default: {DEFAULT_CONFIG["jikan_url"]})'
+    )
+
     return parser.parse_args()
 
+def run_mode(args, logger=None):
+    """Process the library, the current folder or whatever the current folder looks like"""
+    if args.library:
+        # Explicit library mode
+        print(f"{Colors.BLUE}🔧 Library mode: Processing {args.library}{Colors.RESET}")
+        scan_library(args.library, args, logger)
+    elif args.single:
+        # Explicit single folder mode
+        print(f"{Colors.BLUE}🔧 Single folder mode: Processing current directory{Colors.RESET}")
+        current_dir = Path.cwd()
+        process_single_folder(current_dir, args, logger)
+    else:
+        # Auto-detection mode
+        print(f"{Colors.CYAN}🔮 Auto-detecting folder type...{Colors.RESET}")
+        detected_mode = detect_operation_mode(cache_dir=args.manifest_dir, sample=args.detect_sample)
+
+        if detected_mode == 'library':
+            print(f"{Colors.GREEN}📚 Detected library folder! Processing all subdirectories...{Colors.RESET}")
+            current_dir = Path.cwd()
+            scan_library(current_dir, args, logger)
+        else:
+            print(f"{Colors.GREEN}🎬 Detected single anime folder! Processing current directory...{Colors.RESET}")
+            current_dir = Path.cwd()
+            process_single_folder(current_dir, args, logger)
+
+def run_command(args, func, *func_args):
+    """Run func under the profiler if --profile is set, then write --metrics-file"""
+    try:
+        if args.profile:
+            return run_profiled(args.profile, func, *func_args)
+        return func(*func_args)
+    finally:
+        if args.metrics_file:
+            metrics.write(args.metrics_file)
+            print(f"{Colors.CYAN}📈 Metrics written to {args.metrics_file}{Colors.RESET}")
+
 def main():
     """Main application entry point"""
     show_banner()
@@ -816,29 +4596,48 @@ def main():
     # Setup logging
     logger = setup_logging(args.log)
 
+    configure_jikan(
+        args.jikan_url,
+        connect_timeout=args.connect_timeout,
+        read_timeout=args.read_timeout,
+        pool_size=args.workers
+    )
+
     try:
-        if args.library:
-            # Explicit library mode
-            print(f"{Colors.BLUE}🔧 Library mode: Processing {args.library}{Colors.RESET}")
-            scan_library(args.library, args, logger)
-        elif args.single:
-            # Explicit single folder mode
-            print(f"{Colors.BLUE}🔧 Single folder mode: Processing current directory{Colors.RESET}")
-            current_dir = Path.cwd()
-            process_anime_folder(current_dir, args, logger)
-        else:
-            # Auto-detection mode
-            print(f"{Colors.CYAN}🔮 Auto-detecting folder type...{Colors.RESET}")
-            detected_mode = detect_operation_mode()
-
-            if detected_mode == 'library':
-                print(f"{Colors.GREEN}📚 Detected library folder! Processing all subdirectories...{Colors.RESET}")
-                current_dir = Path.cwd()
-                scan_library(current_dir, args, logger)
+        provider = get_icon_provider(args.icon_provider, args.icon_source)
+    except ValueError as e:
+        print(f"{Colors.RED}❌ {e}{Colors.RESET}")
+        return
+    configure_icon_fetcher(
+        provider,
+        args.download_workers,
+        connect_timeout=args.connect_timeout,
+        read_timeout=args.read_timeout,
+        max_retries=args.max_retries,
+        retry_delay=args.retry_delay
+    )
+
+    if args.import_titles:
+        try:
+            import_title_dump(args.import_titles, args.title_index)
+        except Exception as e:
+            print(f"{Colors.RED}❌ Title import failed: {e}{Colors.RESET}")
+        return
+
+    if args.plan or args.apply or args.repair:
+        try:
+            if args.plan:
+                run_command(args, build_plan, args.library or Path.cwd(), args.plan, args, logger)
+            elif args.apply:
+                run_command(args, apply_plan, args.apply, args, logger)
             else:
-                print(f"{Colors.GREEN}🎬 Detected single anime folder! Processing current directory...{Colors.RESET}")
-                current_dir = Path.cwd()
-                process_anime_folder(current_dir, args, logger)
+                run_command(args, repair_library, args.repair, args, logger)
+        except KeyboardInterrupt:
+            print(f"\n\n{Colors.YELLOW}👋 Sayonara!{Colors.RESET}")
+        return
+
+    try:
+        run_command(args, run_mode, args, logger)
     except KeyboardInterrupt:
         print(f"\n\n{Colors.YELLOW}👋 Sayonara!{Colors.RESET}")
         if logger:
@@ -863,6 +4662,10 @@ def main():
         print(f"\n{Colors.YELLOW}🔄 Dry run completed automatically{Colors.RESET}")
 
 if __name__ == "__main__":
+    if getattr(sys, 'frozen', False):
+        # Image conversion workers are started from the frozen .exe itself
+        import multiprocessing
+        multiprocessing.freeze_support()
     try:
         main()
     except KeyboardInterrupt:
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Benchmark the desktop.ini apply stage on a synthetic library.
+
+Compares the old per-folder approach (delete + rewrite desktop.ini and
+three attrib shell-outs, emulated here with `true` off Windows) against
+FolderIconApplier, first on fresh folders and then re-applying the same
+icons, where the applier skips every write.
+
+Usage:
+    python benchmarks/bench_apply.py --folders 2000 --backend xattr
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import anifold  # noqa: E402
+
+
+def legacy_apply(folder, icon_path):
+    """What apply_folder_icon used to do for one folder"""
+    desktop_ini = os.path.join(folder, 'desktop.ini')
+    attrib = 'attrib' if os.name == 'nt' else 'true'
+    quiet = '>nul 2>&1' if os.name == 'nt' else '>/dev/null 2>&1'
+    if os.path.exists(desktop_ini):
+        os.system(f'{attrib} -h -s -r "{desktop_ini}" {quiet}')
+        os.unlink(desktop_ini)
+    with open(desktop_ini, 'wb') as f:
+        f.write(anifold.desktop_ini_bytes(icon_path))
+    os.system(f'{attrib} +h +s "{desktop_ini}" {quiet}')
+    os.system(f'{attrib} +r "{folder}" {quiet}')
+
+
+def make_folders(root, count):
+    os.mkdir(root)
+    folders = []
+    for i in range(count):
+        path = os.path.join(root, f"Show {i:05d}")
+        os.mkdir(path)
+        folders.append(path)
+    return folders
+
+
+def timed(label, folders, apply, finish=None):
+    start = time.perf_counter()
+    for folder in folders:
+        apply(folder)
+    if finish:
+        finish()
+    elapsed = time.perf_counter() - start
+    print(f"  {label:<24} {elapsed:7.2f}s ({len(folders) / elapsed:,.0f} folders/s)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--folders', type=int, default=1000)
+    parser.add_argument('--backend', default='auto', choices=['auto'] + list(anifold.ATTRIBUTE_BACKENDS))
+    opts = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        icon = os.path.join(tmp, 'icon.ico')
+        with open(icon, 'wb') as f:
+            f.write(b'\0' * 64)
+        legacy = make_folders(os.path.join(tmp, 'legacy'), opts.folders)
+        staged = make_folders(os.path.join(tmp, 'staged'), opts.folders)
+
+        backend = anifold.get_attribute_backend(opts.backend)
+        print(f"{opts.folders} folders, attribute backend: {backend.name}")
+        for run in ('first apply', 're-apply'):
+            print(f"[{run}]")
+            timed('per-folder shell-outs', legacy, lambda folder: legacy_apply(folder, icon))
+            applier = anifold.FolderIconApplier(backend)
+            timed('batched apply stage', staged, lambda folder: applier.apply(folder, icon), applier.close)
+            print(f"  {'':<24} wrote {applier.written}, skipped {applier.unchanged} unchanged, "
+                  f"{applier.attribute_failures} attribute failures")
+
+
+if __name__ == '__main__':
+    main()
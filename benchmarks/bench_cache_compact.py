@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+Benchmark compacting a MAL cache written with full Jikan objects.
+
+Writes a cache the way older versions did (every result stored verbatim,
+with synopsis, images, trailer, broadcast, producers, ...), then compares
+file size, the time to read every entry back and the memory the results
+take, before and after MalCache compacts it to AnimeRecord rows.
+
+Usage:
+    python benchmarks/bench_cache_compact.py --entries 2000 --results 10
+"""
+
+import argparse
+import json
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import anifold  # noqa: E402
+
+WORDS = ('the hero journey city world fight power secret school team dream future memory friend '
+         'battle king demon sword magic ocean star night summer spirit').split()
+
+
+def sentence(rng, words):
+    return ' '.join(rng.choice(WORDS) for _ in range(words)).capitalize() + '.'
+
+
+def jikan_anime(rng, mal_id, title):
+    """A Jikan v4 /anime search result with every field it comes with"""
+    image = f"https://cdn.myanimelist.net/images/anime/{mal_id % 13}/{mal_id}"
+    year = rng.randint(1990, 2023)
+    people = [{'mal_id': rng.randint(1, 2000), 'type': 'anime', 'name': sentence(rng, 2)[:-1],
+               'url': f"https://myanimelist.net/anime/producer/{rng.randint(1, 2000)}"} for _ in range(3)]
+    return {
+        'mal_id': mal_id,
+        'url': f"https://myanimelist.net/anime/{mal_id}/{title.replace(' ', '_')}",
+        'images': {fmt: {'image_url': f"{image}.{fmt}", 'small_image_url': f"{image}t.{fmt}",
+                         'large_image_url': f"{image}l.{fmt}"} for fmt in ('jpg', 'webp')},
+        'trailer': {'youtube_id': f"{mal_id:011d}", 'url': f"https://www.youtube.com/watch?v={mal_id:011d}",
+                    'embed_url': f"https://www.youtube.com/embed/{mal_id:011d}?enablejsapi=1&wmode=opaque",
+                    'images': {size: f"https://img.youtube.com/vi/{mal_id:011d}/{size}.jpg"
+                               for size in ('default', 'sddefault', 'hqdefault', 'mqdefault', 'maxresdefault')}},
+        'approved': True,
+        'titles': [{'type': kind, 'title': title} for kind in ('Default', 'Synonym', 'Japanese', 'English')],
+        'title': title,
+        'title_english': title,
+        'title_japanese': 'アニメ' * 3,
+        'title_synonyms': [f"{title} TV"],
+        'type': 'TV',
+        'source': 'Manga',
+        'episodes': rng.choice([12, 13, 24, 25, 26]),
+        'status': 'Finished Airing',
+        'airing': False,
+        'aired': {'from': f"{year}-04-05T00:00:00+00:00", 'to': f"{year}-09-20T00:00:00+00:00",
+                  'prop': {'from': {'day': 5, 'month': 4, 'year': year}, 'to': {'day': 20, 'month': 9, 'year': year}},
+                  'string': f"Apr 5, {year} to Sep 20, {year}"},
+        'duration': '24 min per ep',
+        'rating': 'PG-13 - Teens 13 or older',
+        'score': round(rng.uniform(5, 9), 2),
+        'scored_by': rng.randint(1000, 2000000),
+        'rank': rng.randint(1, 15000),
+        'popularity': rng.randint(1, 15000),
+        'members': rng.randint(1000, 3000000),
+        'favorites': rng.randint(0, 200000),
+        'synopsis': ' '.join(sentence(rng, 14) for _ in range(10)) + '\n\n[Written by MAL Rewrite]',
+        'background': ' '.join(sentence(rng, 12) for _ in range(3)),
+        'season': 'spring',
+        'year': year,
+        'broadcast': {'day': 'Sundays', 'time': '01:05', 'timezone': 'Asia/Tokyo', 'string': 'Sundays at 01:05 (JST)'},
+        'producers': people,
+        'licensors': people[:1],
+        'studios': people[1:2],
+        'genres': people,
+        'explicit_genres': [],
+        'themes': people[:2],
+        'demographics': people[:1]
+    }
+
+
+def write_legacy_cache(db_path, entries, per_entry, seed):
+    """A cache as older versions wrote it: results are full Jikan objects"""
+    rng = random.Random(seed)
+    conn = sqlite3.connect(db_path, isolation_level=None)
+    conn.execute('PRAGMA journal_mode=WAL')
+    conn.executescript(anifold.MalCache.SCHEMA)
+    now = time.time()
+    conn.execute('BEGIN')
+    for i in range(entries):
+        query = f"anime title {i}"
+        results = [jikan_anime(rng, i * 100 + n, f"Anime Title {i} {n}".strip()) for n in range(per_entry)]
+        conn.execute('INSERT INTO mal_cache (key, query, results, created_at, expires_at) VALUES (?, ?, ?, ?, ?)',
+                     (anifold.get_mal_cache_key(query), query, json.dumps(results, ensure_ascii=False), now, now + 86400))
+    conn.execute('COMMIT')
+    conn.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+    conn.close()
+
+
+def read_all(load):
+    """Time reading every entry with load(key), then measure what the results hold on to"""
+    keys = [anifold.get_mal_cache_key(f"anime title {i}") for i in range(read_all.entries)]
+    start = time.perf_counter()
+    assert all(load(key) for key in keys)
+    elapsed = time.perf_counter() - start
+    # Tracing slows everything down, so memory is measured in a second pass
+    tracemalloc.start()
+    kept = [load(key) for key in keys]
+    held = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del kept
+    return elapsed, held
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--entries', type=int, default=2000, help='Cached queries')
+    parser.add_argument('--results', type=int, default=10, help='Anime kept per query')
+    parser.add_argument('--seed', type=int, default=42)
+    opts = parser.parse_args()
+    read_all.entries = opts.entries
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, 'cache.db')
+        write_legacy_cache(db_path, opts.entries, opts.results, opts.seed)
+        size_before = os.path.getsize(db_path)
+
+        # What a lookup used to do: read the row and decode the full objects
+        conn = sqlite3.connect(db_path)
+        old_time, old_memory = read_all(
+            lambda key: json.loads(conn.execute('SELECT results FROM mal_cache WHERE key = ?', (key,)).fetchone()[0])
+        )
+        conn.close()
+
+        start = time.perf_counter()
+        cache = anifold.MalCache(db_path, 24, memory_entries=0)
+        migrate_time = time.perf_counter() - start
+        size_after = os.path.getsize(db_path)
+        new_time, new_memory = read_all(lambda key: cache.lookup(key).results)
+
+        print(f"{opts.entries} cached queries x {opts.results} anime, compacted in {migrate_time:.2f}s "
+              f"({cache.compacted[0]} rows rewritten)")
+        print(f"  {'':<16}{'file':>10}{'read all':>12}{'results in memory':>20}")
+        print(f"  {'full objects':<16}{size_before / 1e6:>8.1f}MB{old_time * 1000:>10.0f}ms{old_memory / 1e6:>18.1f}MB")
+        print(f"  {'AnimeRecords':<16}{size_after / 1e6:>8.1f}MB{new_time * 1000:>10.0f}ms{new_memory / 1e6:>18.1f}MB")
+        print(f"  {'reduction':<16}{size_before / size_after:>9.1f}x{old_time / new_time:>11.1f}x"
+              f"{old_memory / new_memory:>19.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Benchmark clean_anime_name over a large corpus of synthetic fansub/scene
+release names, and check its output against the original implementation.
+
+Usage:
+    python benchmarks/bench_clean_names.py --names 100000
+"""
+
+import argparse
+import os
+import random
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import anifold  # noqa: E402
+
+TITLES = [
+    "Goblin Slayer", "Attack on Titan", "Shingeki no Kyojin", "Naruto Shippuden",
+    "One Piece", "Fullmetal Alchemist Brotherhood", "Steins;Gate", "Re:Zero kara Hajimeru Isekai Seikatsu",
+    "Kimetsu no Yaiba", "Jujutsu Kaisen", "Mob Psycho 100", "Hunter x Hunter",
+    "Cowboy Bebop", "Code Geass", "Sousou no Frieren", "Boku no Hero Academia",
+    "Spy x Family", "Vinland Saga", "Made in Abyss", "Chainsaw Man", "Bocchi the Rock!",
+    "Oshi no Ko", "Kaguya-sama wa Kokurasetai", "Yakusoku no Neverland", "Dr. Stone",
+]
+GROUPS = ["SubsPlease", "Erai-raws", "HorribleSubs", "Judas", "YURASUKA", "Coalgirls", "EMBER", "ASW"]
+TAGS = ["1080p", "720p", "2160p", "BluRay", "WEB", "x265", "x264", "HEVC", "10bit", "AAC",
+        "FLAC", "Dual Audio", "Multi-Subs", "REMUX", "Hi10p", "DTS", "ENG", "JPN"]
+SEPARATORS = [".", " ", "_", "-"]
+
+
+def original_clean_anime_name(folder_name, max_words=5):
+    """The uncompiled implementation clean_anime_name must stay identical to"""
+    folder_name = re.sub(r'\[.*?\]|\(.*?\)', '', folder_name)
+    folder_name = re.sub(r'\.[a-zA-Z0-9]{2,4}$', '', folder_name)
+    parts = re.split(r'[._\-\s]+', folder_name)
+    clean = [
+        part for part in parts
+        if part and not part.isdigit() and part.lower() not in anifold.COMMON_INDICATORS
+        and not re.match(r'^(19|20)\d{2}$', part) and not part.startswith('-')
+    ]
+    if clean:
+        return ' '.join(clean[:max_words]).title().strip()
+    return os.path.basename(folder_name)
+
+
+def synthetic_name(rng):
+    """Build one fansub- or scene-style release name"""
+    title = rng.choice(TITLES)
+    tags = rng.sample(TAGS, rng.randint(0, 4))
+    season = rng.choice(["", f"S{rng.randint(1, 5):02d}", f"Season {rng.randint(1, 5)}", str(rng.randint(1, 3))])
+    year = str(rng.randint(1980, 2025)) if rng.random() < 0.4 else ""
+
+    if rng.random() < 0.5:
+        # Fansub style: [Group] Title - S01 (2019) [1080p][HEVC]
+        name = f"[{rng.choice(GROUPS)}] {title}"
+        if season:
+            name += f" - {season}"
+        if year:
+            name += f" ({year})"
+        name += "".join(f"[{tag}]" for tag in tags)
+    else:
+        # Scene style: Title.S01.2019.1080p.BluRay.x265-GROUP
+        sep = rng.choice(SEPARATORS)
+        words = title.split() + [season, year] + tags
+        name = sep.join(w.replace(" ", sep) for w in words if w)
+        name += f"-{rng.choice(GROUPS)}"
+    if rng.random() < 0.05:
+        name += rng.choice([".mkv", ".mp4", ".txt"])
+    return name
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--names', type=int, default=100000)
+    parser.add_argument('--seed', type=int, default=42)
+    opts = parser.parse_args()
+
+    rng = random.Random(opts.seed)
+    names = [synthetic_name(rng) for _ in range(opts.names)]
+    unique = len(set(names))
+
+    start = time.perf_counter()
+    expected = [original_clean_anime_name(n) for n in names]
+    original = time.perf_counter() - start
+
+    # Cold: uncached engine, every name cleaned once
+    clean = anifold.clean_anime_name.__wrapped__
+    start = time.perf_counter()
+    actual = [clean(n) for n in names]
+    cold = time.perf_counter() - start
+
+    # Memoized: as used by looks_like_anime_folder/process_anime_folder
+    anifold.clean_anime_name.cache_clear()
+    start = time.perf_counter()
+    for n in names:
+        anifold.clean_anime_name(n)
+    memo = time.perf_counter() - start
+
+    mismatches = [(n, e, a) for n, e, a in zip(names, expected, actual) if e != a]
+
+    print(f"names:       {opts.names} ({unique} unique)")
+    print(f"original:    {original:.3f}s  ({opts.names / original:,.0f} names/s)")
+    print(f"compiled:    {cold:.3f}s  ({opts.names / cold:,.0f} names/s)")
+    print(f"memoized:    {memo:.3f}s  ({opts.names / memo:,.0f} names/s)")
+    print(f"mismatches:  {len(mismatches)}")
+    for name, exp, act in mismatches[:10]:
+        print(f"  {name!r}: expected {exp!r}, got {act!r}")
+    return 1 if mismatches else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
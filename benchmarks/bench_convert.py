@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Benchmark image-to-ICO conversion through the icon store.
+
+Generates PNG "downloads" (a share of them byte-identical duplicates under
+other names) and converts them with IconStore.convert_many: serially, in a
+process pool, and again with a warm conversion cache. Every converted icon
+is checked with validate_ico_file.
+
+Multi-size ICOs are built with Pillow when it is installed; without it
+PNGs are wrapped in a single-frame ICO, which is cheap enough that the
+pool mostly shows its startup cost.
+
+Usage:
+    python benchmarks/bench_convert.py --images 200 --size 512 --workers 8
+"""
+
+import argparse
+import os
+import random
+import struct
+import sys
+import tempfile
+import time
+import zlib
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import anifold  # noqa: E402
+
+
+def png_bytes(size, seed):
+    """An RGBA PNG of size x size pixels with seeded, poorly compressible content"""
+    rng = random.Random(seed)
+    row = bytes(rng.getrandbits(8) for _ in range(size * 4))
+    # Each scanline is the first one rotated, so zlib can't just repeat it
+    raw = b''.join(b'\0' + row[y * 4:] + row[:y * 4] for y in range(size))
+
+    def chunk(kind, data):
+        return struct.pack('>I', len(data)) + kind + data + struct.pack('>I', zlib.crc32(kind + data))
+
+    header = struct.pack('>IIBBBBB', size, size, 8, 6, 0, 0, 0)
+    return anifold.PNG_SIGNATURE + chunk(b'IHDR', header) + chunk(b'IDAT', zlib.compress(raw, 6)) + chunk(b'IEND', b'')
+
+
+def make_images(root, count, size, duplicates, seed):
+    rng = random.Random(seed)
+    paths = []
+    unique = []
+    for i in range(count):
+        path = os.path.join(root, f"download_{i:05d}.png")
+        if unique and rng.random() < duplicates:
+            data = rng.choice(unique)
+        else:
+            data = png_bytes(size, seed * 100003 + i)
+            unique.append(data)
+        with open(path, 'wb') as f:
+            f.write(data)
+        paths.append(path)
+    return paths, len(unique)
+
+
+def run(label, store_root, paths, workers):
+    store = anifold.IconStore(store_root, workers)
+    anifold.metrics.reset()
+    start = time.perf_counter()
+    results = store.convert_many(paths)
+    elapsed = time.perf_counter() - start
+    valid = sum(1 for path in results.values() if path and anifold.validate_ico_file(path))
+    counters = anifold.metrics.counters
+    print(f"  {label:<22} {elapsed:7.3f}s  {len(paths) / elapsed:8.1f} images/s  "
+          f"converted {counters.get('icons_converted', 0)}, cache hits {counters.get('conversion_cache_hits', 0)}, "
+          f"valid {valid}/{len(paths)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--images', type=int, default=200)
+    parser.add_argument('--size', type=int, default=512, help='Width/height of the generated PNGs')
+    parser.add_argument('--duplicates', type=float, default=0.2, help='Share of images that repeat an earlier one')
+    parser.add_argument('--workers', type=int, default=anifold.DEFAULT_CONFIG['convert_workers'])
+    parser.add_argument('--seed', type=int, default=42)
+    opts = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        paths, unique = make_images(tmp, opts.images, opts.size, opts.duplicates, opts.seed)
+        converter = 'Pillow, multi-size' if anifold.import_pillow() else 'no Pillow, PNG wrapped as is'
+        print(f"{opts.images} images ({unique} unique), {opts.size}px, {converter}")
+        run('serial (cold cache)', os.path.join(tmp, 'serial'), paths, 1)
+        run(f'{opts.workers} processes (cold)', os.path.join(tmp, 'pool'), paths, opts.workers)
+        run('warm cache', os.path.join(tmp, 'pool'), paths, opts.workers)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Benchmark library/single auto-detection on a large directory.
+
+Compares the old detect_operation_mode (full listing, a stat per entry,
+looks_like_anime_folder on every subfolder) with classify_directory's
+streaming early exit, and with a cached decision. First checks on a few
+hundred random directories that both give exactly the same answers.
+
+Usage:
+    python benchmarks/bench_detect_mode.py --entries 20000 --check 300
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import anifold  # noqa: E402
+from bench_clean_names import synthetic_name  # noqa: E402
+
+PLAIN_NAMES = ['Extras', 'Music', 'Scans', 'Fonts', 'Subs', 'Artbooks', 'Misc']
+
+
+def legacy_detect(directory):
+    """What detect_operation_mode used to do, for a given directory"""
+    subdirs = []
+    video_files = []
+    try:
+        for item in Path(directory).iterdir():
+            if item.is_dir():
+                subdirs.append(item)
+            elif item.suffix.lower() in anifold.VIDEO_EXTENSIONS:
+                video_files.append(item)
+    except PermissionError:
+        return 'single'
+    anime_like_subdirs = [d for d in subdirs if anifold.looks_like_anime_folder(d.name)]
+    if len(anime_like_subdirs) >= 3 and len(video_files) <= 2:
+        return 'library'
+    elif len(subdirs) >= 3 and len(video_files) == 0:
+        return 'library'
+    return 'single'
+
+
+def folder_name(rng):
+    name = synthetic_name(rng) if rng.random() < 0.6 else f"{rng.choice(PLAIN_NAMES)} {rng.randrange(100)}"
+    for char in '<>:"/\\|?*':
+        name = name.replace(char, '')
+    return name.strip(' .') or 'folder'
+
+
+def populate(directory, rng, dirs, videos, others):
+    os.mkdir(directory)
+    names = set()
+    while len(names) < dirs:
+        names.add(folder_name(rng))
+    for name in names:
+        os.mkdir(os.path.join(directory, name))
+    for i in range(videos):
+        open(os.path.join(directory, f"episode {i:05d}.mkv"), 'w').close()
+    for i in range(others):
+        open(os.path.join(directory, f"file {i:05d}.{rng.choice(['srt', 'nfo', 'jpg', 'txt'])}"), 'w').close()
+
+
+def check(root, count, rng):
+    mismatches = 0
+    for i in range(count):
+        directory = os.path.join(root, f"check{i}")
+        populate(directory, rng, rng.randrange(8), rng.choice([0, 0, 1, 2, 3, 5]), rng.randrange(4))
+        anifold.looks_like_anime_folder.cache_clear()
+        anifold.clean_anime_name.cache_clear()
+        if legacy_detect(directory) != anifold.classify_directory(directory):
+            mismatches += 1
+    print(f"equivalence: {count - mismatches}/{count} random directories decided the same")
+    return mismatches
+
+
+def timed(label, func, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        anifold.looks_like_anime_folder.cache_clear()
+        anifold.clean_anime_name.cache_clear()
+        start = time.perf_counter()
+        mode = func()
+        best = min(best, time.perf_counter() - start)
+    print(f"  {label:<34} {best * 1000:9.2f} ms  -> {mode}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--entries', type=int, default=20000, help='Entries in the large directory')
+    parser.add_argument('--videos', type=int, default=1, help='Video files among them (1-2 is the slowest case)')
+    parser.add_argument('--check', type=int, default=300, help='Random directories compared against the old rules')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=42)
+    opts = parser.parse_args()
+    rng = random.Random(opts.seed)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        mismatches = check(tmp, opts.check, rng)
+
+        library = os.path.join(tmp, 'library')
+        populate(library, rng, opts.entries - opts.videos, opts.videos, 0)
+        # Old enough for its decision to be cached
+        old = time.time() - 60
+        os.utime(library, (old, old))
+        cache_dir = os.path.join(tmp, 'cache')
+
+        print(f"{opts.entries} entries, {opts.videos} videos")
+        timed('old detect_operation_mode', lambda: legacy_detect(library), opts.repeat)
+        timed('classify_directory', lambda: anifold.classify_directory(library), opts.repeat)
+        timed('classify_directory (1000 sample)', lambda: anifold.classify_directory(library, 1000), opts.repeat)
+        anifold.detect_operation_mode(library, cache_dir)
+        timed('detect_operation_mode (cached)', lambda: anifold.detect_operation_mode(library, cache_dir), opts.repeat)
+
+    sys.exit(1 if mismatches else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Benchmark guessing a generically named folder's title from its episode files.
+
+Builds folders named like "New folder (3)" holding many synthetic episode
+files (plus a few stray videos), then compares voting over every file name
+with guess_anime_name's bounded sample and early exit. Reports the time per
+folder and how often each picks the right series.
+
+Usage:
+    python benchmarks/bench_episode_guess.py --folders 50 --episodes 2000
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import anifold  # noqa: E402
+
+SERIES = [
+    'Shingeki no Kyojin', 'Kimetsu no Yaiba', 'Sousou no Frieren', 'Jujutsu Kaisen',
+    'Spy x Family', 'Vinland Saga', 'Chainsaw Man', 'Mushoku Tensei', 'Bocchi the Rock',
+    'Kaguya-sama wa Kokurasetai', 'Steins Gate', 'Made in Abyss'
+]
+GROUPS = ['SubsPlease', 'Erai-raws', 'HorribleSubs', 'Judas']
+STRAYS = ['sample.mkv', 'NCOP.mkv', 'trailer.mp4', 'Creditless ED.mkv']
+
+
+def episode_name(rng, series, number, style):
+    if style == 0:
+        return f"[{rng.choice(GROUPS)}] {series} - {number:02d} (1080p) [{rng.getrandbits(32):08X}].mkv"
+    if style == 1:
+        return f"{series.replace(' ', '.')}.S01E{number:02d}.1080p.WEB.x264.mkv"
+    return f"{series} - {number:02d} - Episode {number}.mp4"
+
+
+def make_folders(root, count, episodes, rng):
+    folders = []
+    for i in range(count):
+        series = rng.choice(SERIES)
+        folder = os.path.join(root, f"New folder ({i})")
+        os.mkdir(folder)
+        # One naming style per folder, like a single release
+        style = rng.randrange(3)
+        names = [episode_name(rng, series, n, style) for n in range(1, episodes + 1)]
+        names += rng.sample(STRAYS, 2)
+        for name in names:
+            open(os.path.join(folder, name), 'w').close()
+        folders.append((folder, series))
+    return folders
+
+
+def full_vote(folder):
+    """Vote over every video file, no sampling or early exit"""
+    names = [entry.name for entry in os.scandir(folder)
+             if os.path.splitext(entry.name)[1].lower() in anifold.VIDEO_EXTENSIONS]
+    return anifold.vote_episode_title(names, quorum=len(names) + 1)
+
+
+def bounded_vote(folder):
+    return anifold.guess_anime_name(folder)[0]
+
+
+def run(label, func, folders):
+    anifold.clean_anime_name.cache_clear()
+    correct = 0
+    start = time.perf_counter()
+    for folder, series in folders:
+        guess = func(folder)
+        correct += bool(guess) and anifold.series_key(guess) == anifold.series_key(anifold.clean_anime_name(series))
+    elapsed = time.perf_counter() - start
+    print(f"  {label:<28} {elapsed / len(folders) * 1000:8.2f} ms/folder   correct {correct}/{len(folders)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--folders', type=int, default=50)
+    parser.add_argument('--episodes', type=int, default=2000, help='Episode files per folder')
+    parser.add_argument('--seed', type=int, default=42)
+    opts = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        folders = make_folders(tmp, opts.folders, opts.episodes, random.Random(opts.seed))
+        print(f"{opts.folders} generic folders x {opts.episodes} episodes "
+              f"(sample {anifold.DEFAULT_CONFIG['episode_sample']}, quorum {anifold.DEFAULT_CONFIG['episode_quorum']})")
+        run('vote over every file', full_vote, folders)
+        run('bounded sample, early exit', bounded_vote, folders)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Benchmark headless icon fetching against a local icon server.
+
+Serves an icon index where every title has a PNG named after it plus a
+broken "<title> icon 2.png" decoy, then fetches an icon for every title
+with IconFetcher through --icon-provider local: one download at a time,
+with a bounded pool, with the pool under a per-host rate limit, and with
+transfers that break off halfway and have to be resumed. Every fetched
+icon is checked with the icon store's validation.
+
+Usage:
+    python benchmarks/bench_icon_fetch.py --titles 100 --latency 0.05 --workers 8
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import anifold  # noqa: E402
+from bench_convert import png_bytes  # noqa: E402
+from fake_icons import FakeIconServer  # noqa: E402
+
+UNLIMITED = 10000
+
+
+def make_icons(titles, size):
+    icons = {}
+    for i in range(titles):
+        title = f"Anime Title {i:04d}"
+        icons[f"{title}.png"] = (title, png_bytes(size, i))
+        icons[f"{title} icon 2.png"] = (f"{title} icon 2", b'not an image ' * 100)
+    return icons
+
+
+def run(label, server, tmp, titles, workers, per_host, total_bytes):
+    server.reset_counters()
+    anifold.metrics.reset()
+    icon_index = anifold.IconIndex(tempfile.mkdtemp(dir=tmp))
+    icon_index.refresh()
+    fetcher = anifold.IconFetcher(anifold.LocalIconProvider(server.url), workers, per_host,
+                                  max_retries=5, retry_delay=0.01)
+    # Retries print a line each; keep the table readable
+    with contextlib.redirect_stdout(io.StringIO()):
+        start = time.perf_counter()
+        fetched = fetcher.fetch_many(titles, icon_index)
+        elapsed = time.perf_counter() - start
+    fetcher.close()
+
+    valid = sum(1 for path in fetched.values() if path and icon_index.store.validate(path))
+    counters = anifold.metrics.counters
+    print(f"  {label:<28} {elapsed:6.2f}s  {len(titles) / elapsed:7.1f} titles/s  valid {valid}/{len(titles)}  "
+          f"concurrent {server.max_active}, peak {server.peak_rate()} req/s, "
+          f"sent {server.bytes_sent / total_bytes:.2f}x, resumed {counters.get('downloads_resumed', 0)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--titles', type=int, default=100)
+    parser.add_argument('--size', type=int, default=128, help='Width/height of the served PNGs')
+    parser.add_argument('--latency', type=float, default=0.05, help='Server latency per request in seconds')
+    parser.add_argument('--workers', type=int, default=8)
+    parser.add_argument('--per-host', type=float, default=20, help='Requests/second allowed to the server')
+    parser.add_argument('--truncate-rate', type=float, default=0.3, help='Share of downloads broken off halfway')
+    opts = parser.parse_args()
+
+    icons = make_icons(opts.titles, opts.size)
+    titles = [title for title, data in icons.values() if not title.endswith('icon 2')]
+    total_bytes = sum(len(data) for _, data in icons.values())
+
+    with tempfile.TemporaryDirectory() as tmp, FakeIconServer(icons, latency=opts.latency) as server:
+        print(f"{opts.titles} titles, {len(icons)} files ({total_bytes / 1e6:.1f} MB), {opts.latency * 1000:.0f} ms latency")
+        run('1 worker', server, tmp, titles, 1, UNLIMITED, total_bytes)
+        run(f'{opts.workers} workers', server, tmp, titles, opts.workers, UNLIMITED, total_bytes)
+        run(f'{opts.workers} workers, {opts.per_host:g} req/s', server, tmp, titles, opts.workers, opts.per_host,
+            total_bytes)
+        server.truncate_rate = opts.truncate_rate
+        run(f'{opts.workers} workers, {opts.truncate_rate:.0%} cut off', server, tmp, titles, opts.workers,
+            UNLIMITED, total_bytes)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+"""
+End-to-end library benchmark: runs scan_library headless (--auto-select,
+--dry-run) over a synthetic library against a local fake Jikan server.
+
+Reports folders/sec, p50/p95 per-folder latency, HTTP call counts and the
+cache hit rate (overall and per tier: title index, memory, SQLite, network),
+for a cold-cache run followed by two warm-cache runs: one in the same
+process, answered from the in-memory tier, and one with the process's
+caches dropped first (like a new run), answered from SQLite.
+
+Usage:
+    python benchmarks/bench_library.py --folders 500 --latency 0.2 --workers 8
+    python benchmarks/bench_library.py --folders 200 --error-rate 0.05 --rate-limit-rate 0.05
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import anifold  # noqa: E402
+from bench_clean_names import synthetic_name  # noqa: E402
+from fake_jikan import FakeJikanServer  # noqa: E402
+
+PNG_FRAME = b'\x89PNG\r\n\x1a\n' + (13).to_bytes(4, 'big') + b'IHDR' + b'\0' * 17
+
+
+def make_ico_bytes():
+    """A minimal structurally valid .ico with one PNG frame"""
+    header = (0).to_bytes(2, 'little') + (1).to_bytes(2, 'little') + (1).to_bytes(2, 'little')
+    entry = bytes([16, 16, 0, 0]) + (1).to_bytes(2, 'little') + (32).to_bytes(2, 'little')
+    entry += len(PNG_FRAME).to_bytes(4, 'little') + (22).to_bytes(4, 'little')
+    return header + entry + PNG_FRAME
+
+
+def make_library(root, folders, seed):
+    """Create a library of anime-like folders with synthetic release names"""
+    rng = random.Random(seed)
+    names = set()
+    while len(names) < folders:
+        name = synthetic_name(rng)
+        for char in '<>:"/\\|?*':
+            name = name.replace(char, '')
+        name = name.strip(' .')
+        if anifold.looks_like_anime_folder(name):
+            names.add(name)
+    for name in names:
+        os.mkdir(os.path.join(root, name))
+    return sorted(names)
+
+
+def make_icon_dir(root, icons):
+    data = make_ico_bytes()
+    for i in range(icons):
+        with open(os.path.join(root, f"icon_{i:05d}.ico"), 'wb') as f:
+            f.write(data + i.to_bytes(4, 'little'))
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+class Instrumented:
+    """Wrap anifold functions to time folders and count lookups"""
+
+    def __init__(self):
+        self.folder_times = []
+        self.lookups = 0
+        self.fetches = 0
+        self.failed = 0
+        self.originals = {}
+
+    def _wrap(self, name, wrapper):
+        original = getattr(anifold, name)
+        self.originals[name] = original
+        setattr(anifold, name, wrapper(original))
+
+    def __enter__(self):
+        def time_folder(original):
+            def wrapped(*args, **kwargs):
+                start = time.perf_counter()
+                try:
+                    return original(*args, **kwargs)
+                finally:
+                    self.folder_times.append(time.perf_counter() - start)
+            return wrapped
+
+        def count(attr):
+            def wrapper(original):
+                def wrapped(*args, **kwargs):
+                    setattr(self, attr, getattr(self, attr) + 1)
+                    try:
+                        return original(*args, **kwargs)
+                    except anifold.JikanError:
+                        self.failed += attr == 'lookups'
+                        raise
+                return wrapped
+            return wrapper
+
+        self._wrap('process_anime_folder', time_folder)
+        self._wrap('search_mal_anime_cached', count('lookups'))
+        self._wrap('_fetch_and_cache', count('fetches'))
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        for name, original in self.originals.items():
+            setattr(anifold, name, original)
+        return False
+
+
+def run_scan(library, argv):
+    sys.argv = ['anifold.py', '--library', library] + argv
+    args = anifold.parse_arguments()
+    with Instrumented() as stats, contextlib.redirect_stdout(io.StringIO()):
+        start = time.perf_counter()
+        anifold.scan_library(args.library, args)
+        elapsed = time.perf_counter() - start
+    return elapsed, stats
+
+
+def report(label, elapsed, stats, server):
+    folders = len(stats.folder_times)
+    hits = stats.lookups - stats.fetches
+    hit_rate = hits / stats.lookups if stats.lookups else 0.0
+    print(f"[{label}]")
+    print(f"  folders:       {folders} in {elapsed:.2f}s ({folders / elapsed if elapsed else 0:.1f} folders/s)")
+    print(f"  per folder:    p50 {percentile(stats.folder_times, 50) * 1000:.1f}ms, "
+          f"p95 {percentile(stats.folder_times, 95) * 1000:.1f}ms")
+    print(f"  HTTP calls:    {server.calls} (304: {server.not_modified}, 429: {server.rate_limited}, "
+          f"5xx: {server.errors}, {server.bytes_sent / 1024:.1f} KiB)")
+    print(f"  cache:         {hits}/{stats.lookups} hits ({hit_rate:.0%}), {stats.failed} failed lookups")
+    tiers = anifold.metrics.summary()['lookup_tiers']
+    if tiers:
+        print("  answered by:   " + ', '.join(f"{tier} {row['hits']} ({row['rate']:.0%})" for tier, row in tiers.items()))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--folders', type=int, default=300)
+    parser.add_argument('--icons', type=int, default=1000, help='Existing icons in the icon directory')
+    parser.add_argument('--latency', type=float, default=0.2, help='Fake server latency per request (s)')
+    parser.add_argument('--jitter', type=float, default=0.05)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--rate-limit-rate', type=float, default=0.0)
+    parser.add_argument('--workers', type=int, default=anifold.DEFAULT_CONFIG['lookup_workers'])
+    parser.add_argument('--max-retries', type=int, default=0)
+    parser.add_argument('--per-second', type=int, default=1000, help='Client rate limit per second')
+    parser.add_argument('--per-minute', type=int, default=100000, help='Client rate limit per minute')
+    parser.add_argument('--seed', type=int, default=42)
+    opts = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        library = os.path.join(tmp, 'library')
+        icons = os.path.join(tmp, 'icons')
+        os.mkdir(library)
+        os.mkdir(icons)
+        make_library(library, opts.folders, opts.seed)
+        make_icon_dir(icons, opts.icons)
+
+        argv = [
+            '--auto-select', '--dry-run',
+            '--icon-dir', icons,
+            '--cache-file', os.path.join(tmp, 'cache.db'),
+            '--manifest-dir', os.path.join(tmp, 'manifests'),
+            '--workers', str(opts.workers),
+            '--max-retries', str(opts.max_retries),
+            '--retry-delay', '0',
+        ]
+
+        with FakeJikanServer(latency=opts.latency, jitter=opts.jitter, error_rate=opts.error_rate,
+                             rate_limit_rate=opts.rate_limit_rate, seed=opts.seed) as server:
+            anifold.configure_jikan(server.url, opts.per_second, opts.per_minute, pool_size=opts.workers)
+            argv += ['--jikan-url', server.url]
+
+            print(f"library: {opts.folders} folders, {opts.icons} icons, {opts.workers} workers, "
+                  f"latency {opts.latency}s (+{opts.jitter}s jitter)")
+            for label, fresh_process in (('cold cache', False), ('warm cache, memory tier', False),
+                                         ('warm cache, SQLite tier', True)):
+                if fresh_process:
+                    # Reopen the cache like a new run would, with an empty memory tier
+                    anifold._mal_caches.clear()
+                server.reset_counters()
+                elapsed, stats = run_scan(library, argv)
+                report(label, elapsed, stats, server)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Benchmark sequential vs concurrent MAL lookups against a local fake Jikan server.
+
+Usage:
+    python benchmarks/bench_lookup.py --queries 200 --latency 0.25 --workers 8
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import anifold  # noqa: E402
+from fake_jikan import FakeJikanServer  # noqa: E402
+
+
+def make_args(cache_file, workers):
+    return SimpleNamespace(
+        max_retries=0,
+        retry_delay=0,
+        cache_file=cache_file,
+        cache_ttl_hours=24,
+        workers=workers,
+        title_index=None,
+        index_min_confidence=anifold.DEFAULT_CONFIG['index_min_confidence'],
+    )
+
+
+def run_sequential(queries, args):
+    start = time.perf_counter()
+    for query in queries:
+        anifold.search_mal_anime_cached(query, args.cache_file, args.cache_ttl_hours)
+    return time.perf_counter() - start
+
+
+def run_concurrent(queries, args):
+    start = time.perf_counter()
+    with anifold.MalLookupEngine(args) as lookup:
+        for query in queries:
+            lookup.submit(query)
+        for query in queries:
+            lookup.results(query)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--queries', type=int, default=200)
+    parser.add_argument('--latency', type=float, default=0.25, help='Fake server latency per request (s)')
+    parser.add_argument('--workers', type=int, default=8)
+    parser.add_argument('--per-second', type=int, default=1000, help='Rate limit per second for the run')
+    parser.add_argument('--per-minute', type=int, default=100000, help='Rate limit per minute for the run')
+    opts = parser.parse_args()
+
+    with FakeJikanServer(latency=opts.latency) as server, tempfile.TemporaryDirectory() as tmp:
+        anifold.configure_jikan(server.url, opts.per_second, opts.per_minute, pool_size=opts.workers)
+
+        seq_queries = [f"sequential show {i}" for i in range(opts.queries)]
+        conc_queries = [f"concurrent show {i}" for i in range(opts.queries)]
+
+        seq = run_sequential(seq_queries, make_args(os.path.join(tmp, 'seq.json'), 1))
+        conc = run_concurrent(conc_queries, make_args(os.path.join(tmp, 'conc.json'), opts.workers))
+
+        print(f"queries:     {opts.queries}")
+        print(f"latency:     {opts.latency:.3f}s per request")
+        print(f"sequential:  {seq:.2f}s  ({opts.queries / seq:.1f} lookups/s)")
+        print(f"concurrent:  {conc:.2f}s  ({opts.queries / conc:.1f} lookups/s, {opts.workers} workers)")
+        print(f"speedup:     {seq / conc:.1f}x")
+        print(f"HTTP calls:  {server.calls}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Benchmark MAL candidate ranking on a labeled corpus.
+
+Each case is a folder (name + number of video files), the candidates Jikan
+would return for its guess, in API order, and the MAL id that is correct.
+The corpus mixes hand-labeled franchises with remakes/sequels and synthetic
+multi-season shows. Reports how often the old "first result" rule and the
+ranker pick the right entry, how the --min-confidence threshold trades
+coverage for precision, and the lowest threshold at which no hand-labeled
+case is auto-selected wrongly (what the default is set from).
+
+Usage:
+    python benchmarks/bench_ranking.py --synthetic 2000
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import anifold  # noqa: E402
+
+
+def anime(mal_id, title, year, episodes, english=None, synonyms=()):
+    return anifold.AnimeRecord(mal_id, title, english, None, synonyms, year, 8.0, 'Finished Airing', episodes, 'TV')
+
+
+# Hand-labeled: (folder name, video files, candidates in API order, expected mal_id)
+HUNTER = [anime(136, 'Hunter x Hunter', 1999, 62), anime(11061, 'Hunter x Hunter (2011)', 2011, 148)]
+FMA = [anime(121, 'Fullmetal Alchemist', 2003, 51),
+       anime(5114, 'Fullmetal Alchemist: Brotherhood', 2009, 64, 'Fullmetal Alchemist: Brotherhood')]
+SNK = [anime(16498, 'Shingeki no Kyojin', 2013, 25, 'Attack on Titan'),
+       anime(25777, 'Shingeki no Kyojin Season 2', 2017, 12, 'Attack on Titan Season 2'),
+       anime(35760, 'Shingeki no Kyojin Season 3', 2018, 12, 'Attack on Titan Season 3'),
+       anime(40028, 'Shingeki no Kyojin: The Final Season', 2020, 16, 'Attack on Titan: Final Season')]
+TRIGUN = [anime(38, 'Trigun', 1998, 26), anime(51535, 'Trigun Stampede', 2023, 12)]
+HELLSING = [anime(270, 'Hellsing', 2001, 13), anime(777, 'Hellsing Ultimate', 2006, 10)]
+LABELED = [
+    ('Hunter x Hunter (2011) [1080p]', 148, HUNTER, 11061),
+    ('Hunter.x.Hunter.1999.DVDRip', 62, HUNTER, 136),
+    ('Hunter x Hunter 2011 1080p', 0, HUNTER, 11061),
+    ('[Judas] Fullmetal Alchemist Brotherhood [1080p]', 64, FMA, 5114),
+    ('Fullmetal.Alchemist.2003.DVD', 51, FMA, 121),
+    ('[SubsPlease] Shingeki no Kyojin (2013) [1080p]', 25, SNK, 16498),
+    ('Attack on Titan 2017 S2 1080p', 12, list(reversed(SNK)), 25777),
+    ('Shingeki no Kyojin The Final Season (2020) 1080p', 16, SNK, 40028),
+    ('Trigun Stampede 2023 1080p', 12, TRIGUN, 51535),
+    ('Trigun.1998.BluRay.x264', 26, TRIGUN, 38),
+    ('Hellsing Ultimate 2006 BD', 10, HELLSING, 777),
+    ('Hellsing (2001) 720p', 13, HELLSING, 270),
+    ('Shingeki no Kyojin 2018 1080p', 12, SNK, 35760),
+    ('[Erai-raws] Attack on Titan [720p]', 0, SNK, 16498),
+    # Ambiguous: seasons 2 and 3 both have 12 episodes and there is no year
+    ('Shingeki no Kyojin [1080p]', 12, SNK, 35760),
+    ('Attack on Titan [1080p]', 12, SNK, 25777),
+]
+
+
+def synthetic_cases(count, seed):
+    """Multi-season shows: one query returns every season, the folder names one"""
+    rng = random.Random(seed)
+    syllables = ['ka', 'shi', 'no', 'mi', 'ra', 'to', 'yu', 'ki', 'ha', 'ru', 'ze', 'ro', 'su', 'ta']
+    cases = []
+    for n in range(count):
+        title = ' '.join(''.join(rng.choice(syllables) for _ in range(rng.randint(2, 4))).title()
+                         for _ in range(rng.randint(1, 3)))
+        first_year = rng.randint(1995, 2018)
+        seasons = []
+        for season in range(rng.randint(2, 4)):
+            name = title if season == 0 else f"{title} Season {season + 1}"
+            seasons.append(anime(n * 10 + season, name, first_year + season * rng.randint(1, 3),
+                                 rng.choice([12, 13, 24, 25, 26])))
+        candidates = seasons[:]
+        rng.shuffle(candidates)
+        target = rng.choice(seasons)
+        year = f" ({target.year})" if rng.random() < 0.7 else ''
+        videos = target.episodes if rng.random() < 0.8 else 0
+        folder = f"[{rng.choice(['SubsPlease', 'Erai-raws', 'Judas'])}] {title}{year} [1080p]"
+        cases.append((folder, videos, candidates, target.mal_id))
+    return cases
+
+
+def evaluate(cases, thresholds):
+    first_correct = 0
+    ranked_correct = 0
+    picks = {t: [0, 0] for t in thresholds}  # threshold -> [picked, picked and correct]
+    start = time.perf_counter()
+    for folder, videos, candidates, expected in cases:
+        guess = anifold.clean_anime_name(folder)
+        signals = anifold.FolderSignals(anifold.parse_folder_year(folder), videos)
+        ranked = anifold.rank_mal_candidates(candidates, guess, signals)
+        score, best = anifold.rank_confidence(ranked), ranked[0][1]
+        first_correct += candidates[0].mal_id == expected
+        ranked_correct += best.mal_id == expected
+        for t in thresholds:
+            if score >= t:
+                picks[t][0] += 1
+                picks[t][1] += best.mal_id == expected
+    elapsed = time.perf_counter() - start
+    return first_correct, ranked_correct, picks, elapsed
+
+
+def safe_threshold(cases):
+    """Lowest threshold (in steps of 0.05) that auto-selects no case wrongly"""
+    thresholds = [step / 20 for step in range(21)]
+    picks = evaluate(cases, thresholds)[2]
+    return next(t for t in thresholds if picks[t][0] == picks[t][1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--synthetic', type=int, default=2000, help='Synthetic multi-season cases to add')
+    parser.add_argument('--seed', type=int, default=7)
+    opts = parser.parse_args()
+
+    default = anifold.DEFAULT_CONFIG['min_confidence']
+    thresholds = sorted({0.3, 0.4, default, 0.5, 0.6, 0.7})
+    for label, cases in (('hand-labeled', LABELED), ('synthetic', synthetic_cases(opts.synthetic, opts.seed))):
+        first, ranked, picks, elapsed = evaluate(cases, thresholds)
+        total = len(cases)
+        print(f"[{label}] {total} cases, ranked in {elapsed * 1000:.1f}ms "
+              f"({total / elapsed:,.0f} folders/s)")
+        print(f"  first result:  {first}/{total} correct ({first / total:.0%})")
+        print(f"  ranked best:   {ranked}/{total} correct ({ranked / total:.0%})")
+        for t in thresholds:
+            picked, correct = picks[t]
+            precision = correct / picked if picked else 0.0
+            mark = '  (default)' if t == default else ''
+            print(f"  threshold {t:.2f}: auto-selects {picked / total:.0%}, precision {precision:.0%}{mark}")
+    print(f"Lowest threshold without a wrong hand-labeled pick: {safe_threshold(LABELED):.2f} "
+          f"(default --min-confidence {default})")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Benchmark --repair on a synthetic cataloged library.
+
+Catalogs a library whose desktop.ini files point at an icon directory that
+has since been moved, then times repair_library rewriting them all, and a
+second repair where everything is already correct.
+
+Usage:
+    python benchmarks/bench_repair.py --folders 5000 --icons 200
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import shutil
+import sys
+import tempfile
+import time
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import anifold  # noqa: E402
+from bench_library import make_ico_bytes  # noqa: E402
+
+
+def build(tmp, folders, icons, backend):
+    """Create, iconize and catalog a library; return the args to repair it with"""
+    library = os.path.join(tmp, 'library')
+    icon_dir = os.path.join(tmp, 'icons')
+    os.mkdir(library)
+    os.mkdir(icon_dir)
+    store = anifold.IconStore(os.path.join(icon_dir, anifold.DEFAULT_CONFIG['icon_store_dir']))
+    stored = []
+    for i in range(icons):
+        path = os.path.join(icon_dir, f"icon_{i:05d}.ico")
+        with open(path, 'wb') as f:
+            f.write(make_ico_bytes() + i.to_bytes(4, 'little'))
+        stored.append(store.add(path))
+
+    manifest = anifold.LibraryManifest(library, os.path.join(tmp, 'manifests'))
+    with anifold.FolderIconApplier(anifold.get_attribute_backend(backend)) as applier:
+        for i in range(folders):
+            folder = os.path.join(library, f"Show {i:05d}")
+            os.mkdir(folder)
+            icon = stored[i % icons]
+            applier.apply(folder, icon, lambda folder=folder, icon=icon, i=i:
+                          manifest.mark_done(folder, f"Show {i:05d}", icon, i + 1))
+    manifest.close()
+
+    moved = os.path.join(tmp, 'icons-moved')
+    shutil.move(icon_dir, moved)
+    return library, SimpleNamespace(
+        icon_dir=moved, manifest_dir=os.path.join(tmp, 'manifests'), attr_backend=backend,
+        convert_workers=1, dry_run=False
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--folders', type=int, default=5000)
+    parser.add_argument('--icons', type=int, default=200)
+    parser.add_argument('--backend', default='none', choices=sorted(anifold.ATTRIBUTE_BACKENDS))
+    opts = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        library, args = build(tmp, opts.folders, opts.icons, opts.backend)
+        print(f"{opts.folders} cataloged folders, {opts.icons} icons, icon directory moved")
+        for label in ('stale (icon dir moved)', 'already correct'):
+            anifold.metrics.reset()
+            with contextlib.redirect_stdout(io.StringIO()):
+                start = time.perf_counter()
+                anifold.repair_library(library, args)
+                elapsed = time.perf_counter() - start
+            counters = anifold.metrics.counters
+            print(f"  {label:<24} {elapsed:6.2f}s  {opts.folders / elapsed:8.0f} folders/s  "
+                  f"written {counters.get('desktop_ini_written', 0)}, "
+                  f"unchanged {counters.get('desktop_ini_unchanged', 0)}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Benchmark AniFold's startup: import time, --help, a warm-cache dry run and
+the time until the first prompt of an interactive single-folder run.
+
+Each scenario runs in a fresh interpreter. Besides the wall time it reports
+which heavy modules got loaded; --help and the warm-cache dry run should
+never load the HTTP stack.
+
+Usage:
+    python benchmarks/bench_startup.py --runs 10
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+SCRIPT = os.path.join(ROOT, 'anifold.py')
+HEAVY_MODULES = ['requests', 'urllib3', 'logging', 'webbrowser', 'hashlib', 'sqlite3', 'concurrent.futures']
+
+# Runs anifold.py as __main__ with input() patched to note when the first
+# prompt appears, then dumps the timings and loaded modules as JSON
+CHILD = r'''
+import atexit, builtins, json, os, runpy, sys, time
+result = {'first_prompt': None}
+def fake_input(prompt=''):
+    if result['first_prompt'] is None:
+        result['first_prompt'] = time.time() - float(os.environ['BENCH_T0'])
+        raise KeyboardInterrupt
+    return ''
+builtins.input = fake_input
+def dump():
+    result['modules'] = [m for m in json.loads(os.environ['BENCH_MODULES']) if m in sys.modules]
+    with open(os.environ['BENCH_RESULT'], 'w') as f:
+        json.dump(result, f)
+atexit.register(dump)
+sys.argv = json.loads(os.environ['BENCH_ARGV'])
+try:
+    runpy.run_path(sys.argv[0], run_name='__main__')
+except SystemExit:
+    pass
+'''
+
+
+def run_child(argv, cwd, result_file):
+    env = dict(os.environ, BENCH_ARGV=json.dumps([SCRIPT] + argv), BENCH_RESULT=result_file,
+               BENCH_MODULES=json.dumps(HEAVY_MODULES))
+    start = time.time()
+    env['BENCH_T0'] = repr(start)
+    subprocess.run([sys.executable, '-c', CHILD], cwd=cwd, env=env, stdin=subprocess.DEVNULL,
+                   stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=False)
+    elapsed = time.time() - start
+    with open(result_file) as f:
+        result = json.load(f)
+    return elapsed, result
+
+
+def time_command(command, runs):
+    times = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run(command, cwd=ROOT, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=False)
+        times.append(time.perf_counter() - start)
+    return statistics.median(times)
+
+
+def warm_cache(cache_file, query):
+    sys.path.insert(0, ROOT)
+    import anifold
+    cache = anifold.get_mal_cache(cache_file, 24)
+    # Several candidates, so the first prompt is the MAL choice
+    results = [anifold.AnimeRecord(mal_id, title, year=year, score=8.0, status='Finished Airing', episodes=episodes)
+               for mal_id, title, year, episodes in [(20, query, 2002, 220),
+                                                     (1735, f"{query}: Shippuuden", 2007, 500)]]
+    cache.set(anifold.get_mal_cache_key(query), query, results)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--runs', type=int, default=10)
+    opts = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        folder = os.path.join(tmp, '[Group] Naruto (2002) [1080p]')
+        os.mkdir(folder)
+        cache_file = os.path.join(tmp, 'cache.db')
+        warm_cache(cache_file, 'Naruto')
+        common = ['--cache-file', cache_file, '--title-index', os.path.join(tmp, 'titles.db'),
+                  '--icon-dir', os.path.join(tmp, 'icons'), '--manifest-dir', os.path.join(tmp, 'manifests')]
+        result_file = os.path.join(tmp, 'result.json')
+
+        baseline = time_command([sys.executable, '-c', 'pass'], opts.runs)
+        imported = time_command([sys.executable, '-c', 'import anifold'], opts.runs)
+        print(f"interpreter startup:   {baseline * 1000:7.1f}ms")
+        print(f"import anifold:        {(imported - baseline) * 1000:7.1f}ms (on top of startup)")
+
+        scenarios = [
+            ('--help', ['--help'], 'total'),
+            ('warm-cache dry run', ['--single', '--dry-run', '--auto-select'] + common, 'total'),
+            ('first prompt', ['--single'] + common, 'first_prompt'),
+        ]
+        for label, argv, metric in scenarios:
+            times = []
+            modules = set()
+            for _ in range(opts.runs):
+                elapsed, result = run_child(argv, folder, result_file)
+                times.append(result['first_prompt'] if metric == 'first_prompt' else elapsed)
+                modules.update(result['modules'])
+            if None in times:
+                print(f"{label + ':':<22} no prompt reached")
+                continue
+            loaded = ', '.join(m for m in HEAVY_MODULES if m in modules) or 'none'
+            print(f"{label + ':':<22} {statistics.median(times) * 1000:7.1f}ms  loaded: {loaded}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""
+Local icon server for --icon-provider local, used by the benchmarks.
+"""
+
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, unquote
+
+
+class FakeIconServer:
+    """Threaded HTTP server with a JSON icon index and the icon files it lists.
+
+    GET /icons/index.json lists {"title", "url"} for every icon, and
+    /icons/<file> serves the icon, honoring Range requests. Latency and
+    broken-off transfers can be injected to exercise the fetcher.
+
+    Args:
+        icons: {file name: (title, bytes)}
+        latency: Seconds to sleep before answering each request
+        truncate_rate: Fraction of full (non-Range) icon downloads that
+            are cut off halfway
+        seed: Seed for the injected faults
+    """
+
+    def __init__(self, icons, latency=0.0, truncate_rate=0.0, seed=0, host='127.0.0.1', port=0):
+        self.icons = icons
+        self.latency = latency
+        self.truncate_rate = truncate_rate
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.reset_counters()
+        self.httpd = ThreadingHTTPServer((host, port), self._handler())
+        self.httpd.daemon_threads = True
+        self.thread = None
+
+    def reset_counters(self):
+        with self.lock:
+            self.calls = 0
+            self.range_requests = 0
+            self.truncated = 0
+            self.bytes_sent = 0
+            self.active = 0
+            self.max_active = 0
+            self.request_times = []
+
+    @property
+    def url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}/icons/index.json"
+
+    def peak_rate(self, window=1.0):
+        """Most requests started within any `window` seconds"""
+        times = sorted(self.request_times)
+        peak = start = 0
+        for end, when in enumerate(times):
+            while when - times[start] > window:
+                start += 1
+            peak = max(peak, end - start + 1)
+        return peak
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def _send(self, status, body=b'', headers=None, length=None):
+                self.send_response(status)
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.send_header('Content-Length', str(len(body) if length is None else length))
+                self.end_headers()
+                if body:
+                    self.wfile.write(body)
+                with server.lock:
+                    server.bytes_sent += len(body)
+
+            def do_GET(self):
+                with server.lock:
+                    server.calls += 1
+                    server.active += 1
+                    server.max_active = max(server.max_active, server.active)
+                    server.request_times.append(time.monotonic())
+                try:
+                    if server.latency:
+                        time.sleep(server.latency)
+                    self._answer(unquote(urlparse(self.path).path))
+                finally:
+                    with server.lock:
+                        server.active -= 1
+
+            def _answer(self, path):
+                if path == '/icons/index.json':
+                    index = [{'title': title, 'url': name} for name, (title, _) in sorted(server.icons.items())]
+                    self._send(200, json.dumps(index).encode('utf-8'), {'Content-Type': 'application/json'})
+                    return
+                name = path.rpartition('/')[2]
+                if not path.startswith('/icons/') or name not in server.icons:
+                    self._send(404)
+                    return
+
+                data = server.icons[name][1]
+                requested = self.headers.get('Range', '')
+                if requested.startswith('bytes=') and requested.endswith('-'):
+                    start = int(requested[6:-1])
+                    with server.lock:
+                        server.range_requests += 1
+                    if start >= len(data):
+                        self._send(416, headers={'Content-Range': f'bytes */{len(data)}'})
+                        return
+                    self._send(206, data[start:], {'Content-Range': f'bytes {start}-{len(data) - 1}/{len(data)}'})
+                    return
+
+                with server.lock:
+                    truncate = server.random.random() < server.truncate_rate
+                    if truncate:
+                        server.truncated += 1
+                if truncate:
+                    # Promise the whole file, send half of it and hang up
+                    self._send(200, data[:len(data) // 2], length=len(data))
+                    self.close_connection = True
+                    return
+                self._send(200, data)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def start(self):
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+        return False
+
+
+if __name__ == '__main__':
+    import argparse
+    import os
+
+    parser = argparse.ArgumentParser(description="Serve a directory of icons as a --icon-source index")
+    parser.add_argument('directory', help='Icons and images, named after their anime')
+    parser.add_argument('--port', type=int, default=8766)
+    parser.add_argument('--latency', type=float, default=0.0)
+    parser.add_argument('--truncate-rate', type=float, default=0.0)
+    opts = parser.parse_args()
+
+    icons = {}
+    for entry in os.scandir(opts.directory):
+        if entry.is_file():
+            with open(entry.path, 'rb') as f:
+                icons[entry.name] = (os.path.splitext(entry.name)[0], f.read())
+    server = FakeIconServer(icons, latency=opts.latency, truncate_rate=opts.truncate_rate, port=opts.port)
+    print(f"Icon index at {server.url} ({len(icons)} icons)")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        server.stop()
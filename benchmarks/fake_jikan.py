@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the Jikan /v4/anime endpoint, used by the benchmarks.
+"""
+
+import hashlib
+import json
+import random
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+
+def make_anime(query, index):
+    """Build a Jikan-shaped anime object for a query"""
+    title = query.title() if index == 0 else f"{query.title()} {index + 1}"
+    return {
+        'mal_id': zlib.crc32(f"{query}|{index}".encode('utf-8')) % 100000,
+        'title': title,
+        'title_english': title,
+        'title_japanese': '',
+        'title_synonyms': [],
+        'type': 'TV',
+        'episodes': 12,
+        'status': 'Finished Airing',
+        'year': 2010 + index,
+        'score': round(8.5 - index * 0.3, 2),
+    }
+
+
+class FakeJikanServer:
+    """Threaded HTTP server answering /v4/anime?q=... with canned results.
+
+    Responses carry an ETag and conditional requests get a 304. Latency,
+    server errors and rate limiting can be injected to exercise the client.
+
+    Args:
+        latency: Seconds to sleep before answering each request
+        jitter: Extra random latency, up to this many seconds
+        error_rate: Fraction of requests answered with a 500
+        rate_limit_rate: Fraction of requests answered with a 429
+        retry_after: Retry-After seconds sent with 429 responses
+        results_per_query: Number of anime objects returned per query
+        responses: Optional {query: [anime, ...]} canned results; other
+            queries get generated ones
+        seed: Seed for the injected faults and jitter
+    """
+
+    def __init__(self, latency=0.0, jitter=0.0, error_rate=0.0, rate_limit_rate=0.0,
+                 retry_after=1, results_per_query=3, responses=None, seed=0,
+                 host='127.0.0.1', port=0):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.retry_after = retry_after
+        self.results_per_query = results_per_query
+        self.responses = {q.lower(): data for q, data in (responses or {}).items()}
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.reset_counters()
+        self.httpd = ThreadingHTTPServer((host, port), self._handler())
+        self.httpd.daemon_threads = True
+        self.thread = None
+
+    def reset_counters(self):
+        with self.lock:
+            self.calls = 0
+            self.not_modified = 0
+            self.errors = 0
+            self.rate_limited = 0
+            self.bytes_sent = 0
+
+    @property
+    def url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}/v4"
+
+    def results_for(self, query):
+        if query.lower() in self.responses:
+            return self.responses[query.lower()]
+        return [make_anime(query, i) for i in range(self.results_per_query)]
+
+    def _roll(self):
+        """Pick the injected outcome and delay for one request"""
+        with self.lock:
+            self.calls += 1
+            delay = self.latency + (self.random.uniform(0, self.jitter) if self.jitter else 0)
+            roll = self.random.random()
+            if roll < self.rate_limit_rate:
+                self.rate_limited += 1
+                return 429, delay
+            if roll < self.rate_limit_rate + self.error_rate:
+                self.errors += 1
+                return 500, delay
+            return 200, delay
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def _send(self, status, body=b'', headers=None):
+                self.send_response(status)
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                if body:
+                    self.wfile.write(body)
+                with server.lock:
+                    server.bytes_sent += len(body)
+
+            def do_GET(self):
+                parsed = urlparse(self.path)
+                if parsed.path.rstrip('/') != '/v4/anime':
+                    self._send(404)
+                    return
+
+                status, delay = server._roll()
+                if delay:
+                    time.sleep(delay)
+                if status == 429:
+                    body = json.dumps({'status': 429, 'type': 'RateLimitException'}).encode('utf-8')
+                    self._send(429, body, {'Retry-After': str(server.retry_after),
+                                           'Content-Type': 'application/json'})
+                    return
+                if status == 500:
+                    self._send(500, b'{"status": 500}', {'Content-Type': 'application/json'})
+                    return
+
+                query = parse_qs(parsed.query).get('q', [''])[0]
+                body = json.dumps({'data': server.results_for(query)}).encode('utf-8')
+                etag = '"%s"' % hashlib.md5(body).hexdigest()
+                if self.headers.get('If-None-Match') == etag:
+                    with server.lock:
+                        server.not_modified += 1
+                    self._send(304, headers={'ETag': etag})
+                    return
+                self._send(200, body, {'Content-Type': 'application/json', 'ETag': etag})
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def start(self):
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+        return False
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Run a fake Jikan server")
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--latency', type=float, default=0.2)
+    parser.add_argument('--jitter', type=float, default=0.0)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--rate-limit-rate', type=float, default=0.0)
+    opts = parser.parse_args()
+
+    server = FakeJikanServer(latency=opts.latency, jitter=opts.jitter, error_rate=opts.error_rate,
+                             rate_limit_rate=opts.rate_limit_rate, port=opts.port)
+    print(f"Fake Jikan listening on {server.url}")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        server.stop()